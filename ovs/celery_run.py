@@ -25,18 +25,21 @@ import sys
 import uuid
 import yaml
 import logging
+import time
 import threading
 import traceback
 from celery import Celery
 from celery.backends import BACKEND_ALIASES
-from celery.signals import task_postrun, worker_process_init, after_setup_logger, after_setup_task_logger
+from celery.signals import before_task_publish, celeryd_after_setup, task_prerun, task_postrun, worker_process_init, after_setup_logger, after_setup_task_logger
 from celery.task.control import inspect
 from kombu import Queue
 from kombu.serialization import register
 from threading import Thread
 from ovs_extensions.constants import is_unittest_mode
+from ovs.constants.celery import TASK_LATENCY_KEY, TASK_PRIORITIES, TASK_PRIORITY_QUEUE
 from ovs.constants.logging import CELERY_RUN_LOGGER, OVS_LOGGER
 from ovs.extensions.log import configure_logging, get_ovs_streamhandler
+from ovs.extensions.celery.extendedmsgpack import MsgpackExtender
 from ovs.extensions.celery.extendedyaml import YamlExtender
 from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.system import System
@@ -129,6 +132,9 @@ else:
     BACKEND_ALIASES.update({'arakoon': 'ovs.extensions.celery.arakoonresult:ArakoonResultBackend'})
     # Register the YAML encoder
     register('ovsyaml', YamlExtender.ordered_dump, yaml.safe_load, content_type='application/x-yaml', content_encoding='utf-8')
+    # Register the msgpack encoder, when available
+    if MsgpackExtender.is_available() is True:
+        register('ovsmsgpack', MsgpackExtender.dumps, MsgpackExtender.loads, content_type='application/x-ovsmsgpack', content_encoding='utf-8')
     memcache_servers = Configuration.get('/ovs/framework/memcache|endpoints')
     rmq_servers = Configuration.get('/ovs/framework/messagequeue|endpoints')
 
@@ -156,7 +162,8 @@ else:
     celery.conf.CELERY_DEFAULT_QUEUE = 'ovs_generic'
     celery.conf.CELERY_QUEUES = tuple([Queue('ovs_generic', routing_key='generic.#'),
                                        Queue('ovs_masters', routing_key='masters.#'),
-                                       Queue('ovs_{0}'.format(unique_id), routing_key='sr.{0}.#'.format(unique_id))])
+                                       Queue('ovs_{0}'.format(unique_id), routing_key='sr.{0}.#'.format(unique_id))] +
+                                      [Queue(TASK_PRIORITY_QUEUE.format(priority), routing_key='{0}.#'.format(priority)) for priority in TASK_PRIORITIES])
     celery.conf.CELERY_DEFAULT_EXCHANGE = 'generic'
     celery.conf.CELERY_DEFAULT_EXCHANGE_TYPE = 'topic'
     celery.conf.CELERY_DEFAULT_ROUTING_KEY = 'generic.default'
@@ -165,6 +172,58 @@ else:
     celery.conf.CELERY_TRACK_STARTED = True  # http://docs.celeryproject.org/en/latest/configuration.html#std:setting-CELERY_TRACK_STARTED
     celery.conf.CELERYD_HIJACK_ROOT_LOGGER = False
     celery.conf.CELERY_RESULT_SERIALIZER = 'ovsyaml'  # Change default pickle to ovsyaml as it support more typing than JSON
+    if Configuration.get('/ovs/framework/celery|result_serializer', default='ovsyaml') == 'ovsmsgpack' and MsgpackExtender.is_available() is True:
+        celery.conf.CELERY_RESULT_SERIALIZER = 'ovsmsgpack'  # Faster and more compact than ovsyaml, supporting the same types
+
+
+@celeryd_after_setup.connect
+def worker_setup_handler(sender=None, instance=None, **kwargs):
+    """
+    Hook for worker setup
+    The priority queues are consumed by dedicated workers (named after their priority class). All other workers consume
+    them as well, so these tasks are still executed on nodes without dedicated workers
+    """
+    _ = kwargs
+    if str(sender).split('@')[0] in TASK_PRIORITIES:
+        return
+    for priority in TASK_PRIORITIES:
+        instance.app.amqp.queues.select_add(TASK_PRIORITY_QUEUE.format(priority))
+
+
+@before_task_publish.connect
+def before_task_publish_handler(sender=None, body=None, **kwargs):
+    """
+    Hook for celery before-publish event
+    Stamps the message with the publish time, which is used to measure the queue latency
+    """
+    _ = sender, kwargs
+    if isinstance(body, dict):
+        body['ovs_published'] = time.time()
+
+
+@task_prerun.connect
+def task_prerun_handler(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Hook for celery pre-run event
+    Keeps track of the time tasks were waiting in their queue. The latency is accounted on the first part of the
+    routing key, which identifies the queue (generic, masters, sr, interactive, event or maintenance)
+    """
+    _ = sender, task_id, kwargs
+    try:
+        published = getattr(task.request, 'ovs_published', None)
+        delivery_info = getattr(task.request, 'delivery_info', None) or {}
+        if published is None or not delivery_info.get('routing_key'):
+            return
+        queue = delivery_info['routing_key'].split('.')[0]
+        latency = max(0, int((time.time() - published) * 1000))
+        volatile = VolatileFactory.get_client()
+        for name, value in [('count', 1), ('total_ms', latency)]:
+            key = TASK_LATENCY_KEY.format(queue, name)
+            if volatile.incr(key, value) is None:
+                volatile.add(key, 0, 0)
+                volatile.incr(key, value)
+    except Exception:
+        ovs_logger.exception('Caught error during pre-run handler')
 
 
 @task_postrun.connect
@@ -0,0 +1,27 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Arakoon Constants module. Contains constants related to the Arakoon maintenance done by the framework
+"""
+
+# Collapse related
+COLLAPSE_CONFIG_KEY = '/ovs/framework/arakoon_collapse'
+COLLAPSE_TLOGS_TO_KEEP = 2
+COLLAPSE_DEFAULTS = {'parallel_nodes': 0,  # 0 means all nodes at once
+                     'node_concurrency': 1,  # Collapses are IO heavy, so by default only 1 cluster at a time on each node
+                     'tlog_threshold': 4}  # Nothing to collapse when only the kept tlogs and the current tlog are present
+COLLAPSE_STATISTICS_KEY = 'ovs_arakoon_collapse_statistics'
@@ -2,3 +2,16 @@ import os
 
 CELERY_BASE = 'celery'
 CELERY_TASKS_LISTS_OUTPUT_PATH = os.path.join(os.path.sep, CELERY_BASE, 'tasks_list')
+
+# Task priority classes. Each class is consumed from its own queue by dedicated workers (see ovs-workers-priority)
+TASK_PRIORITY_INTERACTIVE = 'interactive'
+TASK_PRIORITY_EVENT = 'event'
+TASK_PRIORITY_MAINTENANCE = 'maintenance'
+TASK_PRIORITIES = [TASK_PRIORITY_INTERACTIVE, TASK_PRIORITY_EVENT, TASK_PRIORITY_MAINTENANCE]
+TASK_PRIORITY_QUEUE = 'ovs_{0}'
+TASK_PRIORITY_ROUTING_KEY = '{0}.default'
+TASK_PRIORITY_CONCURRENCY_KEY = '/ovs/framework/celery|concurrency'
+TASK_PRIORITY_CONCURRENCY = {TASK_PRIORITY_INTERACTIVE: 4,
+                             TASK_PRIORITY_EVENT: 4,
+                             TASK_PRIORITY_MAINTENANCE: 2}
+TASK_LATENCY_KEY = 'ovs_celery_latency_{0}_{1}'
@@ -16,3 +16,11 @@
 
 
 RABBIT_MQ_PACKAGE_NAME = 'rabbitmq-server'
+
+# Package information refresh
+PACKAGE_REFRESH_CONFIG_KEY = '/ovs/framework/packages|refresh'
+PACKAGE_REFRESH_DEFAULTS = {'workers': 10,  # Amount of StorageRouters being refreshed at the same time
+                            'max_age': 4 * 3600}  # Maximum amount of seconds the package information of an unchanged StorageRouter is re-used
+PACKAGE_FINGERPRINT_KEY = 'ovs_package_fingerprint_{0}'  # Format with the StorageRouter guid
+# Lists the files of the package databases and repository configuration of both apt and yum based systems
+PACKAGE_FINGERPRINT_COMMAND = "find /var/lib/dpkg/status /var/lib/apt/lists /etc/apt /var/lib/rpm/Packages /etc/yum.repos.d -maxdepth 2 -type f -printf '%p %s %T@\\n' 2>/dev/null; true"
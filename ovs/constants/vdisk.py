@@ -24,3 +24,19 @@ LOCK_NAMESPACE = 'ovs_locks'
 # Scrub related
 SCRUB_VDISK_LOCK = '{0}_{{0}}'.format(LOCK_NAMESPACE)  # Second format is the vdisk guid
 SCRUB_VDISK_EXCEPTION_MESSAGE = 'VDisk is being scrubbed. Unable to remove snapshots at this time'
+
+# Snapshot related
+SNAPSHOT_CONCURRENCY_KEY = '/ovs/framework/snapshots|node_concurrency'
+SNAPSHOT_CONCURRENCY_DEFAULT = 8  # Amount of snapshot calls sent to a single StorageDriver at the same time
+
+# Move related
+MOVE_CONFIG_KEY = '/ovs/framework/vdisk_move'
+MOVE_DEFAULTS = {'source_concurrency': 2,  # Moves away from a single StorageDriver at the same time
+                 'target_concurrency': 2,  # Moves towards a single StorageDriver at the same time
+                 'concurrency': 8,  # Moves in total at the same time
+                 'order_by': 'io'}  # Which vDisks to move first: 'size' (largest first), 'io' (busiest first) or None (as requested)
+
+# DTL related
+DTL_CHECKUP_CONFIG_KEY = '/ovs/framework/dtl_checkup'
+DTL_CHECKUP_DEFAULTS = {'workers': 10,  # Amount of vDisks checked at the same time
+                        'lock_retries': 3}  # Amount of times a locked vDisk is retried
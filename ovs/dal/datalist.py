@@ -20,10 +20,16 @@ DataList module
 
 import json
 import copy
+import time
+import heapq
+import base64
 import random
 import hashlib
+import logging
+from Queue import Empty, Queue
 from random import randint
-from ovs.dal.helpers import Descriptor, HybridRunner
+from threading import Thread
+from ovs.dal.helpers import DalToolbox, Descriptor, HybridRunner, ReverseSortKey
 from ovs.dal.exceptions import ObjectNotFoundException
 from ovs.extensions.storage.volatilefactory import VolatileFactory
 from ovs.extensions.storage.persistentfactory import PersistentFactory
@@ -38,6 +44,7 @@ class DataList(object):
 
     # Test hooks for unit tests
     _test_hooks = {}
+    _logger = logging.getLogger(__name__)
 
     class WhereOperator(object):
         """
@@ -63,6 +70,9 @@ class DataList(object):
     operator = Operator()
     NAMESPACE = 'ovs_list'
     CACHELINK = 'ovs_listcache'
+    SORT_CACHE_TIMEOUT = 300  # Sort results on own properties are validated against the object versions
+    SORT_CACHE_TIMEOUT_DEEP = 5  # Sort results on dynamics or relations can't be validated and are kept shortly
+    SORT_CACHE_MAX_ITEMS = 10000
 
     def __init__(self, object_type, query=None, key=None, guids=None):
         """
@@ -93,6 +103,7 @@ class DataList(object):
         self._query = query
         self._can_cache = True
         self._object_type = object_type
+        self._sparse_properties = set(prop.name for prop in object_type._properties if prop.indexed is True and prop.sparse is True)
         self._data = {}
         self._objects = {}
         self._guids = None
@@ -268,8 +279,22 @@ class DataList(object):
                     self.from_index = 'partial'
             else:
                 # Item consists of: ( <field>, <operator>, <value>, <ignore_case>(optional) )
-                if item[0] in indexed_properties:
-                    if item[1] == DataList.operator.EQUALS:
+                if self._is_index_safe(item, indexed_properties):
+                    if item[1] == DataList.operator.NOT_EQUALS and item[0] in self._sparse_properties:
+                        # Only index safe for sparse indexes, which contain all objects that have a value for the property
+                        indexed_keys = set(str(key)
+                                           for _, keys_set in self._persistent.prefix_entries(base_index_prefix.format(item[0], ''))
+                                           for key in keys_set)
+                        if keys is None:
+                            keys = indexed_keys
+                        elif where_operator == DataList.where_operator.AND:
+                            keys &= indexed_keys
+                        else:
+                            keys |= indexed_keys
+                        if self.from_index == 'none':
+                            self.from_index = 'full'
+                        items.remove(item)
+                    elif item[1] == DataList.operator.EQUALS:
                         if item[0] == 'guid':
                             indexed_keys = {object_key.format(item[2])}
                         else:
@@ -331,10 +356,29 @@ class DataList(object):
                 possible = self._can_use_indexes(indexed_properties, item['items'], item['type'])
                 if possible is False:
                     return False
-            elif item[0] not in indexed_properties and where_operator == DataList.where_operator.OR:
+            elif not self._is_index_safe(item, indexed_properties) and where_operator == DataList.where_operator.OR:
                 return False
         return True
 
+    def _is_index_safe(self, item, indexed_properties):
+        """
+        Validates whether a query item can be answered by the index of its property
+        Sparse indexes do not contain the objects without a value, so these can only answer for actual values, or for 'not None'
+        :param item: The query item
+        :param indexed_properties: The names of all indexed properties
+        :return: Whether or not the index of the property can be used
+        :rtype: bool
+        """
+        if item[0] not in indexed_properties:
+            return False
+        if item[0] not in self._sparse_properties:
+            return True
+        if item[1] == DataList.operator.NOT_EQUALS:
+            return item[2] is None
+        if item[1] == DataList.operator.IN and isinstance(item[2], list):
+            return None not in item[2]
+        return item[2] is not None
+
     def _data_generator(self, prefix, query_items, query_type):
         """
         Generator that yields key-value pairs for the given prefix. If indexes are available an can be
@@ -814,6 +858,224 @@ class DataList(object):
         self._shallow_sort = True
         self._guids.sort(key=_extract_key, reverse=reverse)
 
+    def sort_by(self, fields, use_cache=True):
+        """
+        Sorts the list on multiple fields in a single pass. A natural sort key is computed only once for every object.
+        Own properties are read from the raw data, other paths (relations, dynamics, dict entries) from the objects.
+        The resulting order is cached for the key of this list, so sorting the same list again (e.g. when paging through it)
+        can reuse it as long as the list contains the same objects at the same versions.
+        :param fields: Fields to sort on, most significant first. Prefix a field with '-' to sort descending (eg: ['name', '-description'])
+        :type fields: list[str]
+        :param use_cache: Use the cached result of a previous sort
+        :type use_cache: bool
+        :return: None
+        :rtype: NoneType
+        """
+        if self._executed is False:
+            self._execute_query()
+        if len(self._guids) < 2 or len(fields) == 0:
+            return
+
+        sort_fields = self._parse_sort_fields(fields)
+        shallow = all(entry[2] is True for entry in sort_fields)
+
+        fingerprint = None
+        cache_key = None
+        if use_cache is True and len(self._guids) <= DataList.SORT_CACHE_MAX_ITEMS:
+            cache_key = '{0}_sort_{1}'.format(self._key, hashlib.sha1(','.join(fields)).hexdigest())
+            fingerprint = hashlib.sha1(','.join(sorted('{0}:{1}'.format(guid, self._data.get(guid, {}).get('data', {}).get('_version'))
+                                                       for guid in self._guids))).hexdigest()
+            cached_data = self._volatile.get(cache_key)
+            if cached_data is not None and cached_data['fingerprint'] == fingerprint:
+                self._guids = cached_data['guids'][:]
+                return
+
+        self._guids.sort(key=lambda guid: self._orient_sort_key(self._build_sort_key(guid, sort_fields), sort_fields))
+        if cache_key is not None:
+            self._volatile.set(cache_key, {'fingerprint': fingerprint, 'guids': self._guids},
+                               DataList.SORT_CACHE_TIMEOUT if shallow is True else DataList.SORT_CACHE_TIMEOUT_DEEP)
+
+    def get_page(self, fields, page_size, cursor=None):
+        """
+        Keyset (cursor based) pagination. Returns the page_size items following the item the cursor points to, in the
+        order given by the sort fields. Only the keys of the items are computed: earlier pages are neither sorted, loaded
+        nor copied. The guid is always used as the last sort field so every item has a unique position.
+        :param fields: Fields to sort on, most significant first. Prefix a field with '-' to sort descending
+        :type fields: list[str]
+        :param page_size: Amount of items in a page
+        :type page_size: int
+        :param cursor: Opaque cursor as returned for the previous page. None to retrieve the first page
+        :type cursor: str or NoneType
+        :return: A DataList containing the page and the cursor for the next page (None when this is the last page)
+        :rtype: tuple(ovs.dal.datalist.DataList, str or NoneType)
+        :raises ValueError: When the cursor is invalid or was generated for a different sorting
+        """
+        if self._executed is False:
+            self._execute_query()
+        if page_size < 1:
+            raise ValueError('The page size should be at least 1')
+        sort_fields = self._parse_sort_fields(fields)
+
+        entries = ((self._orient_sort_key(key, sort_fields), guid, key)
+                   for guid, key in ((guid, self._build_sort_key(guid, sort_fields)) for guid in self._guids))
+        if cursor is not None:
+            try:
+                cursor_data = json.loads(base64.urlsafe_b64decode(str(cursor)))
+                if cursor_data['fields'] != list(fields):
+                    raise ValueError('Cursor was generated for a different sorting')
+                cursor_key = tuple(tuple(part.encode('utf-8') if isinstance(part, unicode) else part for part in value)
+                                   for value in cursor_data['key'])
+                if len(cursor_key) != len(sort_fields):
+                    raise ValueError('Cursor does not match the sort fields')
+                last_entry = (self._orient_sort_key(cursor_key, sort_fields), str(cursor_data['guid']))
+            except (TypeError, KeyError, ValueError) as ex:
+                raise ValueError('Invalid cursor: {0}'.format(ex))
+            entries = (entry for entry in entries if entry[:2] > last_entry)
+
+        page_entries = heapq.nsmallest(page_size + 1, entries)
+        next_cursor = None
+        if len(page_entries) > page_size:
+            page_entries = page_entries[:page_size]
+            _, last_guid, last_key = page_entries[-1]
+            next_cursor = base64.urlsafe_b64encode(json.dumps({'fields': list(fields),
+                                                               'key': last_key,
+                                                               'guid': last_guid}))
+        return self._get_subset([entry[1] for entry in page_entries]), next_cursor
+
+    def _parse_sort_fields(self, fields):
+        """
+        Parses the given sort fields
+        :param fields: Fields to sort on. Prefix a field with '-' to sort descending
+        :type fields: list[str]
+        :return: A tuple (field, descending, is_own_property) for every field
+        :rtype: list[tuple(str, bool, bool)]
+        """
+        property_names = set(prop.name for prop in self._object_type._properties)
+        sort_fields = []
+        for field in fields:
+            descending = field.startswith('-')
+            field = field[1:] if descending is True else field
+            sort_fields.append((field, descending, field in property_names or field == 'guid'))
+        return sort_fields
+
+    def _build_sort_key(self, guid, sort_fields):
+        """
+        Builds the natural sort key for the item with the given guid, containing one natural key per sort field
+        Own properties are read from the raw data, other paths (relations, dynamics, dict entries) from the object
+        :param guid: Guid of the item
+        :type guid: str
+        :param sort_fields: Sort fields as returned by _parse_sort_fields
+        :type sort_fields: list[tuple(str, bool, bool)]
+        :return: The sort key, not yet taking descending fields into account
+        :rtype: tuple
+        """
+        key = []
+        obj = None
+        for field, _, is_property in sort_fields:
+            if field == 'guid':
+                key.append(DalToolbox.natural_key(guid))
+            elif is_property is True and guid in self._data:
+                key.append(DalToolbox.natural_key(self._data[guid]['data'].get(field)))
+            else:
+                if obj is None:
+                    obj = self._get_object(guid)
+                key.append(DalToolbox.extract_key(obj, field))
+        return tuple(key)
+
+    @staticmethod
+    def _orient_sort_key(key, sort_fields):
+        """
+        Reverses the parts of a sort key which belong to descending sort fields
+        :param key: Sort key as returned by _build_sort_key
+        :type key: tuple
+        :param sort_fields: Sort fields as returned by _parse_sort_fields
+        :type sort_fields: list[tuple(str, bool, bool)]
+        :return: The sort key to compare items with
+        :rtype: tuple
+        """
+        return tuple(ReverseSortKey(value) if sort_field[1] is True else value for value, sort_field in zip(key, sort_fields))
+
+    def _get_subset(self, guids):
+        """
+        Builds a new, executed DataList containing the given guids of this list, copying the already loaded data
+        :param guids: Guids to include, in the requested order
+        :type guids: list[str]
+        :return: The new DataList
+        :rtype: ovs.dal.datalist.DataList
+        """
+        guid_set = set(guids)
+        new_datalist = DataList(self._object_type)
+        new_datalist._guids = guids
+        new_datalist._executed = True
+        new_datalist._data = dict((key, copy.deepcopy(value)) for key, value in self._data.iteritems() if key in guid_set)
+        new_datalist._objects = dict((key, value.clone()) for key, value in self._objects.iteritems() if key in guid_set)
+        return new_datalist
+
+    def prefetch_dynamics(self, dynamics, workers=8, timeout=5):
+        """
+        Loads the given dynamic properties of all objects in the list concurrently, so that they can be served from
+        the cache afterwards (e.g. when serializing the list).
+        Dynamics are loaded through their regular property, so the caching and locking (Dynamic.locked) behavior is identical
+        to loading them one by one. Dynamics which are not cached (timeout of 0) are skipped as prefetching them is useless.
+        When a single dynamic takes longer than the given timeout, no further objects are prefetched for that dynamic
+        and no longer waited upon. These will be loaded on first access instead.
+        :param dynamics: Names of the dynamic properties to prefetch
+        :type dynamics: list[str]
+        :param workers: Maximum amount of threads to use
+        :type workers: int
+        :param timeout: Time (in seconds) a single dynamic is allowed to take before it is no longer waited upon
+        :type timeout: float
+        :return: Names of the dynamics which exceeded the timeout
+        :rtype: set[str]
+        """
+        work_queue = Queue()
+        for obj in self.itersafe():
+            for dynamic in obj._dynamics:
+                if dynamic.name in dynamics and dynamic.timeout > 0:
+                    work_queue.put((obj, dynamic))
+        slow_dynamics = set()
+        if work_queue.empty():
+            return slow_dynamics
+
+        running = {}
+        abandoned = set()
+
+        def _worker(worker_id):
+            while worker_id not in abandoned:
+                try:
+                    obj, dynamic = work_queue.get_nowait()
+                except Empty:
+                    break
+                if dynamic.name in slow_dynamics:
+                    continue
+                running[worker_id] = (time.time(), dynamic.name)
+                try:
+                    getattr(obj, dynamic.name)
+                except Exception as ex:
+                    # The exception will surface again when the dynamic is accessed
+                    DataList._logger.debug('Prefetching {0} of {1} failed: {2}'.format(dynamic.name, obj.guid, ex))
+                finally:
+                    start, _ = running.pop(worker_id)
+                    if time.time() - start > timeout:
+                        slow_dynamics.add(dynamic.name)
+
+        threads = []
+        for index in xrange(min(workers, work_queue.qsize())):
+            thread = Thread(target=_worker, args=(index,))
+            thread.daemon = True  # A hanging dynamic may not block the process from exiting
+            thread.start()
+            threads.append(thread)
+        for index, thread in enumerate(threads):
+            while thread.is_alive():
+                thread.join(0.05)
+                running_info = running.get(index)
+                if running_info is not None and time.time() - running_info[0] > timeout:
+                    # Stop waiting for this worker. The others will skip the slow dynamic
+                    slow_dynamics.add(running_info[1])
+                    abandoned.add(index)
+                    break
+        return slow_dynamics
+
     def reverse(self):
         """
         Reverses the list
@@ -942,13 +1204,7 @@ class DataList(object):
             self._execute_query()
 
         if isinstance(item, slice):
-            guids = self._guids[item.start:item.stop]
-            new_datalist = DataList(self._object_type)
-            new_datalist._guids = guids
-            new_datalist._executed = True  # Will always be True at this point, since _execute_query is executed if False
-            new_datalist._data = dict((key, copy.deepcopy(value)) for key, value in self._data.iteritems() if key in guids)
-            new_datalist._objects = dict((key, value.clone()) for key, value in self._objects.iteritems() if key in guids)
-            return new_datalist
+            return self._get_subset(self._guids[item.start:item.stop])
         else:
             guid = self._guids[item]
             return self._get_object(guid)
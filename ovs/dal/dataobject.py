@@ -22,13 +22,13 @@ import copy
 import time
 import json
 import logging
-import inspect
 import hashlib
 from random import randint
+from threading import Lock
 from ovs.dal.exceptions import (ObjectNotFoundException, ConcurrencyException, LinkedObjectException,
                                 MissingMandatoryFieldsException, RaceConditionException, InvalidRelationException,
                                 VolatileObjectException, UniqueConstraintViolationException)
-from ovs.dal.helpers import Descriptor, DalToolbox, HybridRunner
+from ovs.dal.helpers import Descriptor, DalToolbox, DynamicRefresher, HybridRunner
 from ovs.dal.relations import RelationMapper
 from ovs.dal.datalist import DataList
 from ovs_extensions.generic.volatilemutex import NoLockAvailableException
@@ -148,8 +148,12 @@ class DataObject(object):
     _dynamics = []    # Timeout of readonly object properties cache
     _relations = []   # Blueprint for relations
     _logger = logging.getLogger(__name__)
+    _dynamic_statistics = {}  # Statistics of the dynamics retrieved within this process
+    _dynamic_statistics_lock = Lock()
 
     NAMESPACE = 'ovs_data'  # Arakoon namespace
+    SAVE_MANY_CHUNK_SIZE = 500  # Maximum amount of objects saved in a single transaction
+    SAVE_MANY_MAX_SIZE = 4 * 1024 * 1024  # Maximum amount of object data (bytes) saved in a single transaction
 
     ###############
     # Constructor #
@@ -609,7 +613,7 @@ class DataObject(object):
                         raise RuntimeError('An index can only be set on field of type str, int, float, long, or bool')
                     classname = self.__class__.__name__.lower()
                     key = prop.name
-                    if self._new is False and key in changed_fields:
+                    if self._new is False and key in changed_fields and (prop.sparse is False or self._original[key] is not None):
                         original_value = self._original[key]
                         index_key = base_index_key.format(classname, key, hashlib.sha1(str(original_value)).hexdigest())
                         indexed_keys = list(self._persistent.get_multi([index_key], must_exist=False))[0]
@@ -622,7 +626,7 @@ class DataObject(object):
                                 self._persistent.delete(index_key, transaction=transaction)
                             else:
                                 self._persistent.set(index_key, indexed_keys, transaction=transaction)
-                    if self._new is True or key in changed_fields:
+                    if (self._new is True or key in changed_fields) and (prop.sparse is False or self._data[key] is not None):
                         new_value = self._data[key]
                         index_key = base_index_key.format(classname, key, hashlib.sha1(str(new_value)).hexdigest())
                         indexed_keys = list(self._persistent.get_multi([index_key], must_exist=False))[0]
@@ -723,6 +727,211 @@ class DataObject(object):
         self.dirty = False
         self._new = False
 
+    @staticmethod
+    def save_many(objects):
+        """
+        Save multiple objects to the persistent backend using as few transactions as possible
+        The objects are saved in chunks (limited by SAVE_MANY_CHUNK_SIZE objects and SAVE_MANY_MAX_SIZE bytes). The index, unique
+        constraint, reverse index and list cache mutations of all objects in a chunk are combined into a single transaction.
+        Every object is still asserted against the data it was loaded with. When a chunk fails on an assert, its objects are saved
+        one by one instead, applying the conflict resolve settings of every object
+        Objects created within the same call can be related to each other. Objects of which the data did not change are skipped
+        Saving recursively is not supported
+        :param objects: Objects to save
+        :type objects: list[DataObject]
+        :return: None
+        :rtype: NoneType
+        """
+        objects = [obj for obj in objects if obj._new is True or obj._data != obj._original]
+        chunk = []
+        chunk_size = 0
+        for obj in objects:
+            if obj.volatile is True:
+                raise VolatileObjectException()
+            size = len(json.dumps(obj._data, default=str))
+            if len(chunk) > 0 and (len(chunk) >= DataObject.SAVE_MANY_CHUNK_SIZE or chunk_size + size > DataObject.SAVE_MANY_MAX_SIZE):
+                DataObject._save_chunk(chunk)
+                chunk = []
+                chunk_size = 0
+            chunk.append(obj)
+            chunk_size += size
+        if len(chunk) > 0:
+            DataObject._save_chunk(chunk)
+
+    @staticmethod
+    def _save_chunk(objects):
+        """
+        Saves a chunk of objects in a single transaction. Falls back to saving them one by one when an assert fails
+        """
+        persistent = objects[0]._persistent
+        volatile = objects[0]._volatile
+        object_keys = set(obj._key for obj in objects)
+        base_index_key = 'ovs_index_{0}|{1}|{2}'
+        base_reverse_key = 'ovs_reverseindex_{0}_{1}|{2}|{3}'
+
+        # Validate the objects and gather the mutations
+        validation_keys = set()
+        index_changes = {}  # Index key: (keys to remove, keys to add)
+        unique_claims = {}
+        reverse_deletes = []
+        reverse_sets = []
+        unique_releases = []
+        changed_fields_per_class = {}
+        new_classes = set()
+        all_changed_fields = {}
+        dependencies = {}  # Object key: keys of the related objects
+        for obj in objects:
+            invalid_fields = [prop.name for prop in obj._properties if prop.mandatory is True and obj._data[prop.name] is None]
+            invalid_fields += [relation.name for relation in obj._relations if relation.mandatory is True and obj._data[relation.name]['guid'] is None]
+            if len(invalid_fields) > 0:
+                raise MissingMandatoryFieldsException('Missing fields on {0}: {1}'.format(obj._classname, ', '.join(invalid_fields)))
+
+            changed_fields = [attribute for attribute in obj._data.keys() if attribute != '_version' and obj._data[attribute] != obj._original.get(attribute)]
+            all_changed_fields[obj._key] = changed_fields
+            if obj._new is True:
+                new_classes.add(obj._classname)
+            changed_fields_per_class.setdefault(obj._classname, set()).update(changed_fields)
+
+            classname = obj.__class__.__name__.lower()
+            for prop in obj._properties:
+                if prop.indexed is True:
+                    if prop.property_type not in [str, int, float, long, bool]:
+                        raise RuntimeError('An index can only be set on field of type str, int, float, long, or bool')
+                    if obj._new is False and prop.name in changed_fields and (prop.sparse is False or obj._original[prop.name] is not None):
+                        index_key = base_index_key.format(classname, prop.name, hashlib.sha1(str(obj._original[prop.name])).hexdigest())
+                        index_changes.setdefault(index_key, ([], []))[0].append(obj._key)
+                    if (obj._new is True or prop.name in changed_fields) and (prop.sparse is False or obj._data[prop.name] is not None):
+                        index_key = base_index_key.format(classname, prop.name, hashlib.sha1(str(obj._data[prop.name])).hexdigest())
+                        index_changes.setdefault(index_key, ([], []))[1].append(obj._key)
+                if prop.unique is True:
+                    if prop.property_type not in [str, int, float, long]:
+                        raise RuntimeError('A unique constraint can only be set on field of type str, int, float, or long')
+                    unique_key = 'ovs_unique_{0}_{1}_{2}'.format(obj._classname, prop.name, hashlib.sha1(str(obj._data[prop.name])).hexdigest())
+                    if unique_key in unique_claims and unique_claims[unique_key][0] != obj._key:
+                        raise UniqueConstraintViolationException('The unique constraint on {0}.{1} was violated'.format(obj.__class__.__name__, prop.name))
+                    unique_claims[unique_key] = (obj._key, obj._new is True or prop.name in changed_fields)
+                    if obj._new is False and prop.name in changed_fields:
+                        unique_releases.append((obj._key, 'ovs_unique_{0}_{1}_{2}'.format(obj._classname, prop.name, hashlib.sha1(str(obj._original[prop.name])).hexdigest())))
+
+            for relation in obj._relations:
+                foreign_classname = classname if relation.foreign_type is None else relation.foreign_type.__name__.lower()
+                original_guid = obj._original[relation.name]['guid'] if obj._new is False else None
+                new_guid = obj._data[relation.name]['guid']
+                if new_guid is not None:
+                    foreign_key = '{0}_{1}_{2}'.format(DataObject.NAMESPACE, foreign_classname, new_guid)
+                    validation_keys.add(foreign_key)
+                    dependencies.setdefault(obj._key, set()).add(foreign_key)
+                if original_guid != new_guid:
+                    if original_guid is not None:
+                        reverse_deletes.append(base_reverse_key.format(foreign_classname, original_guid, relation.foreign_key, obj.guid))
+                    if new_guid is not None:
+                        reverse_sets.append(base_reverse_key.format(foreign_classname, new_guid, relation.foreign_key, obj.guid))
+
+        # Related objects saved within this chunk will exist once the transaction is applied
+        validation_keys = list(validation_keys.difference(object_keys))
+        try:
+            [_ for _ in persistent.get_multi(validation_keys)]
+        except KeyNotFoundException:
+            raise ObjectNotFoundException('One of the relations specified in the objects to save was not found')
+
+        transaction = persistent.begin_transaction()
+        for obj in objects:
+            if obj._new is False:
+                persistent.assert_value(obj._key, obj._original, transaction=transaction)
+
+        # Indexes are read once and updated once for all objects
+        index_keys = sorted(index_changes.keys())
+        for index_key, indexed_keys in zip(index_keys, persistent.get_multi(index_keys, must_exist=False)):
+            to_remove, to_add = index_changes[index_key]
+            persistent.assert_value(index_key, None if indexed_keys is None else indexed_keys[:], transaction=transaction)
+            new_indexed_keys = [key for key in (indexed_keys or []) if key not in to_remove]
+            new_indexed_keys += [key for key in to_add if key not in new_indexed_keys]
+            if len(new_indexed_keys) == 0:
+                if indexed_keys is not None:
+                    persistent.delete(index_key, transaction=transaction)
+            elif new_indexed_keys != indexed_keys:
+                persistent.set(index_key, new_indexed_keys, transaction=transaction)
+
+        for reverse_key in reverse_deletes:
+            persistent.delete(reverse_key, must_exist=False, transaction=transaction)
+        for reverse_key in reverse_sets:
+            persistent.set(reverse_key, 0, transaction=transaction)
+
+        # List caches are looked up once per class
+        for classname, changed_fields in changed_fields_per_class.iteritems():
+            persistent_cache_key = DataList.generate_persistent_cache_key(classname)
+            cache_keys = set()
+            for key in list(persistent.prefix(persistent_cache_key)):
+                _, field, cache_key = DataList.get_key_parts(key)
+                if field in changed_fields or classname in new_classes:
+                    cache_keys.add(cache_key)
+            for cache_key in cache_keys:
+                volatile.delete(cache_key)
+            if classname in new_classes:
+                persistent.delete_prefix(persistent_cache_key, transaction=transaction)
+            else:
+                for field in changed_fields:
+                    persistent.delete_prefix(DataList.generate_persistent_cache_key(classname, field), transaction=transaction)
+
+        for object_key, unique_key in unique_releases:
+            if unique_key not in unique_claims:
+                persistent.assert_value(unique_key, object_key, transaction=transaction)
+                persistent.delete(unique_key, transaction=transaction)
+        for unique_key, (object_key, claimed) in unique_claims.iteritems():
+            if claimed is True:
+                persistent.assert_value(unique_key, None, transaction=transaction)
+            persistent.set(unique_key, object_key, transaction=transaction)
+
+        for obj in objects:
+            obj._data['_version'] = (obj._original.get('_version', 0) if obj._new is False else 0) + 1
+            persistent.set(obj._key, obj._data, transaction=transaction)
+
+        mutexes = [obj._mutex_version for obj in sorted(objects, key=lambda o: o._key)]
+        acquired = []
+        try:
+            for mutex in mutexes:
+                mutex.acquire(30)
+                acquired.append(mutex)
+            persistent.apply_transaction(transaction)
+            for obj in objects:
+                volatile.delete(obj._key)
+            successful = True
+        except (AssertException, KeyNotFoundException) as ex:
+            DataObject._logger.info('Saving {0} objects at once failed ({1}), saving them one by one'.format(len(objects), ex))
+            successful = False
+        finally:
+            for mutex in acquired:
+                mutex.release()
+
+        if successful is False:
+            # Every object is saved after the objects of the chunk it relates to, so the relations can be validated
+            objects_by_key = dict((obj._key, obj) for obj in objects)
+            ordered = []
+            visited = set()
+            for obj in objects:
+                stack = [(obj._key, False)]
+                while len(stack) > 0:
+                    key, expanded = stack.pop()
+                    if expanded is True:
+                        ordered.append(objects_by_key[key])
+                        continue
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    stack.append((key, True))
+                    for dependency in dependencies.get(key, ()):
+                        if dependency in objects_by_key and dependency not in visited:
+                            stack.append((dependency, False))
+            for obj in ordered:
+                obj._data['_version'] = obj._original.get('_version', 0)
+                obj.save()
+            return
+        for obj in objects:
+            obj.invalidate_dynamics()
+            obj._original = copy.deepcopy(obj._data)
+            obj.dirty = False
+            obj._new = False
+
     ###############
     # Other CRUDs #
     ###############
@@ -790,6 +999,8 @@ class DataObject(object):
                     classname = self.__class__.__name__.lower()
                     key = prop.name
                     current_value = self._original[key]
+                    if prop.sparse is True and current_value is None:
+                        continue
                     index_key = base_index_key.format(classname, key, hashlib.sha1(str(current_value)).hexdigest())
                     indexed_keys = list(self._persistent.get_multi([index_key], must_exist=False))[0]
                     if indexed_keys is not None and self._key in indexed_keys:
@@ -1016,37 +1227,115 @@ class DataObject(object):
     def _backend_property(self, fct, dynamic):
         """
         Handles the internal caching of dynamic properties
+        A dynamic with a grace period keeps returning its cached value for 'grace' seconds after the timeout, while a single
+        worker refreshes it in the background
         """
+        start = time.time()
         caller_name = dynamic.name
         cache_key = '{0}_{1}'.format(self._key, caller_name)
+        cached_data = self._volatile.get(cache_key)
+        if cached_data is not None:
+            if self._is_dynamic_fresh(cached_data, dynamic, start) is True:
+                DataObject._register_dynamic_call(self, dynamic, 'hits', start)
+                return DalToolbox.convert_unicode_to_string(cached_data['data'])
+            if DynamicRefresher.is_enabled() is True and self._new is False and self.volatile is False:
+                # Only a single worker in the cluster refreshes the value. The claim expires when the worker would die while refreshing
+                if self._volatile.add('{0}_refresh'.format(cache_key), 1, max(dynamic.timeout, 10)) is not False:
+                    DynamicRefresher.schedule(lambda: self._refresh_dynamic(dynamic))
+                DataObject._register_dynamic_call(self, dynamic, 'stale_hits', start)
+                return DalToolbox.convert_unicode_to_string(cached_data['data'])
+
         mutex = volatile_mutex(cache_key)
         try:
-            cached_data = self._volatile.get(cache_key)
-            if cached_data is None:
-                if dynamic.locked:
-                    mutex.acquire()
-                    cached_data = self._volatile.get(cache_key)
-                if cached_data is None:
-                    function_info = inspect.getargspec(fct)
-                    start = time.time()
-                    if 'dynamic' in function_info.args:
-                        dynamic_data = fct(dynamic=dynamic)  # Load data from backend
-                    else:
-                        dynamic_data = fct()
-                    self._dynamic_timings[caller_name] = time.time() - start
-                    correct, allowed_types, given_type = DalToolbox.check_type(dynamic_data, dynamic.return_type)
-                    if not correct:
-                        raise TypeError('Dynamic property {0} allows types {1}. {2} given'.format(
-                            caller_name, str(allowed_types), given_type
-                        ))
-                    # Set the result of the function into a dict to avoid None retrieved from the cache when key is not found
-                    cached_data = {'data': dynamic_data}
-                    if dynamic.timeout > 0:
-                        self._volatile.set(cache_key, cached_data, dynamic.timeout)
-            return DalToolbox.convert_unicode_to_string(cached_data['data'])
+            if dynamic.locked:
+                mutex.acquire()
+                cached_data = self._volatile.get(cache_key)
+                if cached_data is not None and self._is_dynamic_fresh(cached_data, dynamic, time.time()) is True:
+                    DataObject._register_dynamic_call(self, dynamic, 'hits', start)
+                    return DalToolbox.convert_unicode_to_string(cached_data['data'])
+            dynamic_data = self._load_dynamic(fct, dynamic, cache_key)
+            DataObject._register_dynamic_call(self, dynamic, 'misses', start)
+            return DalToolbox.convert_unicode_to_string(dynamic_data)
         finally:
             mutex.release()
 
+    def _load_dynamic(self, fct, dynamic, cache_key):
+        """
+        Loads the value of a dynamic from the backend and caches it
+        """
+        caller_name = dynamic.name
+        start = time.time()
+        if dynamic.accepts_dynamic(fct):
+            dynamic_data = fct(dynamic=dynamic)  # Load data from backend
+        else:
+            dynamic_data = fct()
+        self._dynamic_timings[caller_name] = time.time() - start
+        correct, allowed_types, given_type = DalToolbox.check_type(dynamic_data, dynamic.return_type)
+        if not correct:
+            raise TypeError('Dynamic property {0} allows types {1}. {2} given'.format(
+                caller_name, str(allowed_types), given_type
+            ))
+        # Set the result of the function into a dict to avoid None retrieved from the cache when key is not found
+        if dynamic.timeout > 0:
+            self._volatile.set(cache_key, {'data': dynamic_data, 'time': time.time()}, dynamic.timeout + dynamic.grace)
+        return dynamic_data
+
+    def _refresh_dynamic(self, dynamic):
+        """
+        Refreshes the cached value of a dynamic. Executed in the background, on a separate instance of this object
+        """
+        start = time.time()
+        cache_key = '{0}_{1}'.format(self._key, dynamic.name)
+        try:
+            instance = self.__class__(self._guid)
+            instance._load_dynamic(getattr(instance, '_{0}'.format(dynamic.name)), dynamic, cache_key)
+            DataObject._register_dynamic_call(self, dynamic, 'refreshes', start)
+        except ObjectNotFoundException:
+            pass
+        except Exception:
+            DataObject._register_dynamic_call(self, dynamic, 'refresh_failures', start)
+            raise
+        finally:
+            self._volatile.delete('{0}_refresh'.format(cache_key))
+
+    @staticmethod
+    def _is_dynamic_fresh(cached_data, dynamic, now):
+        """
+        Returns whether a cached dynamic value is within its timeout. Values without grace period expire from the cache by themselves
+        """
+        if dynamic.grace <= 0 or 'time' not in cached_data:
+            return True
+        return now - cached_data['time'] <= dynamic.timeout
+
+    @staticmethod
+    def _register_dynamic_call(instance, dynamic, outcome, start):
+        """
+        Registers the outcome and the duration of retrieving a dynamic
+        """
+        duration = time.time() - start
+        with DataObject._dynamic_statistics_lock:
+            key = '{0}.{1}'.format(instance.__class__.__name__, dynamic.name)
+            if key not in DataObject._dynamic_statistics:
+                DataObject._dynamic_statistics[key] = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_failures': 0,
+                                                       'duration_total': 0.0, 'duration_max': 0.0}
+            statistics = DataObject._dynamic_statistics[key]
+            statistics[outcome] += 1
+            statistics['duration_total'] += duration
+            statistics['duration_max'] = max(statistics['duration_max'], duration)
+
+    @staticmethod
+    def get_dynamic_statistics():
+        """
+        Retrieve the statistics of the dynamics retrieved within this process
+        Format: {'<Class>.<dynamic>': {'hits': int, 'stale_hits': int, 'misses': int, 'refreshes': int, 'refresh_failures': int,
+                                       'duration_total': float, 'duration_max': float}}
+        The durations include both the retrievals and the background refreshes
+        :return: The statistics for every dynamic
+        :rtype: dict
+        """
+        with DataObject._dynamic_statistics_lock:
+            return copy.deepcopy(DataObject._dynamic_statistics)
+
     def __repr__(self):
         """
         A short self-representation
@@ -1102,8 +1391,7 @@ class DataObject(object):
             for dynamic in dynamics:
                 start = time.time()
                 fct = getattr(self, '_{0}'.format(dynamic.name))
-                function_info = inspect.getargspec(fct)
-                if 'dynamic' in function_info.args:
+                if dynamic.accepts_dynamic(fct):
                     fct(dynamic=dynamic)
                 else:
                     fct()
@@ -18,14 +18,17 @@
 Module containing certain helper classes providing various logic
 """
 
+import os
 import re
 import copy
 import time
 import inspect
 import hashlib
 import logging
-from ovs.extensions.storage.volatilefactory import VolatileFactory
+from Queue import Full, Queue
+from threading import Lock, Thread
 from ovs.extensions.storage.persistentfactory import PersistentFactory
+from ovs_extensions.constants import is_unittest_mode
 from ovs_extensions.constants.modules import OVS_DAL_HYBRIDS
 from ovs.lib.plugin import PluginController
 
@@ -37,6 +40,7 @@ class Descriptor(object):
     _logger = logging.getLogger(__name__)
     object_cache = {}
     descriptor_cache = {}
+    identifier_cache = {}
 
     def __init__(self, object_type=None, guid=None, cached=True):
         """
@@ -57,7 +61,10 @@ class Descriptor(object):
             type_name = object_type.__name__
             module_name = object_type.__module__.split('.')[-1]
             fqm_name = '{0}.{1}'.format(OVS_DAL_HYBRIDS, module_name)  # Fully qualified module name
-            identifier = '{0}_{1}'.format(type_name, hashlib.sha1(fqm_name).hexdigest())
+            identifier = Descriptor.identifier_cache.get((fqm_name, type_name))
+            if identifier is None:
+                identifier = '{0}_{1}'.format(type_name, hashlib.sha1(fqm_name).hexdigest())
+                Descriptor.identifier_cache[(fqm_name, type_name)] = identifier
             if identifier in Descriptor.descriptor_cache and cached is True:
                 self._descriptor = Descriptor.descriptor_cache[identifier]
             else:
@@ -151,16 +158,24 @@ class HybridRunner(object):
         """
         Yields all hybrid classes
         """
-        from ovs.dal.dataobject import DataObject  # Import here to prevent circular dependencies
+        from ovs.dal.manifest import HybridManifest  # Import here to prevent circular dependencies
 
         key = 'ovs_hybrid_structure'
         if key in HybridRunner.cache:  # Check local cache
             return HybridRunner.cache[key]
-        volatile = VolatileFactory.get_client()
-        hybrid_structure = volatile.get(key)  # Check memcache
-        if hybrid_structure is not None:
-            HybridRunner.cache[key] = hybrid_structure
-            return hybrid_structure
+        hybrid_structure = HybridManifest.get()['hybrids']
+        HybridRunner.cache[key] = hybrid_structure
+        return hybrid_structure
+
+    @staticmethod
+    def build_hybrid_structure():
+        """
+        Builds the hybrid structure by importing and inspecting all hybrid classes
+        :return: The hybrid structure (identifier of every base hybrid: descriptor of the hybrid to use) and the descriptors of all hybrids
+        :rtype: tuple(dict, dict)
+        """
+        from ovs.dal.dataobject import DataObject  # Import here to prevent circular dependencies
+
         base_hybrids = []
         inherit_table = {}
         translation_table = {}
@@ -211,15 +226,14 @@ class HybridRunner(object):
                     items_replaced = True
         hybrid_structure = {hybrid: translation_table[replacement] if replacement is not None else translation_table[hybrid]
                             for hybrid, replacement in hybrids.iteritems()}
-        HybridRunner.cache[key] = hybrid_structure
-        volatile.set(key, hybrid_structure)
-        return hybrid_structure
+        return hybrid_structure, translation_table
 
 
 class DalToolbox(object):
     """
     Generic class for various methods
     """
+    _regex_digits = re.compile(r'(\d+)')
 
     @staticmethod
     def check_type(value, required_type):
@@ -262,7 +276,6 @@ class DalToolbox(object):
         :param obj: The object where the key should be extracted from
         :param field: Field which has to be translated to a key
         """
-        regex = re.compile(r'(\d+)')
         value = obj
         for subkey in field.split('.'):
             if '[' in subkey:
@@ -275,18 +288,25 @@ class DalToolbox(object):
                 value = getattr(value, subkey)
             if value is None:
                 break
+        return DalToolbox.natural_key(value)
+
+    @staticmethod
+    def natural_key(value):
+        """
+        Converts a value into a tuple which sorts naturally (e.g. 'disk2' before 'disk10')
+        :param value: The value to convert
+        :return: A sortable tuple of floats and lowercase strings
+        :rtype: tuple
+        """
         value = '' if value is None else str(value)
-        key = regex.split(value)
-        while True:
-            try:
-                key.remove('')
-            except ValueError:
-                break
-        for index in xrange(len(key)):
+        key = []
+        for part in DalToolbox._regex_digits.split(value):
+            if part == '':
+                continue
             try:
-                key[index] = float(key[index])
+                key.append(float(part))
             except ValueError:
-                key[index] = key[index].lower()
+                key.append(part.lower())
         return tuple(key)
 
     @staticmethod
@@ -307,6 +327,89 @@ class DalToolbox(object):
         return original
 
 
+class DynamicRefresher(object):
+    """
+    Refreshes expired dynamic properties in the background, using a single thread per process
+    """
+    _logger = logging.getLogger(__name__)
+
+    ENABLED = None  # None: enabled unless running the unittests
+    QUEUE_SIZE = 1000
+
+    _lock = Lock()
+    _queue = None
+    _thread = None
+    _pid = None
+
+    @classmethod
+    def is_enabled(cls):
+        """
+        Returns whether dynamics are refreshed in the background
+        :rtype: bool
+        """
+        if cls.ENABLED is None:
+            return is_unittest_mode() is False
+        return cls.ENABLED
+
+    @classmethod
+    def schedule(cls, function):
+        """
+        Schedule a refresh
+        :param function: Function executing the refresh
+        :type function: callable
+        :return: False when the refresh could not be scheduled
+        :rtype: bool
+        """
+        with cls._lock:
+            # Threads do not survive a fork, so a new one is started for every process
+            if cls._thread is None or cls._pid != os.getpid() or not cls._thread.is_alive():
+                cls._queue = Queue(maxsize=cls.QUEUE_SIZE)
+                cls._pid = os.getpid()
+                cls._thread = Thread(name='dynamic_refresher', target=cls._process, args=(cls._queue,))
+                cls._thread.daemon = True
+                cls._thread.start()
+            queue = cls._queue
+        try:
+            queue.put_nowait(function)
+            return True
+        except Full:
+            return False
+
+    @classmethod
+    def _process(cls, queue):
+        """
+        Executes the scheduled refreshes
+        """
+        while True:
+            function = queue.get()
+            try:
+                function()
+            except Exception:
+                cls._logger.exception('Refreshing a dynamic property failed')
+
+
+class ReverseSortKey(object):
+    """
+    Wraps a sort key, inverting its ordering. Allows mixing ascending and descending fields in a single sort key tuple
+    """
+    __slots__ = ['key']
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __ne__(self, other):
+        return self.key != other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __gt__(self, other):
+        return other.key > self.key
+
+
 class Migration(object):
     """
     Handles all migrations between versions
@@ -44,7 +44,8 @@ class TestDisk(DataObject):
                   Dynamic('updatable_list', list, 5),
                   Dynamic('updatable_dict', dict, 5),
                   Dynamic('updatable_string', str, 5),
-                  Dynamic('predictable', int, 5)]
+                  Dynamic('predictable', int, 5),
+                  Dynamic('graceful', int, 5, grace=5)]
 
     # For testing purposes
     wrong_type_data = 0
@@ -95,3 +96,9 @@ class TestDisk(DataObject):
         A predictable dynamic property
         """
         return self.size
+
+    def _graceful(self):
+        """
+        A predictable dynamic property which is refreshed in the background
+        """
+        return self.order
@@ -45,7 +45,7 @@ class VDisk(DataObject):
                     Property('size', int, doc='Size of the vDisk in Bytes.'),
                     Property('devicename', str, doc='The name of the container file (e.g. the VMDK-file) describing the vDisk.'),
                     Property('volume_id', str, mandatory=False, indexed=True, doc='ID of the vDisk in the Open vStorage Volume Driver.'),
-                    Property('parentsnapshot', str, mandatory=False, doc='Points to a parent storage driver parent ID. None if there is no parent Snapshot'),
+                    Property('parentsnapshot', str, mandatory=False, indexed=True, sparse=True, doc='Points to a parent storage driver parent ID. None if there is no parent Snapshot'),
                     Property('cinder_id', str, mandatory=False, doc='Cinder Volume ID, for volumes managed through Cinder'),
                     Property('has_manual_dtl', bool, default=False, doc='Indicates whether the default DTL location has been overruled by customer'),
                     Property('pagecache_ratio', float, default=1.0, doc='Ratio of the volume\'s size that needs to be cached in metadata pages'),
@@ -54,11 +54,11 @@ class VDisk(DataObject):
                     Property('scrubbing_information', dict, mandatory=False, doc='Scrubbing metadata set by scrubber with an expiration date')]
     __relations = [Relation('vpool', VPool, 'vdisks'),
                    Relation('parent_vdisk', None, 'child_vdisks', mandatory=False)]
-    __dynamics = [Dynamic('dtl_status', str, 60),
-                  Dynamic('snapshots', list, 30),
+    __dynamics = [Dynamic('dtl_status', str, 60, grace=60),
+                  Dynamic('snapshots', list, 30, grace=30),
                   Dynamic('snapshot_ids', list, 30),
-                  Dynamic('info', dict, 60),
-                  Dynamic('statistics', dict, 4),
+                  Dynamic('info', dict, 60, grace=60),
+                  Dynamic('statistics', dict, 4, grace=4),
                   Dynamic('storagedriver_id', str, 60),
                   Dynamic('storagerouter_guid', str, 15),
                   Dynamic('is_vtemplate', bool, 60),
@@ -75,6 +75,29 @@ class VDiskList(object):
         return DataList(VDisk, {'type': DataList.where_operator.AND,
                                 'items': [('parentsnapshot', DataList.operator.EQUALS, snapshotid)]})
 
+    @staticmethod
+    def get_by_parentsnapshots(snapshot_ids):
+        """
+        Gets all vDisks whose parentsnapshot is one of the given snapshot ids
+        """
+        return DataList(VDisk, {'type': DataList.where_operator.AND,
+                                'items': [('parentsnapshot', DataList.operator.IN, list(snapshot_ids))]})
+
+    @staticmethod
+    def get_clone_counts(snapshot_ids):
+        """
+        Gets the amount of vDisks cloned from each of the given snapshot ids
+        :param snapshot_ids: Snapshot ids to count the clones for
+        :type snapshot_ids: list
+        :return: The amount of clones per snapshot id
+        :rtype: dict
+        """
+        clone_counts = dict((snapshot_id, 0) for snapshot_id in snapshot_ids)
+        if len(clone_counts) > 0:
+            for vdisk in VDiskList.get_by_parentsnapshots(clone_counts.keys()):
+                clone_counts[vdisk.parentsnapshot] += 1
+        return clone_counts
+
     @staticmethod
     def get_with_parent_snaphots():
         """
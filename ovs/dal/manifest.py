@@ -0,0 +1,130 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+HybridManifest module
+"""
+import os
+import time
+import hashlib
+import logging
+import importlib
+from threading import Lock
+from ovs_extensions.constants.modules import OVS_DAL_HYBRIDS
+from ovs.dal.helpers import Descriptor, HybridRunner
+from ovs.extensions.storage.volatilefactory import VolatileFactory
+
+
+class HybridManifest(object):
+    """
+    Precompiled description of all hybrids: the hybrid structure, the descriptors, the properties, relations and dynamics of every hybrid and the relations pointing towards it
+    The manifest is built once for every version of the hybrid sources and kept in the volatile store. A new process loads it with a single read,
+    after which hybrid modules are only imported once a hybrid is actually used
+    """
+    _logger = logging.getLogger(__name__)
+
+    ENABLED = True  # When disabled, the manifest is built in every process without being stored
+    LAYOUT_VERSION = 1  # Bump when the layout of the manifest changes
+    KEY = 'ovs_hybrid_manifest_{0}'
+
+    _manifest = None
+    _lock = Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        Retrieve the manifest of the current hybrid sources, building it when it is not yet available
+        :return: The manifest
+        :rtype: dict
+        """
+        if cls._manifest is not None:
+            return cls._manifest
+        with cls._lock:
+            if cls._manifest is None:
+                source_hash = cls.get_source_hash()
+                manifest = None
+                if cls.ENABLED is True:
+                    volatile = VolatileFactory.get_client()
+                    manifest = volatile.get(cls.KEY.format(source_hash))
+                    if manifest is None:
+                        manifest = cls.build(source_hash)
+                        volatile.set(cls.KEY.format(source_hash), manifest)
+                else:
+                    manifest = cls.build(source_hash)
+                for identifier, descriptor in manifest['descriptors'].iteritems():
+                    Descriptor.descriptor_cache.setdefault(identifier, dict(descriptor))
+                cls._manifest = manifest
+        return cls._manifest
+
+    @classmethod
+    def clear(cls):
+        """
+        Drops the manifest loaded by this process
+        :return: None
+        :rtype: NoneType
+        """
+        with cls._lock:
+            cls._manifest = None
+
+    @classmethod
+    def get_source_hash(cls):
+        """
+        Calculates the hash of the hybrid sources, identifying the version of the manifest
+        :return: SHA1 hash of the layout version and the name and content of every hybrid module
+        :rtype: str
+        """
+        source_hash = hashlib.sha1(str(cls.LAYOUT_VERSION))
+        for path in importlib.import_module(OVS_DAL_HYBRIDS).__path__:
+            for filename in sorted(os.listdir(path)):
+                if not filename.endswith('.py'):
+                    continue
+                source_hash.update(filename)
+                with open(os.path.join(path, filename), 'r') as source_file:
+                    source_hash.update(source_file.read())
+        return source_hash.hexdigest()
+
+    @classmethod
+    def build(cls, source_hash=None):
+        """
+        Builds the manifest by importing and inspecting all hybrids
+        :param source_hash: Hash of the hybrid sources. Calculated when not passed
+        :type source_hash: str
+        :return: The manifest
+        :rtype: dict
+        """
+        from ovs.dal.relations import RelationMapper  # Import here to prevent circular dependencies
+
+        start = time.time()
+        hybrid_structure, descriptors = HybridRunner.build_hybrid_structure()
+        classes = {}
+        for class_descriptor in hybrid_structure.itervalues():
+            hybrid = Descriptor().load(class_descriptor).get_object()
+            # noinspection PyProtectedMember
+            classes[hybrid.__name__] = {'identifier': class_descriptor['identifier'],
+                                        'properties': [prop.name for prop in hybrid._properties],
+                                        'relations': [{'name': relation.name,
+                                                       'foreign_type': None if relation.foreign_type is None else relation.foreign_type.__name__,
+                                                       'foreign_key': relation.foreign_key,
+                                                       'onetoone': relation.onetoone,
+                                                       'mandatory': relation.mandatory} for relation in hybrid._relations],
+                                        'dynamics': [dynamic.name for dynamic in hybrid._dynamics]}
+        manifest = {'version': source_hash or cls.get_source_hash(),
+                    'hybrids': hybrid_structure,
+                    'descriptors': descriptors,
+                    'classes': classes,
+                    'relations': RelationMapper.build_foreign_relations(hybrid_structure)}
+        cls._logger.debug('Built the hybrid manifest in {0:.3f}s'.format(time.time() - start))
+        return manifest
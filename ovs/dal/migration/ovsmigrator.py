@@ -29,7 +29,7 @@ class DALMigrator(object):
     """
 
     identifier = PackageFactory.COMP_MIGRATION_FWK
-    THIS_VERSION = 16
+    THIS_VERSION = 17
 
     def __init__(self):
         """ Init method """
@@ -176,8 +176,11 @@ class DALMigrator(object):
                 index_key = 'ovs_index_{0}|{{0}}|{{1}}'.format(classname)
                 uniques = []
                 indexes = []
+                sparse = []
                 # noinspection PyProtectedMember
                 for prop in cls._properties:
+                    if prop.sparse is True:
+                        sparse.append(prop.name)
                     if prop.unique is True and len([k for k in persistent_client.prefix(unique_key.format(prop.name))]) == 0:
                         uniques.append(prop.name)
                     if prop.indexed is True and len([k for k in persistent_client.prefix(index_prefix.format(prop.name))]) == 0:
@@ -191,6 +194,8 @@ class DALMigrator(object):
                         for property_name in indexes:
                             if property_name not in data:
                                 continue  # This is the case when there's a new indexed property added.
+                            if property_name in sparse and data[property_name] is None:
+                                continue
                             ikey = index_key.format(property_name, hashlib.sha1(str(data[property_name])).hexdigest())
                             index = list(persistent_client.get_multi([ikey], must_exist=False))[0]
                             transaction = persistent_client.begin_transaction()
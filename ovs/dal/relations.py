@@ -18,7 +18,7 @@
 RelationMapper module
 """
 from ovs.dal.helpers import HybridRunner, Descriptor
-from ovs.extensions.storage.volatilefactory import VolatileFactory
+from ovs.dal.manifest import HybridManifest
 
 
 class RelationMapper(object):
@@ -33,18 +33,27 @@ class RelationMapper(object):
     def load_foreign_relations(object_type):
         """
         This method will return a mapping of all relations towards a certain hybrid object type.
-        The resulting mapping will be stored in volatile storage so it can be fetched faster
+        The mappings of all hybrids are part of the hybrid manifest, so they are loaded all at once
         """
         relation_key = 'ovs_relations_{0}'.format(object_type.__name__.lower())
         if relation_key in RelationMapper.cache:
             return RelationMapper.cache[relation_key]
-        volatile = VolatileFactory.get_client()
-        relation_info = volatile.get(relation_key)
-        if relation_info is not None:
-            RelationMapper.cache[relation_key] = relation_info
-            return relation_info
-        relation_info = {}
-        hybrid_structure = HybridRunner.get_hybrids()
+        relation_info = HybridManifest.get()['relations'].get(object_type.__name__, {})
+        RelationMapper.cache[relation_key] = relation_info
+        return relation_info
+
+    @staticmethod
+    def build_foreign_relations(hybrid_structure=None):
+        """
+        Builds the mapping of all relations towards every hybrid object type
+        :param hybrid_structure: The hybrid structure to build the mappings for. Defaults to the current hybrid structure
+        :type hybrid_structure: dict
+        :return: The mapping of the relations towards every hybrid, by name of the hybrid
+        :rtype: dict
+        """
+        if hybrid_structure is None:
+            hybrid_structure = HybridRunner.get_hybrids()
+        relations = {}
         for class_descriptor in hybrid_structure.values():  # Extended objects
             cls = Descriptor().load(class_descriptor).get_object()
             # noinspection PyProtectedMember
@@ -57,11 +66,7 @@ class RelationMapper(object):
                         remote_class = Descriptor().load(hybrid_structure[identifier]).get_object()
                     else:
                         remote_class = relation.foreign_type
-                itemname = remote_class.__name__
-                if itemname == object_type.__name__:
-                    relation_info[relation.foreign_key] = {'class': Descriptor(cls).descriptor,
-                                                           'key': relation.name,
-                                                           'list': not relation.onetoone}
-        RelationMapper.cache[relation_key] = relation_info
-        volatile.set(relation_key, relation_info)
-        return relation_info
+                relations.setdefault(remote_class.__name__, {})[relation.foreign_key] = {'class': Descriptor(cls).descriptor,
+                                                                                         'key': relation.name,
+                                                                                         'list': not relation.onetoone}
+        return relations
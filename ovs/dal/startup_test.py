@@ -0,0 +1,111 @@
+#!/usr/bin/env python2
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Process startup performance test module
+"""
+import sys
+import json
+import subprocess
+from collections import OrderedDict
+
+
+class StartupBenchmark(object):
+    """
+    Measures the cold start of a process, with and without the hybrid manifest
+    Every measurement is done in a fresh interpreter, so nothing is cached in the process itself
+    """
+    repetition = 5
+    webapps_path = '/opt/OpenvStorage/webapps'
+
+    _prologue = '''
+import time
+_start = time.time()
+from ovs.dal.manifest import HybridManifest
+HybridManifest.ENABLED = {manifest}
+'''
+    _epilogue = '''
+import json
+print json.dumps(time.time() - _start)
+'''
+    # Loading the DAL structure, as every process does before touching any object
+    _scenario_dal = '''
+from ovs.dal.helpers import Descriptor, HybridRunner
+from ovs.dal.relations import RelationMapper
+for class_descriptor in HybridRunner.get_hybrids().values():
+    RelationMapper.load_foreign_relations(Descriptor().load(class_descriptor).get_object())
+'''
+    # Starting a worker up to the point it executed a first task: loading the Celery app with all task modules and querying the model
+    _scenario_task = '''
+from ovs.celery_run import celery
+celery.loader.import_default_modules()
+from ovs.dal.lists.storagerouterlist import StorageRouterList
+[storagerouter.name for storagerouter in StorageRouterList.get_storagerouters()]
+'''
+    # Starting the API up to the point it answered a first request
+    _scenario_api = '''
+import os
+import sys
+sys.path.append('{webapps_path}')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+from django.test.client import Client
+response = Client().get('/api/')
+assert response.status_code == 200, 'Unexpected status code {{0}}'.format(response.status_code)
+'''
+
+    def __init__(self):
+        """
+        Init method
+        """
+        self.scenarios = OrderedDict([('first DAL access', StartupBenchmark._scenario_dal),
+                                      ('first task', StartupBenchmark._scenario_task),
+                                      ('first API response', StartupBenchmark._scenario_api.format(webapps_path=StartupBenchmark.webapps_path))])
+
+    @staticmethod
+    def _measure(scenario, manifest):
+        """
+        Runs a scenario in a new interpreter and returns the amount of seconds it took
+        """
+        code = StartupBenchmark._prologue.format(manifest=manifest) + scenario + StartupBenchmark._epilogue
+        output = subprocess.check_output([sys.executable, '-c', code], stderr=subprocess.STDOUT)
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_startup(self):
+        """
+        Measures every scenario with and without the hybrid manifest
+        """
+        print ''
+        print 'starting {0} processes per scenario'.format(StartupBenchmark.repetition)
+        # Make sure the manifest of the current sources is available, as it would be after the first start
+        StartupBenchmark._measure(StartupBenchmark._scenario_dal, True)
+        for name, scenario in self.scenarios.iteritems():
+            print '\n{0}'.format(name)
+            for manifest in [False, True]:
+                try:
+                    timings = sorted(StartupBenchmark._measure(scenario, manifest) for _ in xrange(StartupBenchmark.repetition))
+                except subprocess.CalledProcessError as ex:
+                    print '  {0:<18} failed: {1}'.format('manifest' if manifest is True else 'no manifest', ex.output.strip().splitlines()[-1] if ex.output else ex)
+                    continue
+                print '  {0:<18} median {1:>8.3f}s, minimum {2:>8.3f}s, maximum {3:>8.3f}s'.format('manifest' if manifest is True else 'no manifest',
+                                                                                                     timings[len(timings) / 2], timings[0], timings[-1])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2:
+        StartupBenchmark.repetition = int(sys.argv[1])
+    benchmark = StartupBenchmark()
+    benchmark.test_startup()
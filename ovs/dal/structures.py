@@ -17,6 +17,7 @@
 """
 Module containing various helping structures
 """
+import inspect
 
 
 class Property(object):
@@ -24,9 +25,10 @@ class Property(object):
     Property
     """
 
-    def __init__(self, name, property_type, mandatory=True, default=None, unique=False, indexed=False, doc=None):
+    def __init__(self, name, property_type, mandatory=True, default=None, unique=False, indexed=False, sparse=False, doc=None):
         """
         Initializes a property
+        A sparse index does not keep track of the objects for which the property is None
         """
         self.name = name
         self.property_type = property_type
@@ -35,6 +37,7 @@ class Property(object):
         self.mandatory = mandatory
         self.unique = unique
         self.indexed = indexed
+        self.sparse = sparse
 
 
 class Relation(object):
@@ -59,11 +62,23 @@ class Dynamic(object):
     Dynamic property
     """
 
-    def __init__(self, name, return_type, timeout, locked=False):
+    def __init__(self, name, return_type, timeout, locked=False, grace=0):
         """
         Initializes a dynamic property
+        Once the timeout passed, the cached value is still returned during 'grace' seconds while it is refreshed in the background
         """
         self.name = name
         self.return_type = return_type
         self.timeout = timeout
         self.locked = locked
+        self.grace = grace
+        self._accepts_dynamic = {}
+
+    def accepts_dynamic(self, fct):
+        """
+        Returns whether the function implementing this dynamic expects the dynamic to be passed. The signature is only inspected once
+        """
+        function = getattr(fct, '__func__', fct)
+        if function not in self._accepts_dynamic:
+            self._accepts_dynamic[function] = 'dynamic' in inspect.getargspec(function).args
+        return self._accepts_dynamic[function]
@@ -23,7 +23,8 @@ import hashlib
 import unittest
 from ovs.dal.datalist import DataList
 from ovs.dal.exceptions import *
-from ovs.dal.helpers import Descriptor, DalToolbox
+from ovs.dal.dataobject import DataObject
+from ovs.dal.helpers import Descriptor, DalToolbox, DynamicRefresher
 from ovs.dal.hybrids.t_testdisk import TestDisk
 from ovs.dal.hybrids.t_testemachine import TestEMachine
 from ovs.dal.hybrids.t_testmachine import TestMachine
@@ -1580,6 +1581,40 @@ class Basic(unittest.TestCase):
         value = disk.updatable_int
         self.assertEqual(value, 10, 'Dynamic should be 10 now ({0})'.format(value))
 
+    def test_dynamic_grace(self):
+        """
+        Validates whether expired dynamics with a grace period are returned while being refreshed in the background
+        """
+        scheduled = []
+        original_schedule = DynamicRefresher.__dict__['schedule']
+        DynamicRefresher.ENABLED = True
+        DynamicRefresher.schedule = staticmethod(lambda function: scheduled.append(function))
+        try:
+            disk = TestDisk()
+            disk.name = 'test'
+            disk.order = 1
+            disk.save()
+            statistics = DataObject.get_dynamic_statistics().get('TestDisk.graceful', {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0})
+            self.assertEqual(disk.graceful, 1)
+            self.assertEqual(disk.graceful, 1)
+            time.sleep(6)
+            # Expired, but within the grace period: the cached value is returned and a single refresh is scheduled
+            self.assertEqual(disk.graceful, 1)
+            self.assertEqual(disk.graceful, 1)
+            self.assertEqual(len(scheduled), 1)
+            scheduled.pop()()
+            self.assertEqual(disk.graceful, 1)
+            time.sleep(11)
+            # Beyond the grace period, the dynamic is loaded again
+            self.assertEqual(disk.graceful, 1)
+            self.assertEqual(len(scheduled), 0)
+            new_statistics = DataObject.get_dynamic_statistics()['TestDisk.graceful']
+            for key, value in {'hits': 2, 'stale_hits': 2, 'misses': 2, 'refreshes': 1}.iteritems():
+                self.assertEqual(new_statistics[key] - statistics[key], value, 'Expected {0} {1}'.format(value, key))
+        finally:
+            DynamicRefresher.ENABLED = None
+            DynamicRefresher.schedule = original_schedule
+
     def test_enumerator(self):
         """
         Validates whether the internal enumerator generator works as expected
@@ -2281,3 +2316,159 @@ class Basic(unittest.TestCase):
         machine2.name = 'test_machine2'
         machine2.save()
         self.assertEqual(machine1, machine2)
+
+    def test_prefetch_dynamics(self):
+        """
+        Validates whether dynamics are loaded into the cache when prefetching them for a list
+        """
+        disks = []
+        for index in xrange(5):
+            disk = TestDisk()
+            disk.name = 'disk_{0}'.format(index)
+            disk.save()
+            disks.append(disk)
+        datalist = DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})
+        slow_dynamics = datalist.prefetch_dynamics(['updatable_int', 'unknown'], workers=2)
+        self.assertEqual(len(slow_dynamics), 0)
+        for disk in disks:
+            cached_data = self.volatile.get('{0}_updatable_int'.format(disk._key))
+            self.assertDictEqual(cached_data, {'data': TestDisk.dynamic_int})
+            self.assertIsNone(self.volatile.get('{0}_used_size'.format(disk._key)))
+        # The prefetched objects are the ones that are reused by the list
+        for disk in datalist.iterloaded():
+            self.assertIn('updatable_int', disk.get_timings())
+
+    def test_datalist_sort_by(self):
+        """
+        Validates whether sorting a DataList on multiple fields in a single pass works, and reuses cached results safely
+        """
+        sizes = [7, 2, 0, 4, 6, 1, 5, 0, 3, 8]
+        for i in xrange(0, 10):
+            disk = TestDisk()
+            disk.name = 'disk_{0}'.format(i)
+            disk.size = sizes[i]
+            disk.save()
+        disks = DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})
+        disks.sort_by(['size', '-name'])
+        self.assertEqual([disk.name for disk in disks][:3], ['disk_7', 'disk_2', 'disk_5'])
+        # Natural sorting and dynamics
+        disks.sort_by(['-predictable', 'name'])
+        self.assertEqual([disk.name for disk in disks][:2], ['disk_9', 'disk_0'])
+        # Sorting again reuses the cached order
+        disks = DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})
+        disks.sort_by(['size', '-name'])
+        self.assertEqual([disk.name for disk in disks][:3], ['disk_7', 'disk_2', 'disk_5'])
+        cache_key = '{0}_sort_{1}'.format(disks._key, hashlib.sha1('size,-name').hexdigest())
+        self.assertEqual(self.volatile.get(cache_key)['guids'], disks.guids)
+        # A changed object invalidates the cached order
+        disk = TestDisk(disks.guids[0])
+        disk.size = 10
+        disk.save()
+        disks = DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})
+        disks.sort_by(['size', '-name'])
+        self.assertEqual([disk.name for disk in disks][:3], ['disk_2', 'disk_5', 'disk_1'])
+        self.assertEqual(disks[9].name, 'disk_7')
+
+    def test_datalist_get_page(self):
+        """
+        Validates whether keyset pagination walks through the complete list in order
+        """
+        sizes = [7, 2, 0, 4, 6, 1, 5, 0, 3, 8]
+        for i in xrange(0, 10):
+            disk = TestDisk()
+            disk.name = 'disk_{0}'.format(i)
+            disk.size = sizes[i]
+            disk.save()
+        disks = DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})
+        expected = [disk.name for disk in sorted(disks, key=lambda d: (-d.size, d.guid))]
+        names = []
+        cursor = None
+        pages = 0
+        while True:
+            page, cursor = disks.get_page(['-size'], page_size=3, cursor=cursor)
+            pages += 1
+            self.assertLessEqual(len(page), 3)
+            names.extend([disk.name for disk in page])
+            if cursor is None:
+                break
+        self.assertEqual(pages, 4)
+        self.assertListEqual(names, expected)
+        # The original list is left untouched
+        self.assertEqual(len(disks), 10)
+        with self.assertRaises(ValueError):
+            disks.get_page(['name'], page_size=3, cursor=disks.get_page(['-size'], page_size=3)[1])
+        with self.assertRaises(ValueError):
+            disks.get_page(['-size'], page_size=3, cursor='invalid')
+
+    def test_save_many(self):
+        """
+        Validates whether saving multiple objects at once keeps indexes, relations and constraints consistent
+        """
+        machine = TestMachine()
+        machine.name = 'machine'
+        disks = []
+        for index in xrange(5):
+            disk = TestDisk()
+            disk.name = 'disk{0}'.format(index)
+            disk.something = 'one' if index % 2 == 0 else 'two'
+            disk.machine = machine
+            disks.append(disk)
+        DataObject.save_many(disks + [machine])  # The machine is saved within the same transaction
+        self.assertEqual(len(machine.disks), 5)
+        self.assertTrue(all(disk._new is False and disk.dirty is False for disk in disks))
+        dlist = DataList(TestDisk, {'type': DataList.where_operator.AND,
+                                    'items': [('something', DataList.operator.EQUALS, 'one')]})
+        self.assertItemsEqual(dlist, [disks[0], disks[2], disks[4]])
+        self.assertEqual(dlist.from_index, 'full')
+        self.assertEqual(TestDisk(disks[1].guid).machine_guid, machine.guid)
+
+        disks[0].something = 'two'
+        disks[1].something = 'three'
+        DataObject.save_many(disks[:2])
+        dlist = DataList(TestDisk, {'type': DataList.where_operator.AND,
+                                    'items': [('something', DataList.operator.EQUALS, 'two')]})
+        self.assertItemsEqual(dlist, [disks[0], disks[3]])
+        self.assertEqual(len(self.persistent.get('ovs_index_testdisk|something|{0}'.format(hashlib.sha1('three').hexdigest()))), 1)
+
+        # Unique constraints are validated within the batch and against the stored objects
+        disk = TestDisk()
+        disk.name = 'disk5'
+        duplicate = TestDisk()
+        duplicate.name = 'disk5'
+        with self.assertRaises(UniqueConstraintViolationException):
+            DataObject.save_many([disk, duplicate])
+        self.assertEqual(len(DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})), 5)
+        duplicate.name = 'disk0'
+        with self.assertRaises(UniqueConstraintViolationException):
+            DataObject.save_many([disk, duplicate])  # Falls back to saving one by one, so the valid disk is saved
+        self.assertFalse(disk._new)
+        self.assertEqual(len(DataList(TestDisk, {'type': DataList.where_operator.AND, 'items': []})), 6)
+
+        # An object changed by someone else falls back to a regular save, applying its conflict settings
+        stale = TestDisk(disks[2].guid, datastore_wins=False)
+        disks[2].description = 'changed'
+        disks[2].save()
+        stale.name = 'renamed'
+        disks[3].name = 'disk3b'
+        DataObject.save_many([stale, disks[3]])
+        self.assertEqual(TestDisk(disks[2].guid).name, 'renamed')
+        self.assertEqual(TestDisk(disks[2].guid).description, 'changed')
+        self.assertEqual(TestDisk(disks[3].guid).name, 'disk3b')
+
+        # A chain of new objects is saved following its relations when falling back to saving one by one
+        chain = []
+        for name in ['chain_a', 'chain_b', 'chain_c']:
+            disk = TestDisk()
+            disk.name = name
+            if len(chain) > 0:
+                chain[-1].parent = disk
+            chain.append(disk)
+        stale = TestDisk(disks[4].guid, datastore_wins=False)
+        disks[4].description = 'changed'
+        disks[4].save()
+        stale.name = 'disk4b'
+        DataObject.save_many(chain + [stale])
+        self.assertEqual(TestDisk(chain[0].guid).parent_guid, chain[1].guid)
+        self.assertEqual(TestDisk(chain[1].guid).parent_guid, chain[2].guid)
+        self.assertIsNone(TestDisk(chain[2].guid).parent_guid)
+        self.assertEqual(TestDisk(disks[4].guid).name, 'disk4b')
@@ -19,6 +19,9 @@ Basic test module
 """
 import unittest
 from ovs.dal.helpers import Descriptor, HybridRunner
+from ovs.dal.hybrids.t_testdisk import TestDisk
+from ovs.dal.hybrids.t_testmachine import TestMachine
+from ovs.dal.manifest import HybridManifest
 from ovs.dal.relations import RelationMapper
 from ovs.dal.tests.helpers import DalHelper
 
@@ -95,6 +98,9 @@ class Hybrid(unittest.TestCase):
                                   '_property {0}.{1} can only be indexed if it is one of {2}'.format(
                                       cls.__name__, prop.name, indexed_types
                                   ))
+                if prop.sparse is True:
+                    self.assertTrue(prop.indexed,
+                                    '_property {0}.{1} can only be sparse if it is indexed'.format(cls.__name__, prop.name))
             for dynamic in cls._dynamics:
                 is_allowed_type = dynamic.return_type in allowed_types \
                     or isinstance(dynamic.return_type, list)
@@ -137,3 +143,23 @@ class Hybrid(unittest.TestCase):
             self.assertEqual(len(missing_metadata), 0,
                              'Missing metadata for properties in {0}: {1}'.format(cls.__name__, missing_metadata))
             instance.delete()
+
+    def test_manifest(self):
+        """
+        Validates whether the hybrid manifest describes the hybrids as they are built from their sources
+        """
+        manifest = HybridManifest.get()
+        self.assertEqual(manifest['version'], HybridManifest.get_source_hash())
+        hybrid_structure, descriptors = HybridRunner.build_hybrid_structure()
+        self.assertDictEqual(manifest['hybrids'], hybrid_structure)
+        self.assertEqual(set(manifest['descriptors'].keys()), set(descriptors.keys()))
+        self.assertDictEqual(manifest['relations'], RelationMapper.build_foreign_relations(hybrid_structure))
+        self.assertIn('disks', RelationMapper.load_foreign_relations(TestMachine))
+        self.assertTrue(RelationMapper.load_foreign_relations(TestMachine)['disks']['list'])
+        self.assertIn('something', manifest['classes']['TestDisk']['properties'])
+        self.assertIn({'name': 'machine', 'foreign_type': 'TestMachine', 'foreign_key': 'disks', 'onetoone': False, 'mandatory': False},
+                      manifest['classes']['TestDisk']['relations'])
+        self.assertEqual(Descriptor(TestDisk).descriptor['identifier'], manifest['classes']['TestDisk']['identifier'])
+        # Dropping the loaded manifest yields the same manifest again
+        HybridManifest.clear()
+        self.assertDictEqual(HybridManifest.get(), manifest)
@@ -20,9 +20,14 @@ Arakoon ResultBackend Module
 import time
 import yaml
 import logging
+import itertools
+from celery import states
 from celery.backends.base import KeyValueStoreBackend
+from celery.exceptions import TimeoutError
 from ovs.constants.logging import CELERY_LOGGER
+from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.storage.persistentfactory import PersistentFactory
+from ovs.extensions.storage.volatilefactory import VolatileFactory
 from ovs_extensions.storage.exceptions import KeyNotFoundException
 
 
@@ -30,8 +35,20 @@ class ArakoonResultBackend(KeyValueStoreBackend):
     """
     Class to use Arakoon as a result backend for Celery
     Requires PyYAML
+    Results are stored in time buckets (see BUCKET_SIZE) so expired results can be removed per bucket instead of scanning all results
+    The bucket a result was last written to is kept in the volatile store, so a read only fetches that single key
     """
     _NAMESPACE_PREFIX = 'ovs_tasks_'
+    _BUCKET_PREFIX = 'ovs_tasks_bucket_'
+    _LOCATION_KEY = 'ovs_tasks_location_{0}'
+    _CLEANED_BUCKET_KEY = 'ovs_tasks_cleaned_bucket'
+    _STATISTICS_KEY = 'ovs_tasks_statistics_{0}_{1}'
+    _NOTIFICATION_KEY = 'ovs_tasks_notification_{0}'
+    BUCKET_SIZE = 60 * 60
+    CLEANUP_LOOKBACK = 7 * 24  # Amount of buckets to clean when the cleanup never ran before
+    RESULT_SIZE_CAP = 1024 * 1024
+    NOTIFICATION_POLL_INTERVAL = 0.05
+    NOTIFICATION_FALLBACK = 5  # Maximum time between two reads of the results, even without a notification
     # Arakoon does not expire of itself. This will enable enable celery beat to add a clean up job every CELERY_TASK_RESULT_EXPIRES seconds (default 1 day)
     supports_autoexpire = False
     supports_native_join = True
@@ -52,6 +69,8 @@ class ArakoonResultBackend(KeyValueStoreBackend):
         self._encode_prefixes()  # rencode the keyprefixes
 
         self._client = PersistentFactory.get_client()
+        self._volatile = VolatileFactory.get_client()
+        self._result_size_cap = Configuration.get('/ovs/framework/celery|result_size_cap', default=ArakoonResultBackend.RESULT_SIZE_CAP)
 
     def get(self, key):
         return self._extract_data(key)
@@ -63,7 +82,15 @@ class ArakoonResultBackend(KeyValueStoreBackend):
         return self._set_data(key, value)
 
     def delete(self, key):
-        return self._client.delete(key)
+        transaction = self._client.begin_transaction()
+        for candidate_key in self._get_candidate_keys(key):
+            self._client.delete(candidate_key, must_exist=False, transaction=transaction)
+        self._client.apply_transaction(transaction)
+        if key.startswith(self._NAMESPACE_PREFIX):
+            try:
+                self._volatile.delete(self._get_location_key(key))
+            except Exception:
+                self._logger.exception('Could not remove the location of {0}'.format(key))
 
     def _apply_chord_incr(self, header, partial_args, group_id, body, **opts):
         self._client.set(self.get_key_for_chord(group_id), 0)
@@ -100,6 +127,99 @@ class ArakoonResultBackend(KeyValueStoreBackend):
         """
         return '{0}{1}'.format(self._NAMESPACE_PREFIX, key)
 
+    def _get_expires(self):
+        """
+        Retrieve the amount of seconds results are kept
+        :return: The expiration in seconds
+        :rtype: int
+        """
+        return self.expires if self.expires is not None else 24 * 60 * 60
+
+    def _get_bucket(self, timestamp=None):
+        """
+        Retrieve the bucket for a given timestamp
+        :param timestamp: Timestamp to retrieve the bucket for. Defaults to now
+        :type timestamp: float
+        :return: The bucket number
+        :rtype: int
+        """
+        return int((time.time() if timestamp is None else timestamp) // self.BUCKET_SIZE)
+
+    def _get_live_buckets(self):
+        """
+        Retrieve all buckets which can contain results that did not expire yet, newest first
+        :return: The bucket numbers
+        :rtype: list[int]
+        """
+        current_bucket = self._get_bucket()
+        return range(current_bucket, self._get_bucket(time.time() - self._get_expires()) - 1, -1)
+
+    def _get_bucket_key(self, key, bucket):
+        """
+        Generates the key to store a result in a given bucket
+        :param key: Key with the namespace
+        :type key: str
+        :param bucket: Bucket to store the result in
+        :type bucket: int
+        :return: The key within the bucket
+        :rtype: str
+        """
+        return '{0}{1}_{2}'.format(self._BUCKET_PREFIX, bucket, key[len(self._NAMESPACE_PREFIX):])
+
+    def _get_location_key(self, key):
+        """
+        Generates the volatile key holding the bucket a result was last written to
+        :param key: Key with the namespace
+        :type key: str
+        :return: The location key
+        :rtype: str
+        """
+        return self._LOCATION_KEY.format(key[len(self._NAMESPACE_PREFIX):])
+
+    def _get_candidate_keys(self, key):
+        """
+        Retrieve the keys under which a result for the given key could be stored
+        :param key: Key with the namespace
+        :type key: str
+        :return: The candidate keys
+        :rtype: list[str]
+        """
+        return self._get_candidate_keys_multi([key])[0]
+
+    def _get_candidate_keys_multi(self, keys):
+        """
+        Retrieve, for every given key, the keys under which its result could be stored
+        When the bucket the result was written to is known, only the key within that bucket is returned. Otherwise the keys within
+        the current and the previous bucket are returned, newest first, followed by the key without bucket (stored by older versions)
+        The locations of all keys are fetched from the volatile store in a single round-trip
+        :param keys: Keys with the namespace
+        :type keys: list[str]
+        :return: The candidate keys for every key, in the order of the given keys
+        :rtype: list[list[str]]
+        """
+        bucketed_keys = [key for key in keys if key.startswith(self._NAMESPACE_PREFIX)]
+        locations = {}
+        if len(bucketed_keys) > 0:
+            location_keys = [self._get_location_key(key) for key in bucketed_keys]
+            try:
+                if hasattr(self._volatile, 'get_multi'):
+                    buckets = list(self._volatile.get_multi(location_keys))
+                else:
+                    buckets = [self._volatile.get(location_key) for location_key in location_keys]
+                locations = dict(zip(bucketed_keys, buckets))
+            except Exception:
+                self._logger.exception('Could not retrieve the locations of the results')
+        current_bucket = self._get_bucket()
+        candidate_keys = []
+        for key in keys:
+            if not key.startswith(self._NAMESPACE_PREFIX):
+                candidate_keys.append([key])
+            elif locations.get(key) is not None:
+                candidate_keys.append([self._get_bucket_key(key, locations[key])])
+            else:
+                candidate_keys.append([self._get_bucket_key(key, current_bucket), self._get_bucket_key(key, current_bucket - 1), key])
+        return candidate_keys
+
     def _extract_data(self, key=None, data=None):
         """
         The entries given in the backend are json by default with expiration information
@@ -110,16 +230,18 @@ class ArakoonResultBackend(KeyValueStoreBackend):
         if key is None and data is None:
             return None  # Could be that the supplied data is None when a mget wants to do an unwrapping
         if data is None:
-            try:
-                data = self._client.get(key)
-            except KeyNotFoundException:
-                data = None
+            data = next((entry for entry in self._client.get_multi(self._get_candidate_keys(key), must_exist=False) if entry is not None), None)
         if isinstance(data, dict) and 'data' in data:
             return data['data']
         return data
 
     def _extract_data_multi(self, keys):
-        return (self._extract_data(data=data) for data in self._client.get_multi(keys, must_exist=False))
+        # All candidates of all keys are fetched in a single round-trip
+        candidate_keys = self._get_candidate_keys_multi(keys)
+        entries = iter(self._client.get_multi([candidate_key for candidates in candidate_keys for candidate_key in candidates], must_exist=False))
+        for candidates in candidate_keys:
+            values = [entry for entry in itertools.islice(entries, len(candidates)) if entry is not None]
+            yield self._extract_data(data=values[0] if len(values) > 0 else None)
 
     def _set_data(self, key, value):
         """
@@ -129,7 +251,190 @@ class ArakoonResultBackend(KeyValueStoreBackend):
         :return: True if successful, false if not
         """
         # @Todo allow DataObjects to be stored and retrieved
-        return self._client.set(key, {'data': value, 'time_set': time.time()})
+        size = len(value) if isinstance(value, basestring) else 0
+        if size > self._result_size_cap:
+            self._logger.warning('Result for {0} exceeds the result size cap: {1}B > {2}B'.format(key, size, self._result_size_cap))
+        bucket = self._get_bucket()
+        bucketed = key.startswith(self._NAMESPACE_PREFIX)
+        result = self._client.set(self._get_bucket_key(key, bucket) if bucketed is True else key, {'data': value, 'time_set': time.time()})
+        if bucketed is True:
+            location_key = self._get_location_key(key)
+            try:
+                self._volatile.set(location_key, bucket, self._get_expires() + self.BUCKET_SIZE)
+            except Exception:
+                self._logger.exception('Could not save the location of {0}'.format(key))
+                try:
+                    self._volatile.delete(location_key)  # Never leave a location to an older bucket behind
+                except Exception:
+                    pass
+        try:
+            self._increment_statistic('count', bucket, 1)
+            self._increment_statistic('bytes', bucket, size)
+            self._notify(key)
+        except Exception:
+            self._logger.exception('Could not update the result statistics or notify the waiters')
+        return result
+
+    def _increment_statistic(self, name, bucket, delta):
+        """
+        Increments a statistic of a given bucket. The statistic expires together with its bucket
+        :param name: Name of the statistic
+        :type name: str
+        :param bucket: Bucket of the statistic
+        :type bucket: int
+        :param delta: Amount to increment with
+        :type delta: int
+        :return: None
+        :rtype: NoneType
+        """
+        key = self._STATISTICS_KEY.format(name, bucket)
+        if self._volatile.incr(key, delta) is None:
+            # First write in this bucket
+            self._volatile.add(key, 0, self._get_expires() + self.BUCKET_SIZE)
+            self._volatile.incr(key, delta)
+
+    def _get_notification_key(self, key):
+        """
+        Generates the volatile key holding the notification counter of a result
+        :param key: Key of the result
+        :type key: str
+        :return: The notification key
+        :rtype: str
+        """
+        if key.startswith(self._NAMESPACE_PREFIX):
+            key = key[len(self._NAMESPACE_PREFIX):]
+        return self._NOTIFICATION_KEY.format(key)
+
+    def _notify(self, key):
+        """
+        Notifies the waiters of a result that it was written
+        :param key: Key of the written result
+        :type key: str
+        :return: None
+        :rtype: NoneType
+        """
+        notification_key = self._get_notification_key(key)
+        if self._volatile.incr(notification_key) is None:
+            self._volatile.add(notification_key, 0, self._get_expires())
+            self._volatile.incr(notification_key)
+
+    def _get_notification(self, keys):
+        """
+        Retrieve the current notification counters of the given results in a single round-trip
+        :param keys: Keys of the results
+        :type keys: list[str]
+        :return: The counters or None if they could not be retrieved
+        :rtype: list or NoneType
+        """
+        notification_keys = [self._get_notification_key(key) for key in keys]
+        try:
+            if hasattr(self._volatile, 'get_multi'):
+                return list(self._volatile.get_multi(notification_keys))
+            return [self._volatile.get(notification_key) for notification_key in notification_keys]
+        except Exception:
+            return None
+
+    def _wait_for_notification(self, keys, notification, interval, end_time=None):
+        """
+        Blocks until one of the given results was written since the given notification counters were retrieved.
+        Waits at least 'interval' seconds and at most NOTIFICATION_FALLBACK seconds (or until the given end time)
+        Only the volatile store is polled while waiting, and writes of other results do not wake the waiter
+        :param keys: Keys of the results waited for
+        :type keys: list[str]
+        :param notification: Notification counters retrieved before the results were read
+        :type notification: list
+        :param interval: Minimum time to wait
+        :type interval: float
+        :param end_time: Timestamp after which no longer should be waited
+        :type end_time: float
+        :return: None
+        :rtype: NoneType
+        """
+        start = time.time()
+        max_end_time = start + max(interval, self.NOTIFICATION_FALLBACK)
+        if end_time is not None:
+            max_end_time = min(max_end_time, end_time)
+        time.sleep(max(0, min(interval, max_end_time - start)))
+        while time.time() < max_end_time and self._get_notification(keys) == notification:
+            time.sleep(self.NOTIFICATION_POLL_INTERVAL)
+
+    def wait_for(self, task_id, timeout=None, propagate=True, interval=0.5, no_ack=True, on_interval=None):
+        """
+        Wait for a task to be ready. The result is only retrieved again when it was written in the meantime
+        """
+        _ = propagate, no_ack
+        interval = 0.5 if interval is None else interval
+        end_time = None if not timeout else time.time() + timeout
+        keys = [self.get_key_for_task(task_id)]
+        while True:
+            notification = self._get_notification(keys)
+            meta = self.get_task_meta(task_id)
+            if meta['status'] in states.READY_STATES:
+                return meta
+            if on_interval:
+                on_interval()
+            if end_time is not None and time.time() >= end_time:
+                raise TimeoutError('The operation timed out.')
+            self._wait_for_notification(keys, notification, interval, end_time)
+
+    def get_many(self, task_ids, timeout=None, interval=0.5, no_ack=True, READY_STATES=states.READY_STATES):
+        """
+        Retrieve the results of multiple tasks, yielding them once they are ready
+        All pending results are fetched in a single round-trip, which is only repeated when one of them was written in the meantime
+        """
+        _ = no_ack
+        interval = 0.5 if interval is None else interval
+        end_time = None if not timeout else time.time() + timeout
+        ids = set(task_ids)
+        for task_id in list(ids):
+            cached = self._cache.get(task_id)
+            if cached is not None and cached['status'] in READY_STATES:
+                ids.discard(task_id)
+                yield task_id, cached
+        while ids:
+            pending_ids = list(ids)
+            keys = [self.get_key_for_task(task_id) for task_id in pending_ids]
+            notification = self._get_notification(keys)
+            results = self._mget_to_results(self.mget(keys), pending_ids)
+            for task_id, meta in results.iteritems():
+                if meta['status'] in READY_STATES:
+                    self._cache[task_id] = meta
+                    ids.discard(task_id)
+                    yield task_id, meta
+            if not ids:
+                break
+            if end_time is not None and time.time() >= end_time:
+                raise TimeoutError('Operation timed out ({0})'.format(timeout))
+            self._wait_for_notification(keys, notification, interval, end_time)
+
+    def get_statistics(self):
+        """
+        Retrieve the amount of results and bytes written in the buckets that did not expire yet
+        Rewrites of a result (e.g. STARTED followed by SUCCESS) are counted separately
+        :return: The statistics
+        :rtype: dict
+        """
+        statistics = {'count': 0, 'bytes': 0, 'buckets': 0}
+        for bucket in self._get_live_buckets():
+            count = self._volatile.get(self._STATISTICS_KEY.format('count', bucket))
+            if count is None:
+                continue
+            statistics['buckets'] += 1
+            statistics['count'] += int(count)
+            statistics['bytes'] += int(self._volatile.get(self._STATISTICS_KEY.format('bytes', bucket), 0))
+        return statistics
+
+    def _decode_result(self, data):
+        """
+        Decodes a stored result. Results stored before a change of the result serializer are still in YAML format
+        :param data: Stored (encoded) result
+        :type data: str
+        :return: The decoded result
+        """
+        try:
+            return self.decode(data)
+        except Exception:
+            return yaml.load(data)
 
     def get_key_for_task(self, *args, **kwargs):
         """
@@ -151,34 +456,54 @@ class ArakoonResultBackend(KeyValueStoreBackend):
 
     def cleanup(self):
         """
-        Delete expired metadata. It will not remove results of tasks that are 'STARTED', 'PENDING' or 'RETRY' as the user
-        would not be able to retrieve the information of the task if it would be removed
+        Delete expired metadata. Results are removed per bucket once the whole bucket expired, regardless of the state of the tasks within
         The clean up task is scheduled by the celery beat. The default expires is 1 day (can be overruled in the settings)
         """
+        self._cleanup_unbucketed()
+        last_expired_bucket = self._get_bucket(time.time() - self._get_expires()) - 1
+        try:
+            last_cleaned_bucket = self._client.get(self._CLEANED_BUCKET_KEY)
+        except KeyNotFoundException:
+            last_cleaned_bucket = last_expired_bucket - self.CLEANUP_LOOKBACK
+        if last_cleaned_bucket >= last_expired_bucket:
+            return
+        transaction = self._client.begin_transaction()
+        for bucket in xrange(last_cleaned_bucket + 1, last_expired_bucket + 1):
+            self._logger.debug('Removing bucket {0} as it has expired'.format(bucket))
+            self._client.delete_prefix('{0}{1}_'.format(self._BUCKET_PREFIX, bucket), transaction=transaction)
+        self._client.set(self._CLEANED_BUCKET_KEY, last_expired_bucket, transaction=transaction)
+        self._client.apply_transaction(transaction)
+
+    def _cleanup_unbucketed(self):
+        """
+        Delete expired task and group results which were stored without bucket. It will not remove results of tasks that are
+        'STARTED', 'PENDING' or 'RETRY' as the user would not be able to retrieve the information of the task if it would be removed
+        """
         def build_cleanup():
             transaction = self._client.begin_transaction()  # Faster to batch them all at once than it is to wait for results after every delete
-            for key, value in self._client.prefix_entries(self._NAMESPACE_PREFIX):
-                if isinstance(value, dict):  # PyrakoonStore wraps it up in a dict and json dumps/loads it
-                    if all(k in value for k in ['time_set', 'data']):  # Dealing with a wrapped instance
-                        # Will be either JSON or YAML format. JSON will be decoded as dict, YAML as string which needs conversion
-                        data = value.get('data')
-                        loaded_data = None
-                        if isinstance(data, basestring):
-                            try:
-                                loaded_data = yaml.load(data)
-                            except Exception:
-                                self._logger.exception('Invalid entry within the ResultBackend')
-                        elif isinstance(data, dict):
-                            loaded_data = data
-                        if isinstance(loaded_data, dict) and 'status' in loaded_data:  # Check for state
-                            status = loaded_data['status']
-                            # All possible states: PENDING, STARTED, RETRY, FAILURE, SUCCESS
-                            if status in ['STARTED', 'RETRY', 'PENDING']:
-                                self._logger.debug('Not removing {0} as it has not yet finished'.format(key))
-                                continue
-                        if time.time() - value['time_set'] > self.expires:
-                            self._logger.debug('Removing {0} as it has expired'.format(key))
-                            self._client.delete(key, must_exist=False, transaction=transaction)
+            for prefix in [self.task_keyprefix, self.group_keyprefix]:
+                for key, value in self._client.prefix_entries(self._get_full_key(prefix)):
+                    if isinstance(value, dict):  # PyrakoonStore wraps it up in a dict and json dumps/loads it
+                        if all(k in value for k in ['time_set', 'data']):  # Dealing with a wrapped instance
+                            # Will be either JSON, YAML or msgpack format. JSON will be decoded as dict, YAML and msgpack as string which needs conversion
+                            data = value.get('data')
+                            loaded_data = None
+                            if isinstance(data, basestring):
+                                try:
+                                    loaded_data = self._decode_result(data)
+                                except Exception:
+                                    self._logger.exception('Invalid entry within the ResultBackend')
+                            elif isinstance(data, dict):
+                                loaded_data = data
+                            if isinstance(loaded_data, dict) and 'status' in loaded_data:  # Check for state
+                                status = loaded_data['status']
+                                # All possible states: PENDING, STARTED, RETRY, FAILURE, SUCCESS
+                                if status in ['STARTED', 'RETRY', 'PENDING']:
+                                    self._logger.debug('Not removing {0} as it has not yet finished'.format(key))
+                                    continue
+                            if time.time() - value['time_set'] > self._get_expires():
+                                self._logger.debug('Removing {0} as it has expired'.format(key))
+                                self._client.delete(key, must_exist=False, transaction=transaction)
             self._logger.debug('Applying removal transactions')
             return transaction
         self._client.apply_callback_transaction(build_cleanup, max_retries=20)
@@ -0,0 +1,122 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Module which contains an extended msgpack encoder
+"""
+
+import base64
+from collections import OrderedDict
+from datetime import datetime
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MsgpackExtender(object):
+    """
+    Extends msgpack functionality, providing a way to encode and decode the types the ovsyaml serializer supports on top of JSON (OrderedDict, set, datetime)
+    This class is to be registered in the kombu registry and can be set as serializer within celery (see celery_run)
+    Kombu registry:
+    from kombu.serialization import register
+    register('ovsmsgpack', MsgpackExtender.dumps, MsgpackExtender.loads, content_type='application/x-ovsmsgpack', content_encoding='utf-8')
+    The packed data is base64 encoded as the ArakoonResultBackend stores the results JSON encoded
+    """
+    EXT_ORDERED_DICT = 1
+    EXT_SET = 2
+    EXT_DATETIME = 3
+    DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+    @staticmethod
+    def is_available():
+        """
+        Returns whether the msgpack library is installed
+        :return: True if the serializer can be used
+        :rtype: bool
+        """
+        return msgpack is not None
+
+    @staticmethod
+    def dumps(data):
+        """
+        Dumps the given data
+        :param data: Data to dump
+        :return: The packed data, base64 encoded
+        :rtype: str
+        """
+        return base64.b64encode(MsgpackExtender.pack(data))
+
+    @staticmethod
+    def loads(data):
+        """
+        Loads data which was dumped by MsgpackExtender.dumps
+        :param data: Data to load
+        :type data: str
+        :return: The unpacked data
+        """
+        return MsgpackExtender.unpack(base64.b64decode(data))
+
+    @staticmethod
+    def pack(data):
+        """
+        Packs the given data, without any additional encoding
+        :param data: Data to pack
+        :return: The packed data
+        :rtype: str
+        """
+        # Strict types, otherwise an OrderedDict would be packed as a plain dict without ever reaching the default hook
+        return msgpack.packb(data, default=MsgpackExtender._default, use_bin_type=False, strict_types=True)
+
+    @staticmethod
+    def unpack(data):
+        """
+        Unpacks data which was packed by MsgpackExtender.pack
+        :param data: Data to unpack
+        :type data: str
+        :return: The unpacked data
+        """
+        return msgpack.unpackb(data, ext_hook=MsgpackExtender._ext_hook)
+
+    @staticmethod
+    def _default(obj):
+        """
+        Packs the types msgpack does not support by itself
+        """
+        if isinstance(obj, OrderedDict):
+            return msgpack.ExtType(MsgpackExtender.EXT_ORDERED_DICT, MsgpackExtender.pack(obj.items()))
+        if isinstance(obj, dict):
+            return dict(obj)
+        if isinstance(obj, tuple):
+            return list(obj)
+        if isinstance(obj, (set, frozenset)):
+            return msgpack.ExtType(MsgpackExtender.EXT_SET, MsgpackExtender.pack(list(obj)))
+        if isinstance(obj, datetime):
+            return msgpack.ExtType(MsgpackExtender.EXT_DATETIME, obj.strftime(MsgpackExtender.DATETIME_FORMAT))
+        raise TypeError('Unable to pack object of type {0}'.format(type(obj)))
+
+    @staticmethod
+    def _ext_hook(code, data):
+        """
+        Unpacks the types packed by MsgpackExtender._default
+        """
+        if code == MsgpackExtender.EXT_ORDERED_DICT:
+            return OrderedDict(MsgpackExtender.unpack(data))
+        if code == MsgpackExtender.EXT_SET:
+            return set(MsgpackExtender.unpack(data))
+        if code == MsgpackExtender.EXT_DATETIME:
+            return datetime.strptime(data, MsgpackExtender.DATETIME_FORMAT)
+        return msgpack.ExtType(code, data)
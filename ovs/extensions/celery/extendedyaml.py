@@ -33,6 +33,9 @@ class YamlExtender(object):
     register('ovsyaml', YamlExtender.ordered_dump, yaml.safe_load, content_type='application/x-yaml', content_encoding='utf-8')
     """
 
+    _loaders = {}
+    _dumpers = {}
+
     @staticmethod
     def ordered_load(stream, loader=yaml.SafeLoader, object_pairs_hook=OrderedDict):
         """
@@ -43,15 +46,18 @@ class YamlExtender(object):
         :param object_pairs_hook: Object to cast the deserialized data as
         :return: The instance of the object_pairs_hook
         """
-        class OrderedLoader(loader):  # Create a class which inherits the given Loader so we don't overrule the default loading behaviour
-            pass
+        ordered_loader = YamlExtender._loaders.get((loader, object_pairs_hook))
+        if ordered_loader is None:
+            class OrderedLoader(loader):  # Create a class which inherits the given Loader so we don't overrule the default loading behaviour
+                pass
 
-        def construct_mapping(loader_implementation, node):
-            loader_implementation.flatten_mapping(node)
-            return object_pairs_hook(loader_implementation.construct_pairs(node))
+            def construct_mapping(loader_implementation, node):
+                loader_implementation.flatten_mapping(node)
+                return object_pairs_hook(loader_implementation.construct_pairs(node))
 
-        OrderedLoader.add_constructor(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, construct_mapping)
-        return yaml.load(stream, OrderedLoader)
+            OrderedLoader.add_constructor(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, construct_mapping)
+            ordered_loader = YamlExtender._loaders[(loader, object_pairs_hook)] = OrderedLoader
+        return yaml.load(stream, ordered_loader)
 
     @staticmethod
     def ordered_dump(data, stream=None, dumper=yaml.SafeDumper, **kwargs):
@@ -63,11 +69,14 @@ class YamlExtender(object):
         :param dumper: Dumper class to use (eg. yaml.Dumper, yaml.SafeDumper, yaml.BaseDumper, ...)
         :return:
         """
-        class OrderedDumper(dumper):  # Create a class which inherits the given Dumper so we don't overrule the default dumping behaviour
-            pass
+        ordered_dumper = YamlExtender._dumpers.get(dumper)
+        if ordered_dumper is None:
+            class OrderedDumper(dumper):  # Create a class which inherits the given Dumper so we don't overrule the default dumping behaviour
+                pass
 
-        def _dict_representer(dumper_implementation, data_to_dump):
-            return dumper_implementation.represent_mapping(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, data_to_dump.items())
+            def _dict_representer(dumper_implementation, data_to_dump):
+                return dumper_implementation.represent_mapping(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, data_to_dump.items())
 
-        OrderedDumper.add_representer(OrderedDict, _dict_representer)
-        return yaml.dump(data, stream, OrderedDumper, **kwargs)
+            OrderedDumper.add_representer(OrderedDict, _dict_representer)
+            ordered_dumper = YamlExtender._dumpers[dumper] = OrderedDumper
+        return yaml.dump(data, stream, ordered_dumper, **kwargs)
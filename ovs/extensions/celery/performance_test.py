@@ -0,0 +1,97 @@
+#!/usr/bin/env python2
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Celery result serializer performance test module
+"""
+import sys
+import json
+import time
+import uuid
+import yaml
+from collections import OrderedDict
+from ovs.extensions.celery.extendedmsgpack import MsgpackExtender
+from ovs.extensions.celery.extendedyaml import YamlExtender
+
+
+class SerializerBenchmark(object):
+    """
+    Compares the result serializers on encode/decode time and on the amount of bytes stored by the ArakoonResultBackend
+    """
+    repetition = 100
+
+    def __init__(self):
+        """
+        Init method
+        """
+        self.serializers = OrderedDict([('ovsyaml', (YamlExtender.ordered_dump, yaml.safe_load)),
+                                        ('json', (json.dumps, json.loads))])
+        if MsgpackExtender.is_available() is True:
+            self.serializers['ovsmsgpack'] = (MsgpackExtender.dumps, MsgpackExtender.loads)
+
+    @staticmethod
+    def _build_results(amount_of_vdisks):
+        """
+        Builds a set of typical task results, wrapped in the Celery result metadata
+        """
+        guids = [str(uuid.uuid4()) for _ in xrange(amount_of_vdisks)]
+        results = OrderedDict()
+        results['snapshot_all_vdisks (success)'] = (guids, [])
+        results['snapshot_all_vdisks (fail)'] = (guids[:amount_of_vdisks / 2], guids[amount_of_vdisks / 2:])
+        results['delete_snapshots'] = dict((guid, {'success': True, 'error': None}) for guid in guids)
+        results['ordered'] = OrderedDict((guid, index) for index, guid in enumerate(guids))
+        return OrderedDict((name, {'status': 'SUCCESS',
+                                   'result': result,
+                                   'traceback': None,
+                                   'children': [],
+                                   'task_id': str(uuid.uuid4())})
+                           for name, result in results.iteritems())
+
+    def test_serializers(self, amount_of_vdisks=500):
+        """
+        Encodes and decodes the typical results with every serializer
+        """
+        print ''
+        print 'serializing {0} times, {1} vDisks'.format(SerializerBenchmark.repetition, amount_of_vdisks)
+        for name, meta in SerializerBenchmark._build_results(amount_of_vdisks).iteritems():
+            print '\n{0}'.format(name)
+            for serializer, (dumps, loads) in self.serializers.iteritems():
+                try:
+                    start = time.time()
+                    for _ in xrange(SerializerBenchmark.repetition):
+                        encoded = dumps(meta)
+                    encode_time = (time.time() - start) / SerializerBenchmark.repetition
+                    start = time.time()
+                    for _ in xrange(SerializerBenchmark.repetition):
+                        loads(encoded)
+                    decode_time = (time.time() - start) / SerializerBenchmark.repetition
+                except Exception as ex:
+                    print '  {0:<12} unsupported: {1}'.format(serializer, ex)
+                    continue
+                # The result backend wraps the encoded result and stores it as JSON
+                stored = json.dumps({'data': encoded, 'time_set': time.time()})
+                print '  {0:<12} encode {1:>8.3f}ms, decode {2:>8.3f}ms, stored {3:>8}B'.format(serializer, encode_time * 1000, decode_time * 1000, len(stored))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2:
+        SerializerBenchmark.repetition = int(sys.argv[1])
+    benchmark = SerializerBenchmark()
+    if len(sys.argv) >= 3:
+        benchmark.test_serializers(int(sys.argv[2]))
+    else:
+        benchmark.test_serializers()
@@ -20,12 +20,17 @@ Generic module for managing configuration somewhere
 
 import copy
 import json
+import time
+import uuid
 import random
 import string
+from contextlib import contextmanager
+from threading import Lock, local
 # noinspection PyUnresolvedReferences
 from ovs_extensions.caching.decorators import cache_file
 # ConnectionException, NotFoundException are here for backwards compatibility
 from ovs_extensions.generic.configuration import Configuration as _Configuration, ConnectionException, NotFoundException
+from ovs_extensions.constants import is_unittest_mode
 from ovs_extensions.constants.config import CONFIG_STORE_LOCATION
 from ovs.extensions.generic.system import System
 
@@ -47,12 +52,221 @@ class Configuration(_Configuration):
                    'webapps': {'html_endpoint': '/',
                                'oauth2': {'mode': 'local'}}}
 
+    # Read-through cache of the configuration values of this process
+    # - Writes through this class invalidate the written key locally and change the version key, which makes other processes drop their cache
+    # - The version key is verified at most once every CACHE_CHECK_INTERVAL seconds
+    # - Values are never served when older than CACHE_MAX_AGE seconds, which bounds the staleness for writes not done through this class
+    CACHE_ENABLED = None  # None: enabled unless running the unittests
+    CACHE_CHECK_INTERVAL = 1
+    CACHE_MAX_AGE = 30
+    CACHE_VERSION_KEY = '/ovs/framework/configuration_version'
+
+    _cache = {}  # (key, raw): (value, base key, time fetched)
+    _cache_lock = Lock()
+    _cache_bypass = local()  # Values are never served from the cache while writing, as sub-keys are written by updating the stored value
+    _cache_versions = {}  # Base key: amount of local writes, to prevent caching values which were read during a write
+    _cache_transactions = {}  # Transaction: base keys written in the transaction
+    _cache_statistics = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    _cache_store_version = None
+    _cache_last_check = 0
+    _cache_missing = object()
+
     def __init__(self):
         """
         Dummy init method
         """
         _ = self
 
+    @classmethod
+    def get(cls, key, raw=False, **kwargs):
+        """
+        Get the value of a key, served from the cache of this process when possible
+        :param key: Key to get
+        :type key: str
+        :param raw: Return the raw value instead of the decoded one
+        :type raw: bool
+        :param kwargs: Additional arguments ('default' is returned when the key does not exist)
+        :return: The value of the key
+        """
+        if cls._is_cache_enabled() is False or getattr(cls._cache_bypass, 'depth', 0) > 0 or any(kwarg != 'default' for kwarg in kwargs):
+            return super(Configuration, cls).get(key, raw=raw, **kwargs)
+
+        cache_key = (key, raw)
+        cls._verify_cache_version()
+        with cls._cache_lock:
+            entry = cls._cache.get(cache_key)
+            if entry is not None and time.time() - entry[2] <= cls.CACHE_MAX_AGE:
+                cls._cache_statistics['hits'] += 1
+                value = entry[0]
+            else:
+                cls._cache_statistics['misses'] += 1
+                value = None
+                entry = None
+            base_key = cls._get_base_key(key)
+            version = cls._cache_versions.get(base_key, 0)
+
+        if entry is None:
+            value = super(Configuration, cls).get(key, raw=raw, default=cls._cache_missing)
+            with cls._cache_lock:
+                if cls._cache_versions.get(base_key, 0) == version:  # Not written while retrieving the value
+                    cls._cache[cache_key] = (value, base_key, time.time())
+        if value is cls._cache_missing:
+            if 'default' in kwargs:
+                return kwargs['default']
+            return super(Configuration, cls).get(key, raw=raw)  # Raises the expected exception
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    @classmethod
+    def set(cls, key, *args, **kwargs):
+        """
+        Set the value of a key and invalidate the cached value
+        """
+        try:
+            with cls._cache_bypassed():
+                return super(Configuration, cls).set(key, *args, **kwargs)
+        finally:
+            cls._invalidate_cache([key], transaction=kwargs.get('transaction'))
+
+    @classmethod
+    def delete(cls, key, *args, **kwargs):
+        """
+        Delete a key and invalidate the cached value
+        """
+        try:
+            with cls._cache_bypassed():
+                return super(Configuration, cls).delete(key, *args, **kwargs)
+        finally:
+            cls._invalidate_cache([key], transaction=kwargs.get('transaction'))
+
+    @classmethod
+    def rename(cls, key, new_key, *args, **kwargs):
+        """
+        Rename a key and invalidate the cached values of both the old and the new key
+        """
+        try:
+            with cls._cache_bypassed():
+                return super(Configuration, cls).rename(key, new_key, *args, **kwargs)
+        finally:
+            cls._invalidate_cache([key, new_key])
+
+    @classmethod
+    def apply_transaction(cls, transaction, *args, **kwargs):
+        """
+        Apply a transaction and invalidate the cached values of all keys written in it
+        """
+        try:
+            with cls._cache_bypassed():
+                return super(Configuration, cls).apply_transaction(transaction, *args, **kwargs)
+        finally:
+            with cls._cache_lock:
+                keys = cls._cache_transactions.pop(transaction, [])
+            cls._invalidate_cache(keys)
+
+    @classmethod
+    def get_cache_statistics(cls):
+        """
+        Retrieve the statistics of the configuration cache of this process
+        :return: The amount of hits, misses and invalidations and the amount of cached values
+        :rtype: dict
+        """
+        with cls._cache_lock:
+            statistics = cls._cache_statistics.copy()
+            statistics['size'] = len(cls._cache)
+        return statistics
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Clears the configuration cache of this process
+        :return: None
+        :rtype: NoneType
+        """
+        with cls._cache_lock:
+            cls._cache.clear()
+            cls._cache_store_version = None
+            cls._cache_last_check = 0
+
+    @classmethod
+    @contextmanager
+    def _cache_bypassed(cls):
+        """
+        Bypasses the cache for all reads done by the current thread within the context
+        """
+        cls._cache_bypass.depth = getattr(cls._cache_bypass, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            cls._cache_bypass.depth -= 1
+
+    @classmethod
+    def _is_cache_enabled(cls):
+        """
+        Returns whether values are cached
+        """
+        if cls.CACHE_ENABLED is None:
+            return is_unittest_mode() is False
+        return cls.CACHE_ENABLED
+
+    @staticmethod
+    def _get_base_key(key):
+        """
+        Retrieve the key as stored in the configuration management (without the sub-keys and without leading or trailing slashes)
+        """
+        return key.split('|', 1)[0].strip('/')
+
+    @classmethod
+    def _invalidate_cache(cls, keys, transaction=None):
+        """
+        Drops the cached values of the given keys (and the keys nested underneath them) and notifies the other processes
+        Keys written in a transaction are only invalidated when the transaction is applied
+        """
+        if cls._is_cache_enabled() is False:
+            return
+        base_keys = set(cls._get_base_key(key) for key in keys)
+        with cls._cache_lock:
+            if transaction is not None:
+                cls._cache_transactions.setdefault(transaction, set()).update(base_keys)
+                return
+            for base_key in base_keys:
+                cls._cache_versions[base_key] = cls._cache_versions.get(base_key, 0) + 1
+            for cache_key, entry in cls._cache.items():
+                if any(entry[1] == base_key or entry[1].startswith(base_key + '/') for base_key in base_keys):
+                    cls._cache.pop(cache_key)
+                    cls._cache_statistics['invalidations'] += 1
+        if len(base_keys) > 0:
+            version = str(uuid.uuid4())
+            try:
+                # Another process might have changed the version since the last verification, which would be overwritten below
+                previous_version = super(Configuration, cls).get(cls.CACHE_VERSION_KEY, default=None)
+                super(Configuration, cls).set(cls.CACHE_VERSION_KEY, version)
+            except Exception:
+                return  # Other processes will no longer serve the old value once it reached the maximum age
+            with cls._cache_lock:
+                if previous_version != cls._cache_store_version:
+                    cls._cache_statistics['invalidations'] += len(cls._cache)
+                    cls._cache.clear()
+                cls._cache_store_version = version
+
+    @classmethod
+    def _verify_cache_version(cls):
+        """
+        Drops all cached values when another process changed the configuration management since the last verification
+        """
+        now = time.time()
+        with cls._cache_lock:
+            if now - cls._cache_last_check < cls.CACHE_CHECK_INTERVAL:
+                return
+            cls._cache_last_check = now
+        try:
+            version = super(Configuration, cls).get(cls.CACHE_VERSION_KEY, default=None)
+        except Exception:
+            return  # The maximum age of the cached values still applies
+        with cls._cache_lock:
+            if version != cls._cache_store_version:
+                cls._cache_statistics['invalidations'] += len(cls._cache)
+                cls._cache.clear()
+                cls._cache_store_version = version
+
     @classmethod
     def initialize_host(cls, host_id, port_info=None):
         """
@@ -18,7 +18,10 @@
 SSHClient module
 Used for remote or local command execution
 """
+import os
 import time
+from Queue import Empty, Queue
+from threading import Lock, Thread
 from ovs.dal.helpers import Descriptor
 # Do not remove unused imports, they are imported elsewhere from here
 # noinspection PyUnresolvedReferences
@@ -32,6 +35,23 @@ class SSHClient(_SSHClient):
     Remote/local client
     """
     HEARTBEAT_TIMEOUT = 300
+    HEARTBEAT_CHECK_INTERVAL = 30  # A verified heartbeat of a StorageRouter is trusted for this amount of seconds
+
+    # Pool of connected clients of this process, shared by all tasks running in it
+    # - Clients are keyed by endpoint and user and are only handed out again while their connection is still active
+    # - Every command runs in its own channel of the connection, so a single client can serve concurrent commands
+    # - Clients which have not been handed out for POOL_IDLE_TIMEOUT seconds are dropped from the pool
+    POOL_ENABLED = None  # None: enabled unless running the unittests
+    POOL_IDLE_TIMEOUT = 300
+    CONNECT_WORKERS = 10
+    CONNECT_TIMEOUT = 30  # Maximum amount of seconds get_clients waits for all endpoints to be connected
+
+    _pool = {}  # (ip, username): (client, time last handed out)
+    _pool_pid = None
+    _pool_lock = Lock()
+    _pool_statistics = {'connects': 0, 'reuses': 0, 'failures': 0, 'unhealthy': 0, 'evictions': 0,
+                        'connect_time_total': 0.0, 'connect_time_max': 0.0}
+    _verified_storagerouters = {}  # StorageRouter guid: (ip, time the heartbeat was verified)
 
     def __init__(self, endpoint, username='ovs', password=None, cached=True, timeout=None):
         """
@@ -47,55 +67,225 @@ class SSHClient(_SSHClient):
         :param timeout: An optional timeout (in seconds) for the TCP connect
         :type timeout: float
         """
-        from ovs.dal.hybrids.storagerouter import StorageRouter
-        storagerouter = None
-        if Descriptor.isinstance(endpoint, StorageRouter):
-            # Refresh the object before checking its attributes
-            storagerouter = StorageRouter(endpoint.guid)
-            endpoint = storagerouter.ip
-
-        unittest_mode = is_unittest_mode()
-
-        if storagerouter is not None and unittest_mode is False:
-            self._check_storagerouter(storagerouter, True)
-
+        endpoint = self._resolve_endpoint(endpoint)
         super(SSHClient, self).__init__(endpoint=endpoint,
                                         username=username,
                                         password=password,
                                         cached=cached,
                                         timeout=timeout)
 
-    @staticmethod
-    def get_clients(endpoints, user_names=None, raise_error=False):
+    @classmethod
+    def get_pooled(cls, endpoint, username='ovs', timeout=None):
+        """
+        Retrieve a connected client from the pool of this process. A new client is connected when none is available
+        Pooled clients are shared: they should not be closed by the caller
+        :param endpoint: Ip address to connect to / storagerouter object
+        :type endpoint: basestring / ovs.dal.hybrids.storagerouter.StorageRouter
+        :param username: Name of the user to connect as
+        :type username: str
+        :param timeout: An optional timeout (in seconds) for the TCP connect
+        :type timeout: float
+        :return: A connected client
+        :rtype: SSHClient
+        """
+        if cls._is_pool_enabled() is False:
+            return cls(endpoint, username=username, timeout=timeout)
+
+        ip = cls._resolve_endpoint(endpoint)
+        key = (ip, username)
+        now = time.time()
+        with cls._pool_lock:
+            for pool_key, (_, last_used) in cls._pool.items():
+                if now - last_used > cls.POOL_IDLE_TIMEOUT:
+                    # The client is not closed explicitly, as it might still be in use by a long-running task
+                    cls._pool.pop(pool_key)
+                    cls._pool_statistics['evictions'] += 1
+            entry = cls._pool.get(key)
+        if entry is not None:
+            client = entry[0]
+            healthy = cls._is_connected(client)
+            with cls._pool_lock:
+                if healthy is True:
+                    cls._pool[key] = (client, time.time())
+                    cls._pool_statistics['reuses'] += 1
+                    return client
+                cls._pool_statistics['unhealthy'] += 1
+                if cls._pool.get(key) is entry:
+                    cls._pool.pop(key)
+
+        start = time.time()
+        try:
+            client = cls(ip, username=username, timeout=timeout)
+        except Exception:
+            with cls._pool_lock:
+                cls._pool_statistics['failures'] += 1
+            raise
+        duration = time.time() - start
+        with cls._pool_lock:
+            cls._pool_statistics['connects'] += 1
+            cls._pool_statistics['connect_time_total'] += duration
+            cls._pool_statistics['connect_time_max'] = max(cls._pool_statistics['connect_time_max'], duration)
+            cls._pool[key] = (client, time.time())
+        return client
+
+    @classmethod
+    def get_pool_statistics(cls):
+        """
+        Retrieve the statistics of the client pool of this process
+        :return: The amount of connects, reuses, failures, unhealthy and evicted clients, the connect latency, the reuse ratio and the amount of pooled clients
+        :rtype: dict
+        """
+        with cls._pool_lock:
+            statistics = cls._pool_statistics.copy()
+            statistics['pooled'] = len(cls._pool)
+        handed_out = statistics['connects'] + statistics['reuses']
+        statistics['reuse_ratio'] = statistics['reuses'] / float(handed_out) if handed_out > 0 else 0.0
+        statistics['connect_time_average'] = statistics['connect_time_total'] / statistics['connects'] if statistics['connects'] > 0 else 0.0
+        return statistics
+
+    @classmethod
+    def clear_pool(cls):
+        """
+        Drops all clients from the pool of this process and forgets the verified heartbeats
+        :return: None
+        :rtype: NoneType
+        """
+        with cls._pool_lock:
+            cls._pool.clear()
+            cls._verified_storagerouters.clear()
+
+    @classmethod
+    def get_clients(cls, endpoints, user_names=None, raise_error=False, timeout=None):
         """
         Retrieve a list of SSHClient instances
+        All endpoints are connected to concurrently, using the clients pooled in this process when available
         :param endpoints: List of StorageRouters or IPs
         :type endpoints: list
         :param user_names: User names for which to establish the connections
         :type user_names: list
         :param raise_error: Raise exception if any endpoint is unreachable
         :type raise_error: bool
+        :param timeout: Maximum amount of seconds to wait for all endpoints. Endpoints which are not connected by then are considered offline. Defaults to CONNECT_TIMEOUT
+        :type timeout: float
         :return: Dictionary with SSHClients for the specified endpoints and user names
         :rtype: dict
         """
         if user_names is None or len(user_names) == 0:
             user_names = [None]
+        if timeout is None:
+            timeout = cls.CONNECT_TIMEOUT
 
-        clients = {'offline': []}
-        for endpoint in endpoints:
-            for user_name in user_names:
+        results = {}  # Index of the endpoint: (clients per user name, exception)
+        results_lock = Lock()
+        endpoint_queue = Queue()
+        for index, endpoint in enumerate(endpoints):
+            endpoint_queue.put((index, endpoint))
+
+        def _connect():
+            while True:
                 try:
-                    client = SSHClient(endpoint=endpoint, username=user_name)
-                    if endpoint not in clients:
-                        clients[endpoint] = {}
-                    clients[endpoint][client.username] = client
-                except (UnableToConnectException, NotAuthenticatedException):
-                    clients['offline'].append(endpoint)
-                    if raise_error is True:
-                        raise
-                    break
+                    _index, _endpoint = endpoint_queue.get_nowait()
+                except Empty:
+                    return
+                endpoint_clients = {}
+                exception = None
+                for user_name in user_names:
+                    try:
+                        client = cls.get_pooled(endpoint=_endpoint, username=user_name)
+                        endpoint_clients[client.username] = client
+                    except Exception as ex:
+                        exception = ex
+                        break
+                with results_lock:
+                    results[_index] = (endpoint_clients, exception)
+
+        threads = []
+        for thread_index in xrange(min(cls.CONNECT_WORKERS, len(endpoints))):
+            thread = Thread(name='ssh_connect_{0}'.format(thread_index), target=_connect)
+            thread.daemon = True  # A hanging connect should never keep the process alive
+            thread.start()
+            threads.append(thread)
+        deadline = time.time() + timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.time()))
+
+        clients = {'offline': []}
+        for index, endpoint in enumerate(endpoints):
+            with results_lock:
+                endpoint_clients, exception = results.get(index, ({}, None))
+                if index not in results:
+                    exception = TimeOutException('Connecting to {0} took longer than {1}s'.format(endpoint, timeout))
+            if len(endpoint_clients) > 0:
+                clients[endpoint] = endpoint_clients
+            if exception is None:
+                continue
+            if not isinstance(exception, (UnableToConnectException, NotAuthenticatedException, TimeOutException)):
+                raise exception
+            clients['offline'].append(endpoint)
+            if raise_error is True:
+                raise exception
         return clients
 
+    @classmethod
+    def _resolve_endpoint(cls, endpoint):
+        """
+        Resolves a StorageRouter to its IP, verifying its heartbeat unless that happened less than HEARTBEAT_CHECK_INTERVAL seconds ago
+        :param endpoint: Ip address / storagerouter object
+        :type endpoint: basestring / ovs.dal.hybrids.storagerouter.StorageRouter
+        :return: The IP address of the endpoint
+        :rtype: str
+        """
+        from ovs.dal.hybrids.storagerouter import StorageRouter
+        if not Descriptor.isinstance(endpoint, StorageRouter):
+            return endpoint
+
+        pool_enabled = cls._is_pool_enabled()
+        if pool_enabled is True:
+            with cls._pool_lock:
+                verified = cls._verified_storagerouters.get(endpoint.guid)
+            if verified is not None and time.time() - verified[1] < cls.HEARTBEAT_CHECK_INTERVAL:
+                return verified[0]
+
+        # Refresh the object before checking its attributes
+        storagerouter = StorageRouter(endpoint.guid)
+        if is_unittest_mode() is False:
+            cls._check_storagerouter(storagerouter, True)
+        if pool_enabled is True:
+            with cls._pool_lock:
+                cls._verified_storagerouters[storagerouter.guid] = (storagerouter.ip, time.time())
+        return storagerouter.ip
+
+    @classmethod
+    def _is_pool_enabled(cls):
+        """
+        Returns whether clients are pooled. A forked process starts with an empty pool, as connections cannot be shared between processes
+        """
+        if cls.POOL_ENABLED is None:
+            enabled = is_unittest_mode() is False
+        else:
+            enabled = cls.POOL_ENABLED
+        if enabled is True and cls._pool_pid != os.getpid():
+            with cls._pool_lock:
+                if cls._pool_pid != os.getpid():
+                    cls._pool.clear()
+                    cls._verified_storagerouters.clear()
+                    cls._pool_pid = os.getpid()
+        return enabled
+
+    @staticmethod
+    def _is_connected(client):
+        """
+        Verifies whether the connection of a client is still active
+        """
+        paramiko_client = getattr(client, '_client', None)
+        if paramiko_client is None:
+            return True  # Local clients do not hold a connection
+        try:
+            transport = paramiko_client.get_transport()
+            return transport is not None and transport.is_active()
+        except Exception:
+            return False
+
     @classmethod
     def _check_storagerouter(cls, storagerouter, refresh=True):
         """
@@ -0,0 +1,167 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Test module for the pool of SSHClients
+"""
+
+import time
+import unittest
+from threading import Event
+from ovs.dal.tests.helpers import DalHelper
+from ovs.extensions.generic.sshclient import SSHClient, UnableToConnectException
+
+
+class _Transport(object):
+    """
+    Paramiko transport of which the state can be changed
+    """
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+
+class _ParamikoClient(object):
+    """
+    Paramiko client holding a transport
+    """
+    def __init__(self):
+        self.transport = _Transport()
+
+    def get_transport(self):
+        return self.transport
+
+
+class _PooledSSHClient(SSHClient):
+    """
+    SSHClient which registers its connects instead of connecting
+    """
+    connects = []
+    blocked = {}  # IP: Event to wait for before connecting
+    unreachable = set()
+
+    def __init__(self, endpoint, username='ovs', password=None, cached=True, timeout=None):
+        _ = password, cached, timeout
+        endpoint = self._resolve_endpoint(endpoint)
+        if endpoint in _PooledSSHClient.blocked:
+            _PooledSSHClient.blocked[endpoint].wait()
+        if endpoint in _PooledSSHClient.unreachable:
+            raise UnableToConnectException('Unable to connect to {0}'.format(endpoint))
+        self.ip = endpoint
+        self.username = username
+        self._client = _ParamikoClient()
+        _PooledSSHClient.connects.append((endpoint, username))
+
+
+class SSHClientPoolTest(unittest.TestCase):
+    """
+    Test the pool of SSHClients of a process
+    """
+    def setUp(self):
+        """
+        (Re)Sets the stores and the pool on every test
+        """
+        DalHelper.setup()
+        self.structure = DalHelper.build_dal_structure({'storagerouters': [1, 2]})
+        self.pool_enabled = SSHClient.POOL_ENABLED
+        SSHClient.POOL_ENABLED = True
+        SSHClient.clear_pool()
+        for key in SSHClient._pool_statistics:
+            SSHClient._pool_statistics[key] = 0
+        _PooledSSHClient.connects = []
+        _PooledSSHClient.blocked = {}
+        _PooledSSHClient.unreachable = set()
+
+    def tearDown(self):
+        """
+        Clean up test suite
+        """
+        for event in _PooledSSHClient.blocked.itervalues():
+            event.set()
+        SSHClient.POOL_ENABLED = self.pool_enabled
+        SSHClient.clear_pool()
+        DalHelper.teardown()
+
+    def test_reuse(self):
+        """
+        Validates whether connected clients are reused per endpoint and user
+        """
+        client = _PooledSSHClient.get_pooled('10.0.0.1')
+        self.assertIs(_PooledSSHClient.get_pooled('10.0.0.1'), client)
+        self.assertIsNot(_PooledSSHClient.get_pooled('10.0.0.1', username='root'), client)
+        self.assertIs(_PooledSSHClient.get_pooled(self.structure['storagerouters'][1]), client)
+        self.assertEqual(_PooledSSHClient.connects, [('10.0.0.1', 'ovs'), ('10.0.0.1', 'root')])
+        statistics = SSHClient.get_pool_statistics()
+        self.assertEqual(statistics['connects'], 2)
+        self.assertEqual(statistics['reuses'], 2)
+        self.assertEqual(statistics['reuse_ratio'], 0.5)
+        self.assertEqual(statistics['pooled'], 2)
+
+    def test_eviction(self):
+        """
+        Validates whether unhealthy and idle clients are replaced
+        """
+        client = _PooledSSHClient.get_pooled('10.0.0.1')
+        client._client.transport.active = False
+        unhealthy_replacement = _PooledSSHClient.get_pooled('10.0.0.1')
+        self.assertIsNot(unhealthy_replacement, client)
+        self.assertEqual(SSHClient.get_pool_statistics()['unhealthy'], 1)
+
+        SSHClient._pool[('10.0.0.1', 'ovs')] = (unhealthy_replacement, time.time() - SSHClient.POOL_IDLE_TIMEOUT - 1)
+        idle_replacement = _PooledSSHClient.get_pooled('10.0.0.1')
+        self.assertIsNot(idle_replacement, unhealthy_replacement)
+        self.assertEqual(SSHClient.get_pool_statistics()['evictions'], 1)
+        self.assertEqual(len(_PooledSSHClient.connects), 3)
+
+    def test_pid_change(self):
+        """
+        Validates whether a forked process starts with an empty pool
+        """
+        client = _PooledSSHClient.get_pooled('10.0.0.1')
+        _PooledSSHClient._pool_pid = -1  # As if the pool was filled by the parent process
+        self.assertIsNot(_PooledSSHClient.get_pooled('10.0.0.1'), client)
+        self.assertEqual(len(_PooledSSHClient.connects), 2)
+
+    def test_heartbeat_interval(self):
+        """
+        Validates whether a verified StorageRouter is only reloaded once the verification is outdated
+        """
+        storagerouter = self.structure['storagerouters'][1]
+        self.assertEqual(_PooledSSHClient._resolve_endpoint(storagerouter), '10.0.0.1')
+        storagerouter.ip = '10.0.0.11'
+        storagerouter.save()
+        self.assertEqual(_PooledSSHClient._resolve_endpoint(storagerouter), '10.0.0.1')
+        ip, verified = SSHClient._verified_storagerouters[storagerouter.guid]
+        SSHClient._verified_storagerouters[storagerouter.guid] = (ip, verified - SSHClient.HEARTBEAT_CHECK_INTERVAL - 1)
+        self.assertEqual(_PooledSSHClient._resolve_endpoint(storagerouter), '10.0.0.11')
+
+    def test_get_clients(self):
+        """
+        Validates whether get_clients connects concurrently and reports unreachable and slow endpoints as offline
+        """
+        _PooledSSHClient.unreachable.add('10.0.0.2')
+        _PooledSSHClient.blocked['10.0.0.3'] = Event()
+        start = time.time()
+        clients = _PooledSSHClient.get_clients(['10.0.0.1', '10.0.0.2', '10.0.0.3'], user_names=['ovs', 'root'], timeout=1)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(sorted(clients['10.0.0.1'].keys()), ['ovs', 'root'])
+        self.assertNotIn('10.0.0.2', clients)
+        self.assertNotIn('10.0.0.3', clients)
+        self.assertEqual(clients['offline'], ['10.0.0.2', '10.0.0.3'])
+        with self.assertRaises(UnableToConnectException):
+            _PooledSSHClient.get_clients(['10.0.0.1', '10.0.0.2'], raise_error=True, timeout=1)
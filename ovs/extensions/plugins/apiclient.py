@@ -20,20 +20,34 @@ Generic module for calling the ASD-Manager
 
 import time
 import base64
-import inspect
 import logging
 import requests
+from Queue import Empty, Queue
+from threading import Lock, Thread
+from requests.adapters import HTTPAdapter
 from ovs_extensions.generic.exceptions import InvalidCredentialsError, NotFoundError
 
 
 class APIClient(object):
     """
     Basic API client: passes username and password in the Authorization header
+    All clients towards the same endpoint with the same pool size share a session, keeping the connections alive in between calls
     """
     _logger = logging.getLogger(__name__)
 
-    def __init__(self, ip, port, credentials, timeout, log_min_duration=1):
-        # type: (str, int, tuple, int, int) -> None
+    POOL_SIZE = 10  # Maximum amount of connections kept alive towards a single endpoint, per pool size requested by the clients
+    BATCH_WORKERS = 10  # Maximum amount of concurrent calls when fetching in batch
+
+    _sessions = {}  # (base URL, pool size): session
+    _sessions_lock = Lock()
+    _session_methods = {requests.get: 'GET',
+                        requests.post: 'POST',
+                        requests.put: 'PUT',
+                        requests.patch: 'PATCH',
+                        requests.delete: 'DELETE'}
+
+    def __init__(self, ip, port, credentials, timeout, log_min_duration=1, pool_size=None):
+        # type: (str, int, tuple, int, int, int) -> None
         """
         Initialize an API client
         :param ip: Endpoint for the API
@@ -46,6 +60,8 @@ class APIClient(object):
         :type timeout: int
         :param log_min_duration: The call will get logged as slow if it took longer than this amount of seconds
         :type log_min_duration: int
+        :param pool_size: Maximum amount of connections kept alive towards the endpoint. Defaults to APIClient.POOL_SIZE
+        :type pool_size: int
         :return: None
         :rtype: NoneType
         """
@@ -55,6 +71,28 @@ class APIClient(object):
 
         self.timeout = timeout
         self._log_min_duration = log_min_duration
+        self._pool_size = pool_size or self.POOL_SIZE
+        self._refresh_lock = Lock()
+
+    def _get_session(self, base_url):
+        # type: (str) -> requests.Session
+        """
+        Retrieve the session towards an endpoint. Sessions are shared by all clients within this process requesting the same pool size
+        :param base_url: Base URL of the endpoint
+        :type base_url: str
+        :return: The session
+        :rtype: requests.Session
+        """
+        key = (base_url, self._pool_size)
+        with APIClient._sessions_lock:
+            if key not in APIClient._sessions:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+                session = requests.Session()
+                session.verify = False
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                APIClient._sessions[key] = session
+            return APIClient._sessions[key]
 
     def _call(self, method, url, data=None, json=None, timeout=None, clean=False):
         # type: (callable, str, dict, dict, int, bool) -> any
@@ -78,12 +116,15 @@ class APIClient(object):
         if timeout is None:
             timeout = self.timeout
 
-        # Refresh URL / headers
-        self._base_url, self._base_headers = self._refresh()
+        # Refresh URL / headers. Threads sharing this client wait for a refresh in progress instead of refreshing as well
+        with self._refresh_lock:
+            self._base_url, self._base_headers = self._refresh()
+            base_url = self._base_url
+            base_headers = self._base_headers
 
         start = time.time()
-        kwargs = {'url': '{0}/{1}'.format(self._base_url, url),
-                  'headers': self._base_headers,
+        kwargs = {'url': '{0}/{1}'.format(base_url, url),
+                  'headers': base_headers,
                   'verify': False,
                   'timeout': timeout}
         # Requests library can both take in 'data' or 'json' keyword.
@@ -93,7 +134,12 @@ class APIClient(object):
         for key, val in [('json', json), ('data', data)]:
             if val is not None:
                 kwargs[key] = val
-        response = method(**kwargs)
+        method_name = self._session_methods.get(method)
+        if method_name is not None:
+            response = self._get_session(base_url).request(method_name, **kwargs)
+        else:
+            method_name = getattr(method, '__name__', str(method)).upper()
+            response = method(**kwargs)
         if response.status_code == 404:
             msg = 'URL not found: {0}'.format(kwargs['url'])
             self._logger.error('{0}. Response: {1}'.format(msg, response))
@@ -112,9 +158,54 @@ class APIClient(object):
             data = self.clean(data)
         duration = time.time() - start
         if duration > self._log_min_duration:
-            self._logger.info('Request "{0}" took {1:.2f} seconds (internal duration {2:.2f} seconds)'.format(inspect.stack()[1][3], duration, internal_duration))
+            self._logger.info('Request "{0} {1}" took {2:.2f} seconds (internal duration {3:.2f} seconds)'.format(method_name, url, duration, internal_duration))
         return data
 
+    def get_batch(self, urls, timeout=None, clean=False, raise_on_error=True):
+        # type: (list, int, bool, bool) -> list
+        """
+        Executes GET calls for multiple URLs at once, over the connections kept alive towards the endpoint
+        Intended for the plugin clients deriving from this class which fetch many resources of the same endpoint
+        :param urls: Urls to call
+        :type urls: list
+        :param timeout: Timeout to wait for a reply of the server, for every call
+        :type timeout: int
+        :param clean: Should the data be cleaned (metadata entries stripped from the result)
+        :type clean: bool
+        :param raise_on_error: Raise the first error after all calls finished. When False, the raised exception is returned for the failed calls
+        :type raise_on_error: bool
+        :return: The responses, in the order of the urls
+        :rtype: list
+        """
+        results = [None] * len(urls)
+        failed = []
+        url_queue = Queue()
+        for index, url in enumerate(urls):
+            url_queue.put((index, url))
+
+        def _fetch():
+            while True:
+                try:
+                    _index, _url = url_queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    results[_index] = self.get(_url, timeout=timeout, clean=clean)
+                except Exception as ex:
+                    results[_index] = ex
+                    failed.append(_index)
+
+        threads = []
+        for _ in xrange(min(self.BATCH_WORKERS, self._pool_size, len(urls))):
+            thread = Thread(target=_fetch)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if raise_on_error is True and len(failed) > 0:
+            raise results[min(failed)]
+        return results
+
     def _refresh(self):
         # type: () -> Tuple[str, dict]
         """
@@ -0,0 +1,148 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Test module for the APIClient
+"""
+
+import time
+import unittest
+from threading import Lock
+from ovs.extensions.plugins.apiclient import APIClient
+
+
+class _Response(object):
+    """
+    Response of the API
+    """
+    def __init__(self, url):
+        self.status_code = 200
+        self._url = url
+
+    def json(self):
+        if 'fail' in self._url:
+            return {'_duration': 0, '_success': False, '_error': 'Failed {0}'.format(self._url)}
+        return {'_duration': 0, 'url': self._url}
+
+
+class _Session(object):
+    """
+    Session answering every call with the called URL. Calls towards a URL ending on a number take that amount of tenths of a second
+    """
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        _ = kwargs
+        self.calls.append((method, url))
+        delay = url.rsplit('/', 1)[-1]
+        if delay.isdigit():
+            time.sleep(int(delay) / 10.0)
+        return _Response(url)
+
+
+class _RefreshingAPIClient(APIClient):
+    """
+    APIClient keeping track of the amount of concurrent refreshes
+    """
+    def __init__(self, *args, **kwargs):
+        super(_RefreshingAPIClient, self).__init__(*args, **kwargs)
+        self.refreshes = 0
+        self.concurrent_refreshes = 0
+        self.max_concurrent_refreshes = 0
+        self._counter_lock = Lock()
+
+    def _refresh(self):
+        with self._counter_lock:
+            self.refreshes += 1
+            self.concurrent_refreshes += 1
+            self.max_concurrent_refreshes = max(self.max_concurrent_refreshes, self.concurrent_refreshes)
+        time.sleep(0.05)
+        with self._counter_lock:
+            self.concurrent_refreshes -= 1
+        return super(_RefreshingAPIClient, self)._refresh()
+
+
+class APIClientTest(unittest.TestCase):
+    """
+    Test the sessions and batched calls of the APIClient
+    """
+    def setUp(self):
+        """
+        (Re)Sets the sessions on every test
+        """
+        APIClient._sessions = {}
+        self.client = _RefreshingAPIClient('10.0.0.1', 8500, ('username', 'password'), timeout=5)
+        self.session = _Session()
+        APIClient._sessions[('https://10.0.0.1:8500', APIClient.POOL_SIZE)] = self.session
+
+    def tearDown(self):
+        """
+        Clean up test suite
+        """
+        APIClient._sessions = {}
+
+    def test_session_mapping(self):
+        """
+        Validates whether sessions are shared per endpoint and pool size
+        """
+        APIClient._sessions = {}
+        credentials = ('username', 'password')
+        session = APIClient('10.0.0.1', 8500, credentials, timeout=5)._get_session('https://10.0.0.1:8500')
+        self.assertIs(APIClient('10.0.0.1', 8500, credentials, timeout=5)._get_session('https://10.0.0.1:8500'), session)
+        self.assertIs(APIClient('10.0.0.1', 8500, credentials, timeout=5, pool_size=APIClient.POOL_SIZE)._get_session('https://10.0.0.1:8500'), session)
+        self.assertIsNot(APIClient('10.0.0.2', 8500, credentials, timeout=5)._get_session('https://10.0.0.2:8500'), session)
+        small_session = APIClient('10.0.0.1', 8500, credentials, timeout=5, pool_size=2)._get_session('https://10.0.0.1:8500')
+        self.assertIsNot(small_session, session)
+        # noinspection PyProtectedMember
+        self.assertEqual(small_session.get_adapter('https://10.0.0.1:8500')._pool_maxsize, 2)
+        # noinspection PyProtectedMember
+        self.assertEqual(session.get_adapter('https://10.0.0.1:8500')._pool_maxsize, APIClient.POOL_SIZE)
+        self.assertEqual(len(APIClient._sessions), 3)
+
+    def test_refresh_lock(self):
+        """
+        Validates whether threads sharing a client never refresh concurrently
+        """
+        self.client.get_batch(['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(self.client.refreshes, 5)
+        self.assertEqual(self.client.max_concurrent_refreshes, 1)
+
+    def test_batch_ordering(self):
+        """
+        Validates whether the responses of a batch are returned in the order of the urls, regardless of the order they are received in
+        """
+        urls = ['calls/3', 'calls/2', 'calls/1', 'calls/0']
+        results = self.client.get_batch(urls, clean=True)
+        self.assertEqual(results, [{'url': 'https://10.0.0.1:8500/{0}'.format(url)} for url in urls])
+        self.assertEqual(sorted(self.session.calls), sorted(('GET', 'https://10.0.0.1:8500/{0}'.format(url)) for url in urls))
+        self.assertEqual(self.client.get_batch([]), [])
+
+    def test_batch_errors(self):
+        """
+        Validates whether a failed call raises after all calls finished, or is returned when requested
+        """
+        urls = ['calls/1', 'fail/2', 'fail/0', 'calls/0']
+        with self.assertRaises(RuntimeError) as context:
+            self.client.get_batch(urls)
+        self.assertEqual(str(context.exception), 'Failed https://10.0.0.1:8500/fail/2')  # The first failed url, not the first failure
+        self.assertEqual(len(self.session.calls), 4)
+
+        results = self.client.get_batch(urls, raise_on_error=False)
+        self.assertEqual(results[0]['url'], 'https://10.0.0.1:8500/calls/1')
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertIsInstance(results[2], RuntimeError)
+        self.assertEqual(results[3]['url'], 'https://10.0.0.1:8500/calls/0')
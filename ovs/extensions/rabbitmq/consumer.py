@@ -23,17 +23,227 @@ import os
 import imp
 import sys
 import pika
+import time
 import inspect
 import logging
+from collections import deque
+from Queue import Full, Queue
+from threading import Lock, Thread
 from ovs.constants.logging import RABBITMQ_LOGGER
 from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.system import System
-from ovs.extensions.rabbitmq.processor import process
+from ovs.extensions.rabbitmq.processor import EventBatch, process
+from ovs.extensions.storage.volatilefactory import VolatileFactory
 from ovs.lib.plugin import PluginController
 
 mapping = {}
 
 
+class _EndpointConsumer(Thread):
+    """
+    Consumes storagedriver events from a single RabbitMQ endpoint. Received events are grouped in batches which are
+    handed to the worker pool. Batches are acknowledged in order, once they are dispatched
+    While a worker is busy, the hand-off keeps the connection serviced so heartbeats are never missed
+    Delivery tags are only valid on the channel they were received on. Every connection therefore gets a new generation:
+    batches of an older generation are dropped instead of dispatched (RabbitMQ redelivers their messages) and never acknowledged
+    """
+    def __init__(self, parent, endpoint):
+        super(_EndpointConsumer, self).__init__(name='consumer_{0}'.format(endpoint))
+        self.daemon = True
+        self.parent = parent
+        self.endpoint = endpoint
+        self.dispatched = Queue()  # (generation, delivery tag) of the dispatched batches
+        self.generation = 0
+        self._pending = deque()  # [delivery tag, dispatched] of all batches of the current generation in receive order
+
+    def run(self):
+        """
+        Keeps consuming, reconnecting when the connection is lost
+        """
+        while True:
+            try:
+                self._consume()
+            except Exception as ex:
+                self.parent.logger.exception('Consuming from {0} failed, reconnecting: {1}'.format(self.endpoint, ex))
+                self._reset()
+                time.sleep(5)
+
+    def _reset(self):
+        """
+        Forgets all batches of the current connection. Their unacknowledged messages are redelivered by RabbitMQ
+        """
+        self.generation += 1
+        self._pending.clear()
+        while not self.dispatched.empty():
+            self.dispatched.get()
+
+    def is_current(self, batch):
+        """
+        Returns whether a batch was received on the current connection
+        """
+        return batch.generation == self.generation
+
+    def _consume(self):
+        host, port = self.endpoint.split(':')
+        connection = pika.BlockingConnection(pika.ConnectionParameters(host=host,
+                                                                       port=int(port),
+                                                                       credentials=pika.PlainCredentials(Configuration.get('/ovs/framework/messagequeue|user'),
+                                                                                                         Configuration.get('/ovs/framework/messagequeue|password'))))
+        try:
+            channel = connection.channel()
+            channel.queue_declare(queue=self.parent.queue, durable=self.parent.durable)
+            # The prefetch count bounds the amount of in-flight (unacknowledged) messages for this endpoint
+            channel.basic_qos(prefetch_count=self.parent.window)
+            self.parent.logger.info('Consuming from {0}'.format(self.endpoint))
+            batch = None
+            window_end = None
+            for method, _, body in channel.consume(self.parent.queue, inactivity_timeout=self.parent.batch_window):
+                if method is not None:
+                    if batch is None:
+                        batch = EventBatch(self.parent.queue, self.parent.mapping)
+                        batch.received = time.time()
+                        batch.generation = self.generation
+                        window_end = batch.received + self.parent.batch_window
+                    try:
+                        if type(body) == unicode:
+                            body = bytes(bytearray(body, 'utf-8'))
+                        batch.add(body)
+                    except Exception as ex:
+                        self.parent.logger.exception('Error processing message: {0}'.format(ex))
+                    batch.delivery_tag = method.delivery_tag
+                if batch is not None and (method is None or batch.amount_of_events >= self.parent.batch_size or time.time() >= window_end):
+                    self._pending.append([batch.delivery_tag, False])
+                    self._hand_off(connection, batch)
+                    batch = None
+                self._acknowledge(channel)
+        finally:
+            connection.close()
+
+    def _hand_off(self, connection, batch):
+        """
+        Hands the shards of a batch to their workers. Waiting for a full worker queue does not block the connection
+        """
+        shards = batch.split(len(self.parent.work))
+        batch.remaining = len(shards)
+        if batch.remaining == 0:
+            self.parent.complete(self, batch)
+            return
+        for index, shard in shards.iteritems():
+            while True:
+                try:
+                    self.parent.work[index].put((self, batch, shard), timeout=self.parent.HAND_OFF_TIMEOUT)
+                    break
+                except Full:
+                    connection.process_data_events()
+
+    def _acknowledge(self, channel):
+        """
+        Acknowledges all batches which are dispatched, up to the first batch which is still being dispatched
+        """
+        while not self.dispatched.empty():
+            generation, delivery_tag = self.dispatched.get()
+            if generation != self.generation:
+                continue  # Received on a previous connection
+            for entry in self._pending:
+                if entry[0] == delivery_tag:
+                    entry[1] = True
+        last_delivery_tag = None
+        while len(self._pending) > 0 and self._pending[0][1] is True:
+            last_delivery_tag = self._pending.popleft()[0]
+        if last_delivery_tag is not None:
+            channel.basic_ack(delivery_tag=last_delivery_tag, multiple=True)
+
+
+class AsyncEventConsumer(object):
+    """
+    Consumes storagedriver events from all configured RabbitMQ endpoints at once (one connection per endpoint),
+    dispatching the event batches in a pool of workers
+    Every worker has its own queue. The tasks of a batch are sharded over the workers per volume, so the events of a volume
+    are always dispatched by the same worker, in the order they were received
+    """
+    STATISTICS_KEY = 'ovs_rabbitmq_consumer_statistics'
+    STATISTICS_INTERVAL = 60
+    HAND_OFF_TIMEOUT = 0.5
+
+    def __init__(self, queue, durable, event_mapping, endpoints, logger):
+        self.queue = queue
+        self.durable = durable
+        self.mapping = event_mapping
+        self.endpoints = endpoints
+        self.logger = logger
+        self.batch_size = Configuration.get('/ovs/framework/messagequeue|batch.size', default=100)
+        self.batch_window = Configuration.get('/ovs/framework/messagequeue|batch.window', default=0.5)
+        self.window = Configuration.get('/ovs/framework/messagequeue|consumer.window', default=1000)
+        self.workers = Configuration.get('/ovs/framework/messagequeue|consumer.workers', default=4)
+        self.work = [Queue(maxsize=2) for _ in xrange(self.workers)]
+        self._statistics_lock = Lock()
+        self._statistics = {'events': 0, 'tasks': 0, 'lag': 0.0}
+
+    def run(self):
+        """
+        Starts the consumers and the workers and reports statistics until interrupted
+        """
+        for index in xrange(self.workers):
+            worker = Thread(target=self._work, name='event_worker_{0}'.format(index), args=(index,))
+            worker.daemon = True
+            worker.start()
+        for endpoint in self.endpoints:
+            _EndpointConsumer(self, endpoint).start()
+        volatile = VolatileFactory.get_client()
+        while True:
+            time.sleep(self.STATISTICS_INTERVAL)
+            with self._statistics_lock:
+                statistics, self._statistics = self._statistics, {'events': 0, 'tasks': 0, 'lag': 0.0}
+            result = {'events_per_second': statistics['events'] / float(self.STATISTICS_INTERVAL),
+                      'tasks_per_second': statistics['tasks'] / float(self.STATISTICS_INTERVAL),
+                      'average_lag': statistics['lag'] / statistics['events'] if statistics['events'] > 0 else 0.0,
+                      'time': time.time()}
+            self.logger.info('Processed {0:.1f} events/s, launched {1:.1f} tasks/s, average lag {2:.3f}s'.format(result['events_per_second'],
+                                                                                                                result['tasks_per_second'],
+                                                                                                                result['average_lag']))
+            try:
+                volatile.set(self.STATISTICS_KEY, result, self.STATISTICS_INTERVAL * 5)
+            except Exception:
+                self.logger.exception('Could not store the consumer statistics')
+
+    def _work(self, index):
+        """
+        Dispatches the shards handed over to this worker by the endpoint consumers
+        :param index: Index of the worker
+        :type index: int
+        """
+        while True:
+            consumer, batch, shard = self.work[index].get()
+            if not consumer.is_current(batch):
+                # The connection the batch was received on is gone, so its events are redelivered
+                continue
+            try:
+                amount_of_tasks = shard.dispatch()
+            except Exception as ex:
+                self.logger.exception('Error dispatching events: {0}'.format(ex))
+                amount_of_tasks = 0
+            with self._statistics_lock:
+                self._statistics['tasks'] += amount_of_tasks
+                batch.remaining -= 1
+                completed = batch.remaining == 0
+            if completed is True:
+                self.complete(consumer, batch)
+
+    def complete(self, consumer, batch):
+        """
+        Marks a batch of which all shards are dispatched, so it can be acknowledged
+        :param consumer: Consumer which received the batch
+        :type consumer: _EndpointConsumer
+        :param batch: The dispatched batch
+        :type batch: ovs.extensions.rabbitmq.processor.EventBatch
+        """
+        consumer.dispatched.put((batch.generation, batch.delivery_tag))
+        with self._statistics_lock:
+            self._statistics['events'] += batch.amount_of_events
+            # Lag: time between receiving the first event of a batch and having it dispatched
+            self._statistics['lag'] += (time.time() - batch.received) * batch.amount_of_events
+
+
 if __name__ == '__main__':
     def callback(ch, method, properties, body):
         """
@@ -56,6 +266,8 @@ if __name__ == '__main__':
                         help='Rabbitmq queue name')
     parser.add_argument('--durable', dest='queue_durable', action='store_const', default=False, const=True,
                         help='Declare queue as durable')
+    parser.add_argument('--async', dest='async_mode', action='store_const', default=False, const=True,
+                        help='Consume storagedriver events from all endpoints, dispatching them in a worker pool')
 
     logger = logging.getLogger(RABBITMQ_LOGGER)
 
@@ -83,6 +295,13 @@ if __name__ == '__main__':
 
             # Starting connection and handling
             rmq_servers = Configuration.get('/ovs/framework/messagequeue|endpoints')
+            if args.async_mode is True and args.rabbitmq_queue == Configuration.get('/ovs/framework/messagequeue|queues.storagedriver'):
+                logger.info('Waiting for messages on {0} from {1}...'.format(args.rabbitmq_queue, ', '.join(rmq_servers)))
+                AsyncEventConsumer(queue=args.rabbitmq_queue,
+                                   durable=args.queue_durable,
+                                   event_mapping=mapping,
+                                   endpoints=rmq_servers,
+                                   logger=logger).run()
             channel = None
             server = ''
             loglevel = logging.root.manager.disable  # Workaround for disabling logging
@@ -112,9 +331,37 @@ if __name__ == '__main__':
             logger.info('Waiting for messages on {0}...'.format(queue))
             logger.info('To exit press CTRL+C', extra={'print_msg': True})
 
-            channel.basic_qos(prefetch_count=1)
-            channel.basic_consume(callback, queue=queue)
-            channel.start_consuming()
+            if queue == Configuration.get('/ovs/framework/messagequeue|queues.storagedriver'):
+                # Storagedriver events are pulled in batches, coalesced and acknowledged together once dispatched
+                batch_size = Configuration.get('/ovs/framework/messagequeue|batch.size', default=100)
+                batch_window = Configuration.get('/ovs/framework/messagequeue|batch.window', default=0.5)
+                channel.basic_qos(prefetch_count=batch_size)
+                batch = EventBatch(queue, mapping)
+                last_delivery_tag = None
+                window_end = None
+                for method, _, body in channel.consume(queue, inactivity_timeout=batch_window):
+                    if method is not None:
+                        try:
+                            if type(body) == unicode:
+                                body = bytes(bytearray(body, 'utf-8'))
+                            batch.add(body)
+                        except Exception as e:
+                            logger.exception('Error processing message: {0}'.format(e))
+                        last_delivery_tag = method.delivery_tag
+                        if window_end is None:
+                            window_end = time.time() + batch_window
+                    if last_delivery_tag is not None and (method is None or batch.amount_of_events >= batch_size or time.time() >= window_end):
+                        try:
+                            batch.dispatch()
+                        except Exception as e:
+                            logger.exception('Error dispatching events: {0}'.format(e))
+                        channel.basic_ack(delivery_tag=last_delivery_tag, multiple=True)
+                        last_delivery_tag = None
+                        window_end = None
+            else:
+                channel.basic_qos(prefetch_count=1)
+                channel.basic_consume(callback, queue=queue)
+                channel.start_consuming()
         else:
             logger.info('Nothing to do here, kthxbai',)
 
@@ -47,7 +47,8 @@ class Mapping(object):
                                                   'arguments': {'[NODE_ID]': 'storagedriver_id'}}],
                FileSystemEvents.owner_changed: [{'task': VDiskController.migrate_from_voldrv,
                                                  'arguments': {'name': 'volume_id',
-                                                               'new_owner_id': 'new_owner_id'}}],
+                                                               'new_owner_id': 'new_owner_id'},
+                                                 'options': {'coalesce_key': 'migrate_[volume_id]'}}],
                FileSystemEvents.file_rename: [{'task': VDiskController.rename_from_voldrv,
                                                'arguments': {'new_path': 'new_path',
                                                              'old_path': 'old_path',
@@ -59,4 +60,5 @@ class Mapping(object):
                                                           'arguments': {'volume_name': 'volume_id',
                                                                         'old_state': 'old_state',
                                                                         'new_state': 'new_state',
-                                                                        '[NODE_ID]': 'storagedriver_id'}}]}
+                                                                        '[NODE_ID]': 'storagedriver_id'},
+                                                          'options': {'coalesce_key': 'dtl_state_transition_[volume_id]'}}]}
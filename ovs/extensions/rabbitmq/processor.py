@@ -19,8 +19,10 @@ Contains the process method for processing rabbitmq messages
 """
 
 import json
+import time
 import inspect
 import logging
+from collections import OrderedDict
 import volumedriver.storagerouter.FileSystemEvents_pb2 as FileSystemEvents
 import volumedriver.storagerouter.VolumeDriverEvents_pb2 as VolumeDriverEvents
 from celery.task.control import revoke
@@ -31,44 +33,64 @@ from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.storage.volatilefactory import VolatileFactory
 
 CINDER_VOLUME_UPDATE_CACHE = {}
+STORAGEDRIVER_CACHE = {'map': {}, 'loaded': 0}
+STORAGEDRIVER_CACHE_TIMEOUT = 60
+STORAGEDRIVER_CACHE_MIN_REFRESH = 5
+_EXTENSIONS = []
 
 
-def process(queue, body, mapping):
+class EventBatch(object):
     """
-    Processes the actual received body
-    :param queue:   Type of queue to be used
-    :param body:    Body of the message
-    :param mapping:
+    Collects the tasks to execute for a batch of storagedriver events, coalescing them before they are dispatched:
+    - Events with a 'dedupe_key' or 'coalesce_key' option are coalesced on that key, the last event wins
+    - Other events are coalesced when they would result in the exact same task call
+    Possible special tags used as `arguments` key:
+    - [NODE_ID]: Replaced by the storagedriver_id as reported by the event
+    - [CLUSTER_ID]: Replaced by the clusterid as reported by the event
+    Possible dedupe/coalesce key tags:
+    - [EVENT_NAME]: The name of the event message type
+    - [TASK_NAME]: Task method name
+    - [<argument value>]: Any value of the `arguments` dictionary.
     """
-    logger = logging.getLogger(RABBITMQ_LOGGER)
-    if queue == Configuration.get('/ovs/framework/messagequeue|queues.storagedriver'):
-        cache = VolatileFactory.get_client()
-        all_extensions = []
+    _logger = logging.getLogger(RABBITMQ_LOGGER)
+
+    def __init__(self, queue, mapping):
+        """
+        :param queue: Name of the queue the events were received on
+        :type queue: str
+        :param mapping: Mapping of the events to the tasks to execute
+        :type mapping: dict
+        """
+        self.queue = queue
+        self.mapping = mapping
+        self.amount_of_events = 0
+        self._entries = OrderedDict()
 
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, body):
+        """
+        Parses a received body and registers the tasks it should trigger
+        :param body: Body of the message
+        :type body: str
+        :return: None
+        :rtype: NoneType
+        """
         message = FileSystemEvents.EventMessage()
         message.ParseFromString(body)
+        self.amount_of_events += 1
 
-        # Possible special tags used as `arguments` key:
-        # - [NODE_ID]: Replaced by the storagedriver_id as reported by the event
-        # - [CLUSTER_ID]: Replaced by the clusterid as reported by the event
-        # Possible dedupe key tags:
-        # - [EVENT_NAME]: The name of the event message type
-        # - [TASK_NAME]: Task method name
-        # - [<argument value>]: Any value of the `arguments` dictionary.
-
-        logger.info('Got event, processing...')
         event = None
-        for extension in mapping.keys():
+        for extension in self.mapping.keys():
             if not message.event.HasExtension(extension):
                 continue
             event = message.event.Extensions[extension]
             node_id = message.node_id
             cluster_id = message.cluster_id
-            for current_map in mapping[extension]:
+            for current_map in self.mapping[extension]:
                 task = current_map['task']
                 kwargs = {}
-                delay = 0
-                routing_key = 'generic'
                 for field, target in current_map['arguments'].iteritems():
                     if field == '[NODE_ID]':
                         kwargs[target] = node_id
@@ -76,61 +98,123 @@ def process(queue, body, mapping):
                         kwargs[target] = cluster_id
                     else:
                         kwargs[target] = getattr(event, field)
+                entry = {'task': task,
+                         'kwargs': kwargs,
+                         'node_id': node_id,
+                         'delay': 0,
+                         'routing_key': None,  # Routed according to the task's priority class
+                         'dedupe_key': None,
+                         'has_options': 'options' in current_map}
+                key = None
                 if 'options' in current_map:
                     options = current_map['options']
                     if options.get('execonstoragerouter', False):
-                        storagedriver = StorageDriverList.get_by_storagedriver_id(node_id)
-                        if storagedriver is not None:
-                            routing_key = 'sr.{0}'.format(storagedriver.storagerouter.machine_id)
-                    delay = options.get('delay', 0)
-                    dedupe = options.get('dedupe', False)
-                    dedupe_key = options.get('dedupe_key', None)
-                    if dedupe is True and dedupe_key is not None:  # We can't dedupe without a key
-                        key = 'ovs_dedupe_volumedriver_events_{0}'.format(dedupe_key)
-                        key = key.replace('[EVENT_NAME]', extension.full_name)
-                        key = key.replace('[TASK_NAME]', task.__class__.__name__)
-                        for kwarg_key in kwargs:
-                            key = key.replace('[{0}]'.format(kwarg_key), str(kwargs[kwarg_key]))
-                        key = key.replace(' ', '_')
-                        task_id = cache.get(key)
+                        storagedriver_info = _get_storagedriver_info(node_id)
+                        if storagedriver_info is not None:
+                            entry['routing_key'] = 'sr.{0}'.format(storagedriver_info['machine_id'])
+                    entry['delay'] = options.get('delay', 0)
+                    if options.get('dedupe', False) is True and options.get('dedupe_key') is not None:  # We can't dedupe without a key
+                        key = entry['dedupe_key'] = EventBatch._build_key('ovs_dedupe_volumedriver_events_{0}'.format(options['dedupe_key']), extension, task, kwargs)
+                    elif options.get('coalesce_key') is not None:
+                        key = EventBatch._build_key(options['coalesce_key'], extension, task, kwargs)
+                if key is None:
+                    key = (task.__class__.__name__, json.dumps(kwargs, sort_keys=True), entry['routing_key'], entry['delay'])
+                self._entries.pop(key, None)  # Re-inserting moves the entry to the end, keeping the order of the last events
+                self._entries[key] = entry
+        if event is None:
+            message_type = 'unknown'
+            for extension in _load_extensions():
+                if message.event.HasExtension(extension):
+                    message_type = extension.full_name
+            self._logger.info('A message with type {0} was received. Skipped.'.format(message_type))
+
+    def dispatch(self):
+        """
+        Launches one task per coalesced key and empties the batch
+        :return: The amount of launched tasks
+        :rtype: int
+        """
+        cache = VolatileFactory.get_client()
+        amount = 0
+        while len(self._entries) > 0:
+            _, entry = self._entries.popitem(last=False)
+            task = entry['task']
+            kwargs = entry['kwargs']
+            try:
+                if entry['has_options'] is True:
+                    _log(task, kwargs, entry['node_id'])
+                    if entry['dedupe_key'] is not None:
+                        task_id = cache.get(entry['dedupe_key'])
                         if task_id:
                             # Key exists, task was already scheduled
-                            # If task is already running, the revoke message will
-                            # be ignored
+                            # If task is already running, the revoke message will be ignored
                             revoke(task_id)
-                        _log(task, kwargs, node_id)
-                        async_result = task.s(**kwargs).apply_async(
-                            countdown=delay,
-                            routing_key=routing_key
-                        )
-                        cache.set(key, async_result.id, 600)  # Store the task id
-                        new_task_id = async_result.id
-                    else:
-                        _log(task, kwargs, node_id)
-                        async_result = task.s(**kwargs).apply_async(
-                            countdown=delay,
-                            routing_key=routing_key
-                        )
-                        new_task_id = async_result.id
+                    options = {'countdown': entry['delay']}
+                    if entry['routing_key'] is not None:
+                        options['routing_key'] = entry['routing_key']
+                    async_result = task.s(**kwargs).apply_async(**options)
+                    if entry['dedupe_key'] is not None:
+                        cache.set(entry['dedupe_key'], async_result.id, 600)  # Store the task id
                 else:
                     async_result = task.delay(**kwargs)
-                    new_task_id = async_result.id
-                logger.info('[{0}] {1}({2}) started on {3} with taskid {4}. Delay: {5}s'.format(
-                    queue,
-                    task.__name__,
-                    json.dumps(kwargs),
-                    routing_key,
-                    new_task_id,
-                    delay
-                ))
-        if event is None:
-            message_type = 'unknown'
-            if len(all_extensions) == 0:
-                all_extensions = _load_extensions()
-            for extension in all_extensions:
-                if message.event.HasExtension(extension):
-                    message_type = extension.full_name
-            logger.info('A message with type {0} was received. Skipped.'.format(message_type))
+                amount += 1
+                self._logger.info('[{0}] {1}({2}) started on {3} with taskid {4}. Delay: {5}s'.format(self.queue,
+                                                                                                   task.__name__,
+                                                                                                   json.dumps(kwargs),
+                                                                                                   entry['routing_key'] or 'default queue',
+                                                                                                   async_result.id,
+                                                                                                   entry['delay']))
+            except Exception:
+                self._logger.exception('[{0}] Launching {1}({2}) failed'.format(self.queue, task.__name__, json.dumps(kwargs)))
+        if self.amount_of_events > 0:
+            self._logger.info('[{0}] Processed {1} events, launched {2} tasks'.format(self.queue, self.amount_of_events, amount))
+        self.amount_of_events = 0
+        return amount
+
+    def split(self, amount):
+        """
+        Moves the tasks of this batch into at most 'amount' shards. All tasks for the same volume (or, without volume, with the same key)
+        end up in the same shard, in their original order. Dispatching every shard serially keeps the order of the events of a volume
+        and keeps the dedupe handling of a key within a single thread
+        :param amount: Amount of shards
+        :type amount: int
+        :return: The non-empty shards, per shard index
+        :rtype: dict
+        """
+        shards = {}
+        while len(self._entries) > 0:
+            key, entry = self._entries.popitem(last=False)
+            index = hash(entry['kwargs'].get('volume_id', key)) % amount
+            if index not in shards:
+                shards[index] = EventBatch(self.queue, self.mapping)
+            shards[index]._entries[key] = entry
+        return shards
+
+    @staticmethod
+    def _build_key(template, extension, task, kwargs):
+        """
+        Fills in the tags of a dedupe/coalesce key
+        """
+        key = template.replace('[EVENT_NAME]', extension.full_name)
+        key = key.replace('[TASK_NAME]', task.__class__.__name__)
+        for kwarg_key in kwargs:
+            key = key.replace('[{0}]'.format(kwarg_key), str(kwargs[kwarg_key]))
+        return key.replace(' ', '_')
+
+
+def process(queue, body, mapping):
+    """
+    Processes the actual received body
+    :param queue:   Type of queue to be used
+    :param body:    Body of the message
+    :param mapping:
+    """
+    logger = logging.getLogger(RABBITMQ_LOGGER)
+    if queue == Configuration.get('/ovs/framework/messagequeue|queues.storagedriver'):
+        logger.info('Got event, processing...')
+        batch = EventBatch(queue, mapping)
+        batch.add(body)
+        batch.dispatch()
     elif queue == 'notifications.info':
         logger.info('Received notification from openstack...')
         try:
@@ -161,18 +245,42 @@ def _load_extensions():
     """
     Loads all possible extensions
     """
-    extensions = []
+    if _EXTENSIONS:
+        return _EXTENSIONS
     for member in inspect.getmembers(VolumeDriverEvents) + inspect.getmembers(FileSystemEvents):
         if isinstance(member[1], FieldDescriptor):
-            extensions.append(member[1])
-    return extensions
+            _EXTENSIONS.append(member[1])
+    return _EXTENSIONS
+
+
+def _get_storagedriver_info(storagedriver_id):
+    """
+    Retrieves the guid and the machine id of the StorageRouter for a given storagedriver_id
+    The information of all StorageDrivers is cached and reloaded every STORAGEDRIVER_CACHE_TIMEOUT seconds or when an
+    unknown storagedriver_id is requested
+    :param storagedriver_id: ID of the StorageDriver
+    :type storagedriver_id: str
+    :return: The StorageDriver info (guid and machine_id) or None when unknown
+    :rtype: dict
+    """
+    now = time.time()
+    storagedriver_info = STORAGEDRIVER_CACHE['map'].get(storagedriver_id)
+    age = now - STORAGEDRIVER_CACHE['loaded']
+    if age > STORAGEDRIVER_CACHE_TIMEOUT or (storagedriver_info is None and age > STORAGEDRIVER_CACHE_MIN_REFRESH):
+        STORAGEDRIVER_CACHE['map'] = dict((storagedriver.storagedriver_id, {'guid': storagedriver.guid,
+                                                                            'machine_id': storagedriver.storagerouter.machine_id})
+                                          for storagedriver in StorageDriverList.get_storagedrivers())
+        STORAGEDRIVER_CACHE['loaded'] = now
+        storagedriver_info = STORAGEDRIVER_CACHE['map'].get(storagedriver_id)
+    return storagedriver_info
 
 
 def _log(task, kwargs, storagedriver_id):
     """
     Log an event
     """
-    metadata = {'storagedriver': StorageDriverList.get_by_storagedriver_id(storagedriver_id).guid}
+    storagedriver_info = _get_storagedriver_info(storagedriver_id)
+    metadata = {'storagedriver': None if storagedriver_info is None else storagedriver_info['guid']}
     _logger = logging.getLogger(VOLUMEDRIVER_EVENT_LOGGER)
     _logger.info('[{0}.{1}] - {2} - {3}'.format(
         task.__class__.__module__,
@@ -0,0 +1,158 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Test module for the asynchronous event consumer
+"""
+
+import time
+import logging
+import unittest
+from Queue import Queue
+from threading import Lock, Thread
+from ovs.extensions.rabbitmq.consumer import AsyncEventConsumer, _EndpointConsumer
+
+
+class _Channel(object):
+    """
+    Records the acknowledgements
+    """
+    def __init__(self):
+        self.acks = []
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acks.append((delivery_tag, multiple))
+
+
+class _Connection(object):
+    """
+    Connection which frees the busy worker queue when its events are processed
+    """
+    def __init__(self, work_queue):
+        self.work_queue = work_queue
+        self.processed = 0
+
+    def process_data_events(self):
+        self.processed += 1
+        if self.processed == 3:
+            self.work_queue.get()
+
+
+class _Batch(object):
+    """
+    Batch keeping track of its dispatches. It is its own single shard
+    """
+    def __init__(self, generation, delivery_tag, has_tasks=True):
+        self.generation = generation
+        self.delivery_tag = delivery_tag
+        self.received = time.time()
+        self.amount_of_events = 1
+        self.dispatches = 0
+        self.remaining = 1
+        self._has_tasks = has_tasks
+
+    def split(self, amount):
+        _ = amount
+        return {0: self} if self._has_tasks is True else {}
+
+    def dispatch(self):
+        self.dispatches += 1
+        return 1
+
+
+class ConsumerTest(unittest.TestCase):
+    """
+    Test the acknowledgement of dispatched batches
+    """
+    def setUp(self):
+        """
+        Builds a consumer without starting any thread or connection
+        """
+        self.parent = AsyncEventConsumer.__new__(AsyncEventConsumer)
+        self.parent.logger = logging.getLogger(__name__)
+        self.parent.work = [Queue()]
+        self.parent._statistics_lock = Lock()
+        self.parent._statistics = {'events': 0, 'tasks': 0, 'lag': 0.0}
+        self.consumer = _EndpointConsumer(self.parent, '127.0.0.1:5672')
+        self.channel = _Channel()
+
+    def test_in_order_acknowledgement(self):
+        """
+        Validates whether batches are only acknowledged once all earlier batches are dispatched
+        """
+        self.consumer._pending.extend([[1, False], [2, False], [3, False]])
+        self.consumer.dispatched.put((0, 2))
+        self.consumer._acknowledge(self.channel)
+        self.assertEqual(self.channel.acks, [])  # Batch 1 is still being dispatched
+        self.consumer.dispatched.put((0, 1))
+        self.consumer._acknowledge(self.channel)
+        self.assertEqual(self.channel.acks, [(2, True)])
+        self.consumer.dispatched.put((0, 3))
+        self.consumer._acknowledge(self.channel)
+        self.assertEqual(self.channel.acks, [(2, True), (3, True)])
+        self.assertEqual(len(self.consumer._pending), 0)
+
+    def test_reconnect(self):
+        """
+        Validates whether batches and delivery tags of a previous connection are never dispatched or acknowledged
+        """
+        stale_batch = _Batch(0, 1)
+        self.consumer._pending.append([1, False])
+        self.consumer.dispatched.put((0, 7))
+        self.consumer._reset()  # Connection lost
+        self.assertEqual(self.consumer.generation, 1)
+        self.assertEqual(len(self.consumer._pending), 0)
+        self.assertTrue(self.consumer.dispatched.empty())
+        self.assertFalse(self.consumer.is_current(stale_batch))
+
+        # The new channel starts its delivery tags at 1 again
+        batch = _Batch(1, 1)
+        self.consumer._pending.append([1, False])
+        self.parent.work[0].put((self.consumer, stale_batch, stale_batch))
+        self.parent.work[0].put((self.consumer, batch, batch))
+        worker = Thread(target=self.parent._work, args=(0,))
+        worker.daemon = True
+        worker.start()
+        self.assertEqual(self.consumer.dispatched.get(timeout=5), (1, 1))
+        self.assertEqual(stale_batch.dispatches, 0)
+        self.assertEqual(batch.dispatches, 1)
+
+        # A stale tag never marks a batch of the new connection as dispatched
+        self.consumer._pending.append([2, False])
+        self.consumer.dispatched.put((0, 2))
+        self.consumer._acknowledge(self.channel)
+        self.assertEqual(self.channel.acks, [])
+        self.consumer.dispatched.put((1, 1))
+        self.consumer._acknowledge(self.channel)
+        self.assertEqual(self.channel.acks, [(1, True)])
+
+    def test_hand_off(self):
+        """
+        Validates whether the connection keeps being serviced while waiting for a busy worker
+        """
+        self.parent.work = [Queue(maxsize=1)]
+        self.parent.HAND_OFF_TIMEOUT = 0.01
+        self.parent.work[0].put('busy')
+        connection = _Connection(self.parent.work[0])
+        batch = _Batch(0, 1)
+        self.consumer._hand_off(connection, batch)
+        self.assertEqual(connection.processed, 3)
+        self.assertEqual(self.parent.work[0].get_nowait(), (self.consumer, batch, batch))
+
+        # A batch without tasks is dispatched right away
+        self.consumer._hand_off(connection, _Batch(0, 2, has_tasks=False))
+        self.assertEqual(self.consumer.dispatched.get_nowait(), (0, 2))
+        self.assertTrue(self.parent.work[0].empty())
@@ -0,0 +1,238 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Test module for the coalescing of storagedriver events
+"""
+
+import unittest
+import volumedriver.storagerouter.FileSystemEvents_pb2 as FileSystemEvents
+from ovs.dal.tests.helpers import DalHelper
+from ovs.extensions.rabbitmq import processor
+from ovs.extensions.rabbitmq.processor import EventBatch
+
+
+class _AsyncResult(object):
+    """
+    Result of a launched task
+    """
+    def __init__(self, task_id):
+        self.id = task_id
+
+
+class _Signature(object):
+    """
+    Task signature, launching the task with options
+    """
+    def __init__(self, task, kwargs):
+        self._task = task
+        self._kwargs = kwargs
+
+    def apply_async(self, **options):
+        return self._task.launch(self._kwargs, options)
+
+
+class _Task(object):
+    """
+    Task registering its launches instead of launching
+    """
+    launches = []
+
+    def __init__(self):
+        self.__name__ = self.__class__.__name__
+
+    def delay(self, **kwargs):
+        return self.launch(kwargs, {})
+
+    def s(self, **kwargs):
+        return _Signature(self, kwargs)
+
+    def launch(self, kwargs, options):
+        _Task.launches.append((self.__name__, kwargs, options))
+        return _AsyncResult('task_{0}'.format(len(_Task.launches)))
+
+
+class resize_from_voldrv(_Task):
+    """
+    Task triggered by a resize
+    """
+    pass
+
+
+class migrate_from_voldrv(_Task):
+    """
+    Task triggered by an owner change
+    """
+    pass
+
+
+class rename_from_voldrv(_Task):
+    """
+    Task triggered by a rename
+    """
+    pass
+
+
+class EventBatchTest(unittest.TestCase):
+    """
+    Test the coalescing of events into tasks
+    """
+    mapping = {FileSystemEvents.volume_resize: [{'task': resize_from_voldrv(),
+                                                 'arguments': {'name': 'volume_id',
+                                                               'size': 'volume_size',
+                                                               'path': 'volume_path',
+                                                               '[NODE_ID]': 'storagedriver_id'},
+                                                 'options': {'delay': 1,
+                                                             'execonstoragerouter': True,
+                                                             'dedupe': True,
+                                                             'dedupe_key': 'resize_[volume_id]_[storagedriver_id]'}}],
+               FileSystemEvents.owner_changed: [{'task': migrate_from_voldrv(),
+                                                 'arguments': {'name': 'volume_id',
+                                                               'new_owner_id': 'new_owner_id'},
+                                                 'options': {'coalesce_key': 'migrate_[volume_id]'}}],
+               FileSystemEvents.file_rename: [{'task': rename_from_voldrv(),
+                                               'arguments': {'new_path': 'new_path',
+                                                             'old_path': 'old_path',
+                                                             '[NODE_ID]': 'storagedriver_id'}}]}
+
+    def setUp(self):
+        """
+        (Re)Sets the stores and the StorageDriver cache on every test
+        """
+        DalHelper.setup()
+        self.structure = DalHelper.build_dal_structure({'vpools': [1],
+                                                        'storagerouters': [1, 2],
+                                                        'storagedrivers': [(1, 1, 1), (2, 1, 2)]})  # (<id>, <vpool_id>, <storagerouter_id>)
+        processor.STORAGEDRIVER_CACHE['map'] = {}
+        processor.STORAGEDRIVER_CACHE['loaded'] = 0
+        _Task.launches = []
+        self.batch = EventBatch('volumerouter', EventBatchTest.mapping)
+
+    def tearDown(self):
+        """
+        Clean up test suite
+        """
+        DalHelper.teardown()
+
+    def _add(self, extension, node_id='1', **fields):
+        message = FileSystemEvents.EventMessage()
+        message.cluster_id = 'cluster'
+        message.node_id = node_id
+        event = message.event.Extensions[extension]
+        for field, value in fields.iteritems():
+            setattr(event, field, value)
+        self.batch.add(message.SerializeToString())
+
+    def test_coalesce_on_key(self):
+        """
+        Validates whether events are merged on their dedupe or coalesce key, the last event winning
+        """
+        self._add(FileSystemEvents.volume_resize, name='volume_1', path='/volume_1.raw', size=1)
+        self._add(FileSystemEvents.volume_resize, name='volume_1', path='/volume_1.raw', size=2)
+        self._add(FileSystemEvents.volume_resize, name='volume_1', path='/volume_1.raw', size=3, node_id='2')
+        self._add(FileSystemEvents.volume_resize, name='volume_2', path='/volume_2.raw', size=1)
+        self._add(FileSystemEvents.owner_changed, name='volume_1', new_owner_id='1')
+        self._add(FileSystemEvents.owner_changed, name='volume_1', new_owner_id='2')
+        self._add(FileSystemEvents.owner_changed, name='volume_2', new_owner_id='2')
+        self.assertEqual(self.batch.amount_of_events, 7)
+        self.assertEqual(len(self.batch), 5)
+        self.assertEqual(self.batch.dispatch(), 5)
+        self.assertEqual(_Task.launches,
+                         [('resize_from_voldrv', {'volume_id': 'volume_1', 'volume_path': '/volume_1.raw', 'volume_size': 2, 'storagedriver_id': '1'},
+                           {'countdown': 1, 'routing_key': 'sr.1'}),
+                          ('resize_from_voldrv', {'volume_id': 'volume_1', 'volume_path': '/volume_1.raw', 'volume_size': 3, 'storagedriver_id': '2'},
+                           {'countdown': 1, 'routing_key': 'sr.2'}),
+                          ('resize_from_voldrv', {'volume_id': 'volume_2', 'volume_path': '/volume_2.raw', 'volume_size': 1, 'storagedriver_id': '1'},
+                           {'countdown': 1, 'routing_key': 'sr.1'}),
+                          ('migrate_from_voldrv', {'volume_id': 'volume_1', 'new_owner_id': '2'}, {'countdown': 0}),
+                          ('migrate_from_voldrv', {'volume_id': 'volume_2', 'new_owner_id': '2'}, {'countdown': 0})])
+        self.assertEqual(len(self.batch), 0)
+        self.assertEqual(self.batch.amount_of_events, 0)
+
+    def test_coalesce_identical_calls(self):
+        """
+        Validates whether events without a key are only merged when they result in the exact same task call
+        """
+        self._add(FileSystemEvents.file_rename, old_path='/a.raw', new_path='/b.raw')
+        self._add(FileSystemEvents.file_rename, old_path='/a.raw', new_path='/b.raw')
+        self._add(FileSystemEvents.file_rename, old_path='/a.raw', new_path='/b.raw', node_id='2')
+        self._add(FileSystemEvents.file_rename, old_path='/a.raw', new_path='/c.raw')
+        self.assertEqual(self.batch.dispatch(), 3)
+        self.assertEqual(_Task.launches,
+                         [('rename_from_voldrv', {'old_path': '/a.raw', 'new_path': '/b.raw', 'storagedriver_id': '1'}, {}),
+                          ('rename_from_voldrv', {'old_path': '/a.raw', 'new_path': '/b.raw', 'storagedriver_id': '2'}, {}),
+                          ('rename_from_voldrv', {'old_path': '/a.raw', 'new_path': '/c.raw', 'storagedriver_id': '1'}, {})])
+
+    def test_order_preservation(self):
+        """
+        Validates whether tasks are launched in the order of the last event that triggered them
+        """
+        self._add(FileSystemEvents.owner_changed, name='volume_1', new_owner_id='1')
+        self._add(FileSystemEvents.file_rename, old_path='/a.raw', new_path='/b.raw')
+        self._add(FileSystemEvents.owner_changed, name='volume_2', new_owner_id='1')
+        self._add(FileSystemEvents.owner_changed, name='volume_1', new_owner_id='2')
+        self._add(FileSystemEvents.file_rename, old_path='/b.raw', new_path='/c.raw')
+        self.batch.dispatch()
+        self.assertEqual([(name, kwargs.get('volume_id', kwargs.get('new_path'))) for name, kwargs, _ in _Task.launches],
+                         [('rename_from_voldrv', '/b.raw'),
+                          ('migrate_from_voldrv', 'volume_2'),
+                          ('migrate_from_voldrv', 'volume_1'),
+                          ('rename_from_voldrv', '/c.raw')])
+
+    def test_split(self):
+        """
+        Validates whether all tasks of a volume end up in the same shard, in their original order
+        """
+        for index in xrange(10):
+            self._add(FileSystemEvents.owner_changed, name='volume_{0}'.format(index), new_owner_id='1')
+            self._add(FileSystemEvents.volume_resize, name='volume_{0}'.format(index), path='/volume_{0}.raw'.format(index), size=1)
+        shards = self.batch.split(3)
+        self.assertEqual(len(self.batch), 0)
+        self.assertLessEqual(len(shards), 3)
+        self.assertEqual(sum(len(shard) for shard in shards.itervalues()), 20)
+        for shard in shards.itervalues():
+            _Task.launches = []
+            shard.dispatch()
+            volume_ids = [kwargs['volume_id'] for _, kwargs, _ in _Task.launches]
+            for volume_id in set(volume_ids):
+                self.assertEqual([name for name, kwargs, _ in _Task.launches if kwargs['volume_id'] == volume_id],
+                                 ['migrate_from_voldrv', 'resize_from_voldrv'])
+        self.assertEqual(len(set(hash('volume_{0}'.format(index)) % 3 for index in xrange(10))), len(shards))
+
+    def test_storagedriver_info_cache(self):
+        """
+        Validates whether the StorageDriver information is only reloaded once outdated, or for an unknown StorageDriver once allowed
+        """
+        structure = self.structure
+        storagedriver_1 = structure['storagedrivers'][1]
+        self.assertEqual(processor._get_storagedriver_info('1'), {'guid': storagedriver_1.guid, 'machine_id': '1'})
+        loaded = processor.STORAGEDRIVER_CACHE['loaded']
+        self.assertEqual(processor._get_storagedriver_info('2')['machine_id'], '2')
+        self.assertEqual(processor.STORAGEDRIVER_CACHE['loaded'], loaded)
+
+        # An unknown StorageDriver does not trigger a reload right after the previous one
+        DalHelper.build_dal_structure({'storagedrivers': [(3, 1, 1)]}, previous_structure=structure)
+        self.assertIsNone(processor._get_storagedriver_info('3'))
+        self.assertEqual(processor.STORAGEDRIVER_CACHE['loaded'], loaded)
+        processor.STORAGEDRIVER_CACHE['loaded'] -= processor.STORAGEDRIVER_CACHE_MIN_REFRESH + 1
+        self.assertEqual(processor._get_storagedriver_info('3')['machine_id'], '1')
+
+        # A known StorageDriver is reloaded once the cache timed out
+        storagedriver_1.storagerouter = structure['storagerouters'][2]
+        storagedriver_1.save()
+        self.assertEqual(processor._get_storagedriver_info('1')['machine_id'], '1')
+        processor.STORAGEDRIVER_CACHE['loaded'] -= processor.STORAGEDRIVER_CACHE_TIMEOUT + 1
+        self.assertEqual(processor._get_storagedriver_info('1')['machine_id'], '2')
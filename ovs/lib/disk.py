@@ -19,6 +19,7 @@ DiskController module
 """
 import logging
 from ovs.constants.s3 import S3_BASE
+from ovs.dal.dataobject import DataObject
 from ovs.dal.hybrids.disk import Disk
 from ovs.dal.hybrids.diskpartition import DiskPartition
 from ovs.dal.hybrids.storagerouter import StorageRouter
@@ -46,7 +47,7 @@ class DiskController(object):
         """
         storagerouter = StorageRouter(storagerouter_guid)
         try:
-            client = SSHClient(storagerouter, username='root')
+            client = SSHClient.get_pooled(storagerouter, username='root')
         except UnableToConnectException:
             DiskController._logger.exception('Could not connect to StorageRouter {0}'.format(storagerouter.ip))
             raise
@@ -55,7 +56,8 @@ class DiskController(object):
         disks, name_alias_mapping = DiskTools.model_devices(client, s3=s3)
         disks_by_name = dict((disk.name, disk) for disk in disks)
         alias_name_mapping = name_alias_mapping.reverse_mapping()
-        # Sync the model
+        # Sync the model. All created and updated disks and partitions are saved together at the end
+        to_save = []
         for disk in storagerouter.disks:
             generic_disk_model = None  # type: GenericDisk
             for alias in disk.aliases:
@@ -70,21 +72,24 @@ class DiskController(object):
 
             if not generic_disk_model:
                 # Remove disk / partitions if not reported by 'lsblk'
-                DiskController._remove_disk_model(disk)
+                DiskController._remove_disk_model(disk, to_save)
             else:
                 # Update existing disks and their partitions
-                DiskController._sync_disk_with_model(disk, generic_disk_model)
+                DiskController._sync_disk_with_model(disk, generic_disk_model, to_save)
         # Create all disks and their partitions not yet modeled
         for disk_name, generic_disk_model in disks_by_name.iteritems():
-            DiskController._model_disk(generic_disk_model, storagerouter)
+            DiskController._model_disk(generic_disk_model, storagerouter, to_save)
+        DataObject.save_many(to_save)
 
     @classmethod
-    def _remove_disk_model(cls, modeled_disk):
-        # type: (Disk) -> None
+    def _remove_disk_model(cls, modeled_disk, to_save):
+        # type: (Disk, list) -> None
         """
         Remove the modeled disk
         :param modeled_disk: The modeled disk
         :type modeled_disk: Disk
+        :param to_save: List to which the objects to save are added
+        :type to_save: list
         :return: None
         :rtype: NoneType
         """
@@ -103,26 +108,29 @@ class DiskController(object):
         else:
             for partition in modeled_disk.partitions:
                 partition.state = 'MISSING'
-                partition.save()
+                to_save.append(partition)
                 cls._logger.warning('Disk {0} - Partition with offset {1} - Updated status to MISSING'.format(modeled_disk.name, partition.offset))
             modeled_disk.state = 'MISSING'
-            modeled_disk.save()
+            to_save.append(modeled_disk)
             DiskController._logger.warning('Disk {0} - Updated status to MISSING'.format(modeled_disk.name))
 
     @classmethod
-    def _sync_disk_with_model(cls, modeled_disk, generic_modeled_disk):
-        # type: (Disk, GenericDisk) -> None
+    def _sync_disk_with_model(cls, modeled_disk, generic_modeled_disk, to_save):
+        # type: (Disk, GenericDisk, list) -> None
         """
         Sync a generic disk with the modeled disk
         :param modeled_disk: The modeled disk
         :type modeled_disk: Disk
         :param generic_modeled_disk: The generic modeled disk (returned by Disktools)
         :type generic_modeled_disk: GenericDisk
+        :param to_save: List to which the objects to save are added
+        :type to_save: list
         :return: None
         :rtype NoneType
         """
         cls._logger.info('Disk {0} - Found, updating'.format(modeled_disk.name))
         cls._update_disk(modeled_disk, generic_modeled_disk)
+        to_save.append(modeled_disk)
         partitions_by_offset = dict((partition.offset, partition) for partition in generic_modeled_disk.partitions)
         for partition in modeled_disk.partitions:
             if partition.offset not in partitions_by_offset:
@@ -130,21 +138,22 @@ class DiskController(object):
                 if len(partition.roles) > 0:
                     cls._logger.warning('Disk {0} - Partition with offset {1} - Update status to MISSING'.format(modeled_disk.name,partition.offset))
                     partition.state = 'MISSING'
-                    partition.save()
+                    to_save.append(partition)
                 else:
                     cls._logger.info('Disk {0} - Partition with offset {1} - Deleting'.format(modeled_disk.name, partition.offset))
                     partition.delete()
             else:
                 cls._update_partition(partition, partitions_by_offset.pop(partition.offset))
+                to_save.append(partition)
         for partition_offset, generic_partition in partitions_by_offset.iteritems():
             cls._logger.info('Disk {0} - Creating partition - {1}'.format(modeled_disk.name, generic_partition.__dict__))
-            cls._model_partition(partitions_by_offset[partition_offset], modeled_disk)
+            to_save.append(cls._model_partition(partitions_by_offset[partition_offset], modeled_disk))
 
     @classmethod
     def _model_partition(cls, generic_partition_model, disk):
         # type: (GenericPartition, Disk) -> DiskPartition
         """
-        Models a partition
+        Models a partition. The partition is not saved
         :param generic_partition_model: The generic modeled partition (returned by Disktools)
         :type generic_partition_model: GenericPartition
         :param disk: The modeled disk
@@ -158,14 +167,16 @@ class DiskController(object):
         return partition
 
     @classmethod
-    def _model_disk(cls, generic_disk_model, storagerouter):
-        # type: (GenericDisk, StorageRouter) -> Disk
+    def _model_disk(cls, generic_disk_model, storagerouter, to_save):
+        # type: (GenericDisk, StorageRouter, list) -> Disk
         """
-        Models a disk
+        Models a disk and its partitions
         :param generic_disk_model: The generic modeled disk (returned by Disktools)
         :type generic_disk_model: GenericDisk
         :param storagerouter: Storagerouter to which this disk belongs
         :type storagerouter: StorageRouter
+        :param to_save: List to which the disk and its partitions are added, the disk first
+        :type to_save: list
         :return: The newly modeled disk
         :rtype: Disk
         """
@@ -174,8 +185,9 @@ class DiskController(object):
         disk.storagerouter = storagerouter
         disk.name = generic_disk_model.name
         DiskController._update_disk(disk, generic_disk_model)
+        to_save.append(disk)
         for partition in generic_disk_model.partitions:  # type: GenericPartition
-            cls._model_partition(partition, disk)
+            to_save.append(cls._model_partition(partition, disk))
         return disk
 
     @staticmethod
@@ -183,7 +195,7 @@ class DiskController(object):
         # type: (DiskPartition, GenericPartition) -> None
         """
         Updates a partition
-        Copies all properties from the generic modeled partition to the own model
+        Copies all properties from the generic modeled partition to the own model, without saving it
         :param modeled_partition: The modeled partition
         :type modeled_partition: DiskPartition
         :param generic_partition_model: The generic modeled partition (returned by Disktools)
@@ -194,14 +206,13 @@ class DiskController(object):
         for prop in ['filesystem', 'offset', 'state', 'aliases', 'mountpoint', 'size']:
             if hasattr(generic_partition_model, prop):
                 setattr(modeled_partition, prop, getattr(generic_partition_model, prop))
-        modeled_partition.save()
 
     @staticmethod
     def _update_disk(modeled_disk, generic_disk_model):
         # type: (Disk, GenericDisk) -> None
         """
         Updates a disk
-        Copies all properties from the generic modeled disk to the own model
+        Copies all properties from the generic modeled disk to the own model, without saving it
         :param modeled_disk: The modeled disk
         :type modeled_disk: Disk
         :param generic_disk_model: The generic modeled disk (returned by Disktools)
@@ -212,4 +223,3 @@ class DiskController(object):
         for prop in ['state', 'aliases', 'is_ssd', 'model', 'size', 'name', 'serial']:
             if hasattr(generic_disk_model, prop):
                 setattr(modeled_disk, prop, getattr(generic_disk_model, prop))
-        modeled_disk.save()
@@ -21,15 +21,18 @@ GenericTaskController module
 import os
 import copy
 import time
+import hashlib
 import logging
 from time import mktime
 from celery import group
 from celery.utils import uuid
 from celery.result import GroupResult
 from datetime import datetime, timedelta
+from Queue import Empty, Queue
 from threading import Thread
 from ovs_extensions.constants import is_unittest_mode
 from ovs_extensions.constants.config import ARAKOON_NAME, ARAKOON_NAME_UNITTEST
+from ovs.constants.packages import PACKAGE_FINGERPRINT_COMMAND, PACKAGE_FINGERPRINT_KEY, PACKAGE_REFRESH_CONFIG_KEY, PACKAGE_REFRESH_DEFAULTS
 from ovs.constants.vdisk import SCRUB_VDISK_EXCEPTION_MESSAGE
 from ovs.dal.hybrids.servicetype import ServiceType
 from ovs.dal.hybrids.storagedriver import StorageDriver
@@ -39,10 +42,13 @@ from ovs.dal.lists.storagedriverlist import StorageDriverList
 from ovs.dal.lists.storagerouterlist import StorageRouterList
 from ovs.dal.lists.vdisklist import VDiskList
 from ovs.extensions.db.arakooninstaller import ArakoonClusterConfig
+from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.sshclient import NotAuthenticatedException, SSHClient, UnableToConnectException
 from ovs_extensions.generic.toolbox import ExtensionsToolbox
 from ovs.extensions.packages.packagefactory import PackageFactory
+from ovs.extensions.storage.volatilefactory import VolatileFactory
 from ovs.lib.helpers.decorators import ovs_task
+from ovs.lib.helpers.generic.collapser import ArakoonCollapser
 from ovs.lib.helpers.generic.scrubber import Scrubber
 from ovs.lib.helpers.toolbox import Toolbox, Schedule
 from ovs.lib.vdisk import VDiskController
@@ -64,21 +70,21 @@ class GenericController(object):
         GenericController._logger.info('[SSA] started')
         success = []
         fail = []
-        for vdisk in VDiskList.get_vdisks():
-            if vdisk.is_vtemplate is True:
-                continue
-            try:
-                metadata = {'label': '',
-                            'is_consistent': False,
-                            'timestamp': str(int(time.time())),
-                            'is_automatic': True,
-                            'is_sticky': False}
-                VDiskController.create_snapshot(vdisk_guid=vdisk.guid,
-                                                metadata=metadata)
-                success.append(vdisk.guid)
-            except Exception:
-                GenericController._logger.exception('Error taking snapshot for vDisk {0}'.format(vdisk.guid))
-                fail.append(vdisk.guid)
+        metadata = {'label': '',
+                    'is_consistent': False,
+                    'timestamp': str(int(time.time())),
+                    'is_automatic': True,
+                    'is_sticky': False}
+        vdisk_guids = [vdisk.guid for vdisk in VDiskList.get_vdisks() if vdisk.is_vtemplate is not True]
+        # Snapshots are created concurrently for each StorageDriver
+        results = VDiskController.create_snapshots(vdisk_guids=vdisk_guids, metadata=metadata)
+        for vdisk_guid in vdisk_guids:
+            result = results[vdisk_guid]
+            if result[0] is True:
+                success.append(vdisk_guid)
+            else:
+                GenericController._logger.error('Error taking snapshot for vDisk {0}: {1}'.format(vdisk_guid, result[1]))
+                fail.append(vdisk_guid)
         GenericController._logger.info('[SSA] Snapshot has been taken for {0} vDisks, {1} failed.'.format(len(success), len(fail)))
         return success, fail
 
@@ -280,7 +286,8 @@ class GenericController(object):
     def collapse_arakoon():
         """
         Collapse Arakoon's Tlogs
-        :return: None
+        :return: The outcome of the collapse for every cluster on every node
+        :rtype: dict
         """
         GenericController._logger.info('Arakoon collapse started')
         cluster_info = []
@@ -299,13 +306,11 @@ class GenericController(object):
                 cluster_names.append(cluster)
                 cluster_info.append((cluster, service.storagerouter))
         workload = {}
-        cluster_config_map = {}
         for cluster, storagerouter in cluster_info:
             GenericController._logger.debug('  Collecting info for cluster {0}'.format(cluster))
             ip = storagerouter.ip if cluster in [ARAKOON_NAME, ARAKOON_NAME_UNITTEST] else None
             try:
                 config = ArakoonClusterConfig(cluster_id=cluster, source_ip=ip)
-                cluster_config_map[cluster] = config
             except:
                 GenericController._logger.exception('  Retrieving cluster information on {0} for {1} failed'.format(storagerouter.ip, cluster))
                 continue
@@ -313,23 +318,12 @@ class GenericController(object):
                 if node.ip not in workload:
                     workload[node.ip] = {'node_id': node.name,
                                          'clusters': []}
-                workload[node.ip]['clusters'].append((cluster, ip))
-        for storagerouter in storagerouters:
-            try:
-                if storagerouter.ip not in workload:
-                    continue
-                node_workload = workload[storagerouter.ip]
-                client = SSHClient(storagerouter)
-                for cluster, ip in node_workload['clusters']:
-                    try:
-                        GenericController._logger.debug('  Collapsing cluster {0} on {1}'.format(cluster, storagerouter.ip))
-                        client.run(['arakoon', '--collapse-local', node_workload['node_id'], '2', '-config', cluster_config_map[cluster].external_config_path])
-                        GenericController._logger.debug('  Collapsing cluster {0} on {1} completed'.format(cluster, storagerouter.ip))
-                    except:
-                        GenericController._logger.exception('  Collapsing cluster {0} on {1} failed'.format(cluster, storagerouter.ip))
-            except UnableToConnectException:
-                GenericController._logger.error('  Could not collapse any cluster on {0} (not reachable)'.format(storagerouter.name))
+                workload[node.ip]['clusters'].append((cluster, config.external_config_path, node.tlog_dir))
+        collapser = ArakoonCollapser(workload=[(storagerouter, workload[storagerouter.ip]['node_id'], workload[storagerouter.ip]['clusters'])
+                                              for storagerouter in storagerouters if storagerouter.ip in workload])
+        results = collapser.collapse()
         GenericController._logger.info('Arakoon collapse finished')
+        return results
 
     @staticmethod
     @ovs_task(name='ovs.generic.refresh_package_information', schedule=Schedule(minute='10', hour='*'), ensure_single_info={'mode': 'DEFAULT'})
@@ -357,26 +351,45 @@ class GenericController(object):
 
         # Retrieve for each StorageRouter in the cluster the installed and candidate versions of related packages
         # This also validates whether all required packages have been installed
-        GenericController._logger.debug('Retrieving package information for the cluster')
-        threads = []
+        # The package information is re-used for StorageRouters of which the package databases did not change since the last refresh
+        # Afterwards, retrieve the related downtime / service restart information
+        GenericController._logger.debug('Retrieving package and update information for the cluster')
+        refresh_config = copy.deepcopy(PACKAGE_REFRESH_DEFAULTS)
+        refresh_config.update(Configuration.get(PACKAGE_REFRESH_CONFIG_KEY, default={}))
         fetch_hooks = Toolbox.fetch_hooks(component='update', sub_component='get_package_update_info_cluster')
+        update_hooks = Toolbox.fetch_hooks(component='update', sub_component='get_update_info_cluster')
+        update_info_cluster = dict((storagerouter.ip, {}) for storagerouter in client_map)
+        node_queue = Queue()
         for storagerouter, client in client_map.iteritems():
-            for fct in fetch_hooks:
-                thread = Thread(target=fct, args=(client, package_info_cluster))
-                thread.start()
-                threads.append(thread)
+            node_queue.put((storagerouter, client))
+
+        def _refresh_nodes():
+            while True:
+                try:
+                    sr, sr_client = node_queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    GenericController._refresh_node_package_information(storagerouter=sr,
+                                                                        client=sr_client,
+                                                                        package_info=package_info_cluster,
+                                                                        update_info=update_info_cluster,
+                                                                        fetch_hooks=fetch_hooks,
+                                                                        update_hooks=update_hooks,
+                                                                        max_age=refresh_config['max_age'])
+                except Exception as ex:
+                    GenericController._logger.exception('StorageRouter {0}: Refreshing package information failed'.format(sr.ip))
+                    update_info_cluster[sr.ip].setdefault('errors', []).append(ex)
+
+        threads = []
+        for _ in xrange(min(len(client_map), refresh_config['workers'])):
+            thread = Thread(target=_refresh_nodes)
+            thread.start()
+            threads.append(thread)
 
         for thread in threads:
             thread.join()
 
-        # Retrieve the related downtime / service restart information
-        GenericController._logger.debug('Retrieving update information for the cluster')
-        update_info_cluster = {}
-        for storagerouter, client in client_map.iteritems():
-            update_info_cluster[storagerouter.ip] = {'errors': package_info_cluster[storagerouter.ip].get('errors', [])}
-            for fct in Toolbox.fetch_hooks(component='update', sub_component='get_update_info_cluster'):
-                fct(client, update_info_cluster, package_info_cluster[storagerouter.ip])
-
         # Retrieve the update information for plugins (eg: ALBA, iSCSI)
         GenericController._logger.debug('Retrieving package and update information for the plugins')
         threads = []
@@ -414,8 +427,9 @@ class GenericController(object):
                     update_info.pop(component)
 
             # Store the update information
-            storagerouter.package_information = update_info
-            storagerouter.save()
+            if storagerouter.package_information != update_info:
+                storagerouter.package_information = update_info
+                storagerouter.save()
 
         # Collect errors for plugins
         for ip, plugin_errors in update_info_plugin.iteritems():
@@ -426,6 +440,55 @@ class GenericController(object):
             raise Exception('\n - {0}'.format('\n - '.join(errors)))
         GenericController._logger.info('Finished updating package information')
 
+    @staticmethod
+    def _refresh_node_package_information(storagerouter, client, package_info, update_info, fetch_hooks, update_hooks, max_age):
+        """
+        Retrieve the package and update information of a single StorageRouter
+        The package information is only retrieved through the hooks when the package state of the StorageRouter changed since the last refresh
+        :param storagerouter: StorageRouter to refresh
+        :type storagerouter: ovs.dal.hybrids.storagerouter.StorageRouter
+        :param client: Root client on the StorageRouter
+        :type client: SSHClient
+        :param package_info: Package information of the cluster, the information of this StorageRouter will be added
+        :type package_info: dict
+        :param update_info: Update information of the cluster, the information of this StorageRouter will be added
+        :type update_info: dict
+        :param fetch_hooks: Hooks retrieving the package information
+        :type fetch_hooks: list
+        :param update_hooks: Hooks retrieving the update information
+        :type update_hooks: list
+        :param max_age: Amount of seconds the package information of an unchanged StorageRouter can be re-used
+        :type max_age: int
+        :return: None
+        :rtype: NoneType
+        """
+        def _get_fingerprint():
+            try:
+                return hashlib.sha1(client.run(PACKAGE_FINGERPRINT_COMMAND, allow_insecure=True)).hexdigest()
+            except Exception:
+                GenericController._logger.warning('StorageRouter {0}: Could not fingerprint the package state'.format(storagerouter.ip))
+                return None
+
+        volatile = VolatileFactory.get_client()
+        fingerprint_key = PACKAGE_FINGERPRINT_KEY.format(storagerouter.guid)
+        fingerprint = _get_fingerprint()
+        cached = volatile.get(fingerprint_key)
+        if fingerprint is not None and cached is not None and cached['fingerprint'] == fingerprint:
+            GenericController._logger.debug('StorageRouter {0}: Package state unchanged, re-using the package information'.format(storagerouter.ip))
+            package_info[storagerouter.ip].update(copy.deepcopy(cached['package_info']))
+        else:
+            for fct in fetch_hooks:
+                fct(client, package_info)
+            if fingerprint is not None and len(package_info[storagerouter.ip].get('errors', [])) == 0:
+                fingerprint = _get_fingerprint()  # The hooks could have refreshed the repository information themselves
+            if fingerprint is not None and len(package_info[storagerouter.ip].get('errors', [])) == 0:
+                volatile.set(fingerprint_key, {'fingerprint': fingerprint,
+                                               'package_info': copy.deepcopy(package_info[storagerouter.ip])}, max_age)
+
+        update_info[storagerouter.ip]['errors'] = package_info[storagerouter.ip].get('errors', [])
+        for fct in update_hooks:
+            fct(client, update_info, package_info[storagerouter.ip])
+
     @staticmethod
     @ovs_task(name='ovs.generic.run_backend_domain_hooks')
     def run_backend_domain_hooks(backend_guid):
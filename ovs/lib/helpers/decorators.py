@@ -28,6 +28,7 @@ import logging
 import threading
 from functools import wraps
 from contextlib import contextmanager
+from ovs.constants.celery import TASK_PRIORITIES, TASK_PRIORITY_MAINTENANCE, TASK_PRIORITY_ROUTING_KEY
 from ovs.dal.lists.storagedriverlist import StorageDriverList
 from ovs_extensions.constants import is_unittest_mode
 from ovs.extensions.generic.volatilemutex import volatile_mutex
@@ -98,12 +99,16 @@ def log(event_type):
     return wrap
 
 
-def ovs_task(name, schedule=None, ensure_single_info=None):
+def ovs_task(name, schedule=None, ensure_single_info=None, priority=None):
     """
     Decorator to execute celery tasks in OVS
     These tasks can be wrapped additionally in the ensure single decorator
     :param name: Name of the task
     :type name: str
+    :param priority: Optional: priority class of the task (interactive, event or maintenance). Tasks of a priority class
+    are routed to the queue of that class, unless a routing key is explicitly passed when the task is scheduled.
+    Scheduled tasks default to the maintenance class, other tasks without class are routed to the generic queue
+    :type priority: str
     :param schedule: Optional: task schedule to use.
     Discovering the scheduled tasks by the celery_beat is done using reflection.
     The schedule passed in this decorator is passed on to celery which will make it part of the tasks attributes
@@ -141,6 +146,10 @@ def ovs_task(name, schedule=None, ensure_single_info=None):
     """
     if ensure_single_info is None:
         ensure_single_info = {}
+    if priority is None and schedule is not None:
+        priority = TASK_PRIORITY_MAINTENANCE
+    if priority is not None and priority not in TASK_PRIORITIES:
+        raise ValueError('Unsupported priority "{0}" provided'.format(priority))
 
     def wrapper(f):
         """
@@ -160,7 +169,10 @@ def ovs_task(name, schedule=None, ensure_single_info=None):
                 f = ensure_single_chained(ensure_single_container)(f)
             else:
                 raise ValueError('Unsupported mode "{0}" provided'.format(ensure_single_container.mode))
-        return celery.task(name=name, schedule=schedule, bind=bind)(f)
+        task_kwargs = {'name': name, 'schedule': schedule, 'bind': bind}
+        if priority is not None:
+            task_kwargs['routing_key'] = TASK_PRIORITY_ROUTING_KEY.format(priority)
+        return celery.task(**task_kwargs)(f)
     return wrapper
 
 
@@ -0,0 +1,200 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Arakoon collapse Module
+"""
+import time
+import logging
+from Queue import Empty, Queue
+from threading import Lock, Thread
+from ovs.constants.arakoon import COLLAPSE_CONFIG_KEY, COLLAPSE_DEFAULTS, COLLAPSE_STATISTICS_KEY, COLLAPSE_TLOGS_TO_KEEP
+from ovs.extensions.generic.configuration import Configuration
+from ovs.extensions.generic.sshclient import SSHClient, UnableToConnectException
+from ovs.extensions.storage.volatilefactory import VolatileFactory
+
+
+class ArakoonCollapser(object):
+    """
+    Collapses the Tlogs of Arakoon clusters
+    All nodes are handled in parallel (limited by 'parallel_nodes'), while the amount of clusters being collapsed at the same time on a single node is limited by 'node_concurrency'
+    Clusters which do not have enough Tlogs on a node to be worth a collapse are skipped
+    """
+    _logger = logging.getLogger(__name__)
+
+    STATUS_COLLAPSED = 'collapsed'
+    STATUS_FAILED = 'failed'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_UNREACHABLE = 'unreachable'
+
+    def __init__(self, workload):
+        """
+        :param workload: The clusters to collapse for each StorageRouter
+                         Format: [(storagerouter, node_id, [(cluster_name, external_config_path, tlog_dir), ...]), ...]
+        :type workload: list
+        """
+        self.workload = workload
+        self.results = {}
+        self._results_lock = Lock()
+
+        config = COLLAPSE_DEFAULTS.copy()
+        config.update(Configuration.get(COLLAPSE_CONFIG_KEY, default={}))
+        self.parallel_nodes = int(config['parallel_nodes'])
+        self.node_concurrency = max(1, int(config['node_concurrency']))
+        self.tlog_threshold = int(config['tlog_threshold'])
+
+    def collapse(self):
+        """
+        Collapse all clusters in the workload
+        :return: The outcome for every cluster on every node. Format: {cluster_name: {ip: {'status': str, 'duration': float, 'tlogs': int}}}
+        :rtype: dict
+        """
+        node_queue = Queue()
+        for node_workload in self.workload:
+            node_queue.put(node_workload)
+        amount_threads = len(self.workload)
+        if self.parallel_nodes > 0:
+            amount_threads = min(amount_threads, self.parallel_nodes)
+
+        threads = []
+        for index in xrange(amount_threads):
+            thread = Thread(name='collapse_arakoon_{0}'.format(index),
+                            target=self._process_nodes,
+                            args=(node_queue,))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        self._save_statistics()
+        return self.results
+
+    def _process_nodes(self, node_queue):
+        """
+        Processes StorageRouters until the queue is empty
+        :param node_queue: Queue with the workload of every StorageRouter
+        :type node_queue: Queue
+        :return: None
+        """
+        while True:
+            try:
+                storagerouter, node_id, clusters = node_queue.get_nowait()
+            except Empty:
+                return
+            try:
+                client = SSHClient.get_pooled(storagerouter)
+            except UnableToConnectException:
+                self._logger.error('  Could not collapse any cluster on {0} (not reachable)'.format(storagerouter.name))
+                for cluster_name, _, _ in clusters:
+                    self._register(cluster_name, storagerouter.ip, self.STATUS_UNREACHABLE)
+                continue
+            except Exception:
+                self._logger.exception('  Could not collapse any cluster on {0}'.format(storagerouter.name))
+                for cluster_name, _, _ in clusters:
+                    self._register(cluster_name, storagerouter.ip, self.STATUS_FAILED)
+                continue
+
+            cluster_queue = Queue()
+            for cluster_info in clusters:
+                cluster_queue.put(cluster_info)
+            threads = []
+            for index in xrange(min(self.node_concurrency, len(clusters))):
+                thread = Thread(name='collapse_arakoon_{0}_{1}'.format(storagerouter.ip, index),
+                                target=self._process_clusters,
+                                args=(storagerouter, node_id, cluster_queue, client if index == 0 else None))
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+
+    def _process_clusters(self, storagerouter, node_id, cluster_queue, client=None):
+        """
+        Collapses clusters on a single StorageRouter until the queue is empty
+        :param storagerouter: StorageRouter to collapse on
+        :type storagerouter: ovs.dal.hybrids.storagerouter.StorageRouter
+        :param node_id: Name of the Arakoon node on the StorageRouter
+        :type node_id: str
+        :param cluster_queue: Queue with the clusters to collapse
+        :type cluster_queue: Queue
+        :param client: SSHClient to use. Retrieved from the pool of this process when not passed
+        :type client: SSHClient
+        :return: None
+        """
+        if client is None:
+            try:
+                client = SSHClient.get_pooled(storagerouter)
+            except Exception:
+                self._logger.exception('  Could not connect to {0} for collapsing'.format(storagerouter.name))
+                return  # Remaining clusters are picked up by the other threads of this node
+        while True:
+            try:
+                cluster_name, config_path, tlog_dir = cluster_queue.get_nowait()
+            except Empty:
+                return
+            tlogs = self._count_tlogs(client, tlog_dir)
+            if tlogs is not None and tlogs < self.tlog_threshold:
+                self._logger.debug('  Skipping cluster {0} on {1}, only {2} Tlogs present'.format(cluster_name, storagerouter.ip, tlogs))
+                self._register(cluster_name, storagerouter.ip, self.STATUS_SKIPPED, tlogs=tlogs)
+                continue
+            start = time.time()
+            try:
+                self._logger.debug('  Collapsing cluster {0} on {1}'.format(cluster_name, storagerouter.ip))
+                client.run(['arakoon', '--collapse-local', node_id, str(COLLAPSE_TLOGS_TO_KEEP), '-config', config_path])
+                self._logger.debug('  Collapsing cluster {0} on {1} completed'.format(cluster_name, storagerouter.ip))
+                status = self.STATUS_COLLAPSED
+            except Exception:
+                self._logger.exception('  Collapsing cluster {0} on {1} failed'.format(cluster_name, storagerouter.ip))
+                status = self.STATUS_FAILED
+            self._register(cluster_name, storagerouter.ip, status, duration=time.time() - start, tlogs=tlogs)
+
+    def _count_tlogs(self, client, tlog_dir):
+        """
+        Count the Tlogs (current, compressed and archived) of a cluster on a node
+        :param client: Client on the node
+        :type client: SSHClient
+        :param tlog_dir: Directory containing the Tlogs
+        :type tlog_dir: str
+        :return: The amount of Tlogs or None when it could not be determined
+        :rtype: int
+        """
+        if self.tlog_threshold <= 0 or tlog_dir is None:
+            return None
+        try:
+            output = client.run(['find', tlog_dir, '-maxdepth', '1', '-type', 'f', '-name', '*.tl*'])
+            return len([line for line in (output or '').splitlines() if line.strip()])
+        except Exception:
+            # Never skip a collapse because the Tlogs could not be counted
+            self._logger.warning('  Could not count the Tlogs in {0} on {1}'.format(tlog_dir, client.ip))
+            return None
+
+    def _register(self, cluster_name, ip, status, duration=None, tlogs=None):
+        """
+        Register the outcome of a collapse
+        """
+        with self._results_lock:
+            self.results.setdefault(cluster_name, {})[ip] = {'status': status,
+                                                             'duration': duration,
+                                                             'tlogs': tlogs}
+
+    def _save_statistics(self):
+        """
+        Keeps the outcome of the last run in the volatile store, to be picked up by the StatsMonkey
+        """
+        try:
+            VolatileFactory.get_client().set(COLLAPSE_STATISTICS_KEY, {'time': time.time(),
+                                                                       'results': self.results})
+        except Exception:
+            self._logger.exception('  Could not save the Arakoon collapse statistics')
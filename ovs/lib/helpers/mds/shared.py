@@ -20,6 +20,7 @@ Shared module. Contains mds-related methods
 
 import logging
 import collections
+from ovs.dal.dataobject import DataObject
 from ovs.dal.hybrids.diskpartition import DiskPartition
 from ovs.dal.hybrids.j_mdsservice import MDSService
 from ovs.dal.hybrids.j_mdsservicevdisk import MDSServiceVDisk
@@ -89,6 +90,8 @@ class MDSShared(object):
             sd_mds_config[ip].append(port)
 
         # Verify the model junction services (Relations between the MDS Services and the vDisks)
+        # Updated and new junction services are saved together at the end
+        junctions_to_save = []
         for junction in list(vdisk.mds_services):
             model_ip = junction.mds_service.service.storagerouter.ip
             model_port = junction.mds_service.service.ports[0]
@@ -107,7 +110,7 @@ class MDSShared(object):
                 continue
 
             junction.is_master = model_ip == sd_master_ip and model_port == sd_master_port
-            junction.save()
+            junctions_to_save.append(junction)
             if model_ip not in model_mds_config:
                 model_mds_config[model_ip] = []
             model_mds_config[model_ip].append(model_port)
@@ -132,8 +135,9 @@ class MDSShared(object):
                         mds_service_vdisk.vdisk = vdisk
                         mds_service_vdisk.mds_service = service.mds_service
                         mds_service_vdisk.is_master = sd_master_ip == service.storagerouter.ip and sd_master_port == service.ports[0]
-                        mds_service_vdisk.save()
+                        junctions_to_save.append(mds_service_vdisk)
                         cls._logger.debug('vDisk {0} - {1}: Modeled junction service {2}:{3}'.format(vdisk.guid, vdisk.name, ip, port))
+        DataObject.save_many(junctions_to_save)
         cls._logger.info('vDisk {0} - {1}: Synced to reality'.format(vdisk.guid, vdisk.name))
 
     @classmethod
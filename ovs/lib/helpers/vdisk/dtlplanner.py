@@ -0,0 +1,138 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Determines the possible DTL targets of vDisks
+"""
+
+import random
+from ovs.dal.lists.storagedriverlist import StorageDriverList
+from ovs.dal.lists.storagerouterlist import StorageRouterList
+
+# noinspection PyUnreachableCode
+if False:
+    from typing import List, Optional
+    from ovs.dal.hybrids.storagedriver import StorageDriver
+    from ovs.dal.hybrids.storagerouter import StorageRouter
+
+
+class DTLTopology(object):
+    """
+    Snapshot of the StorageRouters, their Domains and the vPools extended to them
+    The model is walked once when building the snapshot, after which the DTL targets of any amount of vDisks can be determined without touching it again
+    """
+    def __init__(self):
+        storagerouters = {}
+        domain_members = {}  # Domain guid: guids of the StorageRouters using the Domain as regular Domain
+        recovery_domains = {}
+        regular_domains = {}
+        for storagerouter in StorageRouterList.get_storagerouters():
+            storagerouters[storagerouter.guid] = storagerouter
+            recovery_domains[storagerouter.guid] = set()
+            regular_domains[storagerouter.guid] = set()
+            for junction in storagerouter.domains:
+                if junction.backup is True:
+                    recovery_domains[storagerouter.guid].add(junction.domain_guid)
+                else:
+                    regular_domains[storagerouter.guid].add(junction.domain_guid)
+                    domain_members.setdefault(junction.domain_guid, set()).add(storagerouter.guid)
+
+        vpool_members = {}  # vPool guid: guids of the StorageRouters the vPool has been extended to
+        storagedrivers = {}
+        storagedrivers_by_ip = {}
+        for storagedriver in StorageDriverList.get_storagedrivers():
+            vpool_members.setdefault(storagedriver.vpool_guid, set()).add(storagedriver.storagerouter_guid)
+            storagedrivers.setdefault((storagedriver.vpool_guid, storagedriver.storagerouter_guid), storagedriver)
+            storagedrivers_by_ip.setdefault((storagedriver.vpool_guid, storagedriver.storage_ip), storagedriver)
+
+        self._storagerouters = storagerouters
+        self._storagedrivers = storagedrivers
+        self._storagedrivers_by_ip = storagedrivers_by_ip
+        self._domain_members = dict((guid, frozenset(members)) for guid, members in domain_members.iteritems())
+        self._vpool_members = dict((guid, frozenset(members)) for guid, members in vpool_members.iteritems())
+        self._recovery_domains = dict((guid, frozenset(domains)) for guid, domains in recovery_domains.iteritems())
+        self._regular_domains = dict((guid, frozenset(domains)) for guid, domains in regular_domains.iteritems())
+
+    def get_storagedriver(self, vpool_guid, storagerouter_guid):
+        # type: (str, str) -> Optional[StorageDriver]
+        """
+        Retrieve the StorageDriver of a vPool on a StorageRouter
+        :param vpool_guid: Guid of the vPool
+        :type vpool_guid: str
+        :param storagerouter_guid: Guid of the StorageRouter
+        :type storagerouter_guid: str
+        :return: The StorageDriver or None if the vPool has not been extended to the StorageRouter
+        :rtype: ovs.dal.hybrids.storagedriver.StorageDriver
+        """
+        return self._storagedrivers.get((vpool_guid, storagerouter_guid))
+
+    def get_storagedriver_by_ip(self, vpool_guid, storage_ip):
+        # type: (str, str) -> Optional[StorageDriver]
+        """
+        Retrieve the StorageDriver of a vPool listening on a storage IP
+        :param vpool_guid: Guid of the vPool
+        :type vpool_guid: str
+        :param storage_ip: Storage IP of the StorageDriver
+        :type storage_ip: str
+        :return: The StorageDriver or None if no StorageDriver of the vPool uses the IP
+        :rtype: ovs.dal.hybrids.storagedriver.StorageDriver
+        """
+        return self._storagedrivers_by_ip.get((vpool_guid, storage_ip))
+
+    def get_possible_targets(self, storagerouter_guid, vpool_guid, domain_guids=None):
+        # type: (str, str, Optional[List[str]]) -> List[List[StorageRouter]]
+        """
+        Retrieve all the StorageRouters which could serve as a possible DTL target location for a vDisk
+        A list of lists is returned, with the order of lists as following:
+            * 1st list: StorageRouters which have a Regular Domain identical to the Recovery Domain of the hosting StorageRouter of the vDisk
+            * 2nd list: StorageRouters which have a Regular Domain identical to the Regular Domain of the hosting StorageRouter of the vDisk
+            * 3rd list: StorageRouters on which the vPool of the vDisk has been extended to, except for the hosting StorageRouter
+        :param storagerouter_guid: Guid of the StorageRouter hosting the vDisk
+        :type storagerouter_guid: str
+        :param vpool_guid: Guid of the vPool of the vDisk
+        :type vpool_guid: str
+        :param domain_guids: Guids of the Domains the DTL has been restricted to
+        :type domain_guids: list
+        :return: The possible targets, in random order for every priority
+        :rtype: list[list[ovs.dal.hybrids.storagerouter.StorageRouter]]
+        """
+        other_storagerouters = self._vpool_members.get(vpool_guid, frozenset()).difference([storagerouter_guid])
+        primary = self._get_domain_members(self._recovery_domains.get(storagerouter_guid, []))
+        secondary = self._get_domain_members(self._regular_domains.get(storagerouter_guid, []))
+        primary = primary.intersection(other_storagerouters)
+        secondary = secondary.difference(primary).intersection(other_storagerouters)
+
+        if domain_guids:
+            manual_storagerouters = self._get_domain_members(domain_guids)
+            primary = primary.intersection(manual_storagerouters)
+            secondary = secondary.intersection(manual_storagerouters)
+            other_storagerouters = other_storagerouters.intersection(manual_storagerouters)
+
+        importances = []
+        for guids in [primary, secondary, other_storagerouters]:
+            storagerouters = [self._storagerouters[guid] for guid in guids if guid in self._storagerouters]
+            random.shuffle(storagerouters)
+            importances.append(storagerouters)
+        return importances
+
+    def _get_domain_members(self, domain_guids):
+        """
+        Retrieve the guids of the StorageRouters using any of the given Domains as regular Domain
+        """
+        members = set()
+        for domain_guid in domain_guids:
+            members.update(self._domain_members.get(domain_guid, []))
+        return members
@@ -0,0 +1,120 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Executes vDisk actions concurrently, grouped by the StorageDriver owning the vDisks
+"""
+
+import time
+import logging
+from Queue import Empty, Queue
+from threading import Lock, Thread
+
+# noinspection PyUnreachableCode
+if False:
+    from typing import Callable, Dict, List
+    from ovs.dal.hybrids.vdisk import VDisk
+
+
+class VDiskExecutor(object):
+    """
+    Executes a function for a set of vDisks
+    The vDisks are grouped by the StorageDriver owning them. All StorageDrivers are handled at the same time,
+    while the amount of concurrent calls towards a single StorageDriver is limited by 'node_concurrency'
+    """
+    _logger = logging.getLogger(__name__)
+
+    def __init__(self, name, node_concurrency):
+        # type: (str, int) -> None
+        """
+        :param name: Name of the action being executed, used for logging and naming the threads
+        :type name: str
+        :param node_concurrency: Maximum amount of calls being executed at the same time for a single StorageDriver
+        :type node_concurrency: int
+        """
+        self.name = name
+        self.node_concurrency = max(1, int(node_concurrency))
+        self.results = {}
+        self.durations = {}
+        self._storagedriver_ids = {}
+        self._lock = Lock()
+
+    def execute(self, vdisks, function):
+        # type: (List[VDisk], Callable) -> Dict[str, any]
+        """
+        Execute the function for every vDisk
+        :param vdisks: vDisks to execute the function for
+        :type vdisks: list[ovs.dal.hybrids.vdisk.VDisk]
+        :param function: Function to execute, called with the vDisk as only argument
+        :type function: callable
+        :return: The return value of the function for every vDisk guid. The raised exception is returned when the function failed
+        :rtype: dict
+        """
+        queues = {}
+        for vdisk in vdisks:
+            self._storagedriver_ids[vdisk.guid] = vdisk.storagedriver_id
+            if vdisk.storagedriver_id not in queues:
+                queues[vdisk.storagedriver_id] = Queue()
+            queues[vdisk.storagedriver_id].put(vdisk)
+
+        threads = []
+        for storagedriver_id, queue in queues.iteritems():
+            for index in xrange(min(self.node_concurrency, queue.qsize())):
+                thread = Thread(name='{0}_{1}_{2}'.format(self.name, storagedriver_id, index),
+                                target=self._process,
+                                args=(queue, function))
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return self.results
+
+    def _process(self, queue, function):
+        # type: (Queue, Callable) -> None
+        """
+        Executes the function for the vDisks of a single StorageDriver until the queue is empty
+        """
+        while True:
+            try:
+                vdisk = queue.get_nowait()
+            except Empty:
+                return
+            start = time.time()
+            try:
+                result = function(vdisk)
+            except Exception as ex:
+                self._logger.exception('{0} for vDisk {1} failed'.format(self.name, vdisk.guid))
+                result = ex
+            with self._lock:
+                self.durations[vdisk.guid] = time.time() - start
+                self.results[vdisk.guid] = result
+
+    def log_summary(self, logger=None):
+        # type: (logging.Logger) -> None
+        """
+        Logs the amount of vDisks handled and the average and maximum duration for each StorageDriver
+        :param logger: Logger to log the summary with. Defaults to the logger of this module
+        :type logger: logging.Logger
+        :return: None
+        :rtype: NoneType
+        """
+        logger = logger or self._logger
+        durations = {}
+        for vdisk_guid, duration in self.durations.iteritems():
+            durations.setdefault(self._storagedriver_ids[vdisk_guid], []).append(duration)
+        for storagedriver_id, node_durations in sorted(durations.iteritems()):
+            logger.info('{0} on StorageDriver {1}: {2} vDisks, average {3:.3f}s, maximum {4:.3f}s'.format(self.name, storagedriver_id, len(node_durations),
+                                                                                                       sum(node_durations) / len(node_durations), max(node_durations)))
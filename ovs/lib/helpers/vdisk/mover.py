@@ -0,0 +1,229 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Moves vDisks concurrently, throttled per source and per target StorageDriver
+"""
+
+import time
+import logging
+from threading import Condition, Thread
+from ovs.constants.vdisk import MOVE_CONFIG_KEY, MOVE_DEFAULTS
+from ovs.extensions.generic.configuration import Configuration
+
+# noinspection PyUnreachableCode
+if False:
+    from typing import Callable, Dict, List, Optional, Tuple
+    from ovs.dal.hybrids.storagedriver import StorageDriver
+    from ovs.dal.hybrids.vdisk import VDisk
+
+
+class VDiskMover(object):
+    """
+    Executes a plan of vDisk moves
+    Moves are started in order of the plan, as soon as both the source and the target StorageDriver have a free slot
+    """
+    _logger = logging.getLogger(__name__)
+
+    ORDER_SIZE = 'size'
+    ORDER_IO = 'io'
+    ORDERS = [ORDER_SIZE, ORDER_IO]
+
+    STATUS_PENDING = 'pending'
+    STATUS_MOVING = 'moving'
+    STATUS_MOVED = 'moved'
+    STATUS_FAILED = 'failed'
+
+    PROGRESS_INTERVAL = 2  # Minimum amount of seconds between two progress reports
+
+    def __init__(self, order_by=-1, progress_callback=None):
+        # type: (Optional[str], Optional[Callable]) -> None
+        """
+        :param order_by: Order the moves by vDisk size or by recent I/O (largest first). Keeps the order of the plan when None. Defaults to the configured order
+        :type order_by: str
+        :param progress_callback: Called with the progress (see VDiskMover.progress) while moving and once all moves finished
+        :type progress_callback: callable
+        """
+        config = MOVE_DEFAULTS.copy()
+        config.update(Configuration.get(MOVE_CONFIG_KEY, default={}))
+        if order_by == -1:
+            order_by = config['order_by']
+        if order_by is not None and order_by not in VDiskMover.ORDERS:
+            raise ValueError('Moves can only be ordered by: {0}'.format(', '.join(VDiskMover.ORDERS)))
+        self.source_concurrency = max(1, int(config['source_concurrency']))
+        self.target_concurrency = max(1, int(config['target_concurrency']))
+        self.concurrency = max(1, int(config['concurrency']))
+        self.order_by = order_by
+        self.progress_callback = progress_callback
+
+        self._start = None
+        self._last_report = 0
+        self._pending = []
+        self._volumes = {}
+        self._running_sources = {}
+        self._running_targets = {}
+        self._condition = Condition()
+
+    def execute(self, moves, function):
+        # type: (List[Tuple[VDisk, StorageDriver]], Callable) -> Dict[str, any]
+        """
+        Execute all moves
+        :param moves: The moves to execute, as a list of tuples with the vDisk and the StorageDriver to move it to
+        :type moves: list[tuple]
+        :param function: Function which executes a single move, called with the vDisk and the target StorageDriver
+        :type function: callable
+        :return: The progress after all moves were executed
+        :rtype: dict
+        """
+        self._start = time.time()
+        self._pending = []
+        for vdisk, storagedriver in self._order(moves):
+            if vdisk.guid in self._volumes:
+                continue  # A vDisk can only be moved once
+            self._pending.append((vdisk, storagedriver))
+            self._volumes[vdisk.guid] = {'name': vdisk.name,
+                                         'size': vdisk.size,
+                                         'source': vdisk.storagedriver_id,
+                                         'target': storagedriver.storagedriver_id,
+                                         'status': VDiskMover.STATUS_PENDING,
+                                         'duration': None,
+                                         'throughput': None,  # Bytes per second
+                                         'error': None}
+        threads = []
+        for index in xrange(min(self.concurrency, len(self._pending))):
+            thread = Thread(name='vdisk_move_{0}'.format(index), target=self._process, args=(function,))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        self._report_progress(force=True)
+        return self.progress
+
+    @property
+    def progress(self):
+        # type: () -> Dict[str, any]
+        """
+        Overview of the moves
+        :return: Amount of moves per status, the overall throughput and the information of every vDisk
+        :rtype: dict
+        """
+        with self._condition:
+            volumes = dict((vdisk_guid, info.copy()) for vdisk_guid, info in self._volumes.iteritems())
+        counts = dict((status, 0) for status in [VDiskMover.STATUS_PENDING, VDiskMover.STATUS_MOVING, VDiskMover.STATUS_MOVED, VDiskMover.STATUS_FAILED])
+        moved_size = 0
+        for info in volumes.itervalues():
+            counts[info['status']] += 1
+            if info['status'] == VDiskMover.STATUS_MOVED:
+                moved_size += info['size'] or 0
+        elapsed = time.time() - self._start if self._start is not None else 0
+        return {'total': len(volumes),
+                'counts': counts,
+                'elapsed': elapsed,
+                'throughput': {'volumes_per_minute': counts[VDiskMover.STATUS_MOVED] * 60.0 / elapsed if elapsed > 0 else 0.0,
+                               'bytes_per_second': moved_size / elapsed if elapsed > 0 else 0.0},
+                'volumes': volumes}
+
+    def _order(self, moves):
+        # type: (List[Tuple[VDisk, StorageDriver]]) -> List[Tuple[VDisk, StorageDriver]]
+        """
+        Orders the moves so the largest or busiest vDisks go first
+        """
+        if self.order_by == VDiskMover.ORDER_SIZE:
+            return sorted(moves, key=lambda move: move[0].size, reverse=True)
+        if self.order_by == VDiskMover.ORDER_IO:
+            io = {}
+            for vdisk, _ in moves:
+                try:
+                    io[vdisk.guid] = vdisk.statistics.get('data_transferred_ps', 0)
+                except Exception:
+                    self._logger.warning('Could not retrieve the statistics of vDisk {0}'.format(vdisk.name))
+                    io[vdisk.guid] = 0
+            return sorted(moves, key=lambda move: io[move[0].guid], reverse=True)
+        return list(moves)
+
+    def _claim(self):
+        # type: () -> Optional[Tuple[VDisk, StorageDriver]]
+        """
+        Claims the first pending move for which both the source and the target have a free slot. Waits until one is available
+        :return: The claimed move or None when all moves have been claimed
+        """
+        with self._condition:
+            while True:
+                if len(self._pending) == 0:
+                    return None
+                for move in self._pending:
+                    source = self._volumes[move[0].guid]['source']
+                    target = self._volumes[move[0].guid]['target']
+                    if self._running_sources.get(source, 0) < self.source_concurrency and self._running_targets.get(target, 0) < self.target_concurrency:
+                        self._pending.remove(move)
+                        self._running_sources[source] = self._running_sources.get(source, 0) + 1
+                        self._running_targets[target] = self._running_targets.get(target, 0) + 1
+                        self._volumes[move[0].guid]['status'] = VDiskMover.STATUS_MOVING
+                        return move
+                self._condition.wait()
+
+    def _release(self, move, duration, error):
+        # type: (Tuple[VDisk, StorageDriver], float, Optional[str]) -> None
+        """
+        Registers the outcome of a move and frees the slots of its source and target
+        """
+        with self._condition:
+            info = self._volumes[move[0].guid]
+            info['status'] = VDiskMover.STATUS_MOVED if error is None else VDiskMover.STATUS_FAILED
+            info['duration'] = duration
+            if error is None and duration > 0:
+                info['throughput'] = (info['size'] or 0) / duration
+            info['error'] = error
+            self._running_sources[info['source']] -= 1
+            self._running_targets[info['target']] -= 1
+            self._condition.notify_all()
+
+    def _process(self, function):
+        # type: (Callable) -> None
+        """
+        Executes moves until all of them have been claimed
+        """
+        while True:
+            move = self._claim()
+            if move is None:
+                return
+            vdisk, storagedriver = move
+            error = None
+            start = time.time()
+            try:
+                function(vdisk, storagedriver)
+            except Exception as ex:
+                self._logger.exception('Moving vDisk {0} to StorageDriver {1} failed'.format(vdisk.name, storagedriver.storagedriver_id))
+                error = str(ex)
+            self._release(move, time.time() - start, error)
+            self._report_progress()
+
+    def _report_progress(self, force=False):
+        # type: (Optional[bool]) -> None
+        """
+        Passes the current progress to the progress callback, at most once every PROGRESS_INTERVAL seconds unless forced
+        """
+        if self.progress_callback is None:
+            return
+        with self._condition:
+            now = time.time()
+            if force is False and now - self._last_report < VDiskMover.PROGRESS_INTERVAL:
+                return
+            self._last_report = now
+        try:
+            self.progress_callback(self.progress)
+        except Exception:
+            self._logger.exception('Reporting the progress of the vDisk moves failed')
@@ -29,6 +29,7 @@ from ovs.dal.hybrids.storagerouter import StorageRouter
 from ovs.dal.hybrids.vpool import VPool
 from ovs.dal.hybrids.storagedriver import StorageDriver
 from ovs.dal.hybrids.vdisk import VDisk
+from ovs.lib.helpers.vdisk.mover import VDiskMover
 from ovs_extensions.log.logger import Logger
 
 # noinspection PyUnreachableCode
@@ -529,6 +530,44 @@ class VDiskBalance(object):
 
         return successful_moves, failed_moves
 
+    @classmethod
+    def execute_balance_changes_through_overflow(cls, balances, sources=None, force=False):
+        # type: (List[VDiskBalance], Optional[List[VDiskBalance]], bool) -> Tuple[List[str], List[str]]
+        """
+        Execute the necessary steps to balance out for multiple balances at once. All overflows are moved away concurrently (see VDiskMover)
+        :param balances: All balances of the VPool. Used to find the owner of the overflows
+        :type balances: List[VDiskBalance]
+        :param sources: Balances to move the overflow away from. Defaults to all balances
+        :type sources: List[VDiskBalance]
+        :param force: Indicates whether to force the migration or not (forcing can lead to data loss)
+        :type force: bool
+        :return: List with all successful moves, list with all failed moves
+        :rtype: Tuple[List[str], List[str]]
+        """
+        if sources is None:
+            sources = balances
+        vdisk_balance_map = cls.map_vdisk_to_destination(balances)
+        moves = []
+        for source in sources:
+            for vdisk_guid in source.overflow:
+                try:
+                    moves.append((VDisk(vdisk_guid), vdisk_balance_map[vdisk_guid].storagedriver))
+                except ObjectNotFoundException:
+                    cls.logger.warning('VDisk {0} no longer exists, not moving it'.format(vdisk_guid))
+
+        def _move_vdisk(vdisk, storagedriver):
+            vdisk_balance_map[vdisk.guid]._execute_move(vdisk.guid, storagedriver, force, False)
+
+        progress = VDiskMover().execute(moves, _move_vdisk)
+        successful_moves = []
+        failed_moves = []
+        for vdisk, _ in moves:
+            if progress['volumes'][vdisk.guid]['status'] == VDiskMover.STATUS_MOVED:
+                successful_moves.append(vdisk.guid)
+            else:
+                failed_moves.append(vdisk.guid)
+        return successful_moves, failed_moves
+
     def _execute_move(self, vdisk_guid, destination_std, force, interactive, minimum_potential=1):
         """
         Perform a move
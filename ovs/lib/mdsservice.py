@@ -27,6 +27,7 @@ import datetime
 import collections
 import logging
 from threading import Thread
+from ovs.constants.celery import TASK_PRIORITY_EVENT
 from ovs.dal.hybrids.diskpartition import DiskPartition
 from ovs.dal.hybrids.storagerouter import StorageRouter
 from ovs.dal.hybrids.j_storagedriverpartition import StorageDriverPartition
@@ -168,7 +169,7 @@ class MDSServiceController(MDSShared):
         offline_nodes = []
         for storagerouter in storagerouters:
             try:
-                root_client = SSHClient(endpoint=storagerouter, username='root')
+                root_client = SSHClient.get_pooled(endpoint=storagerouter, username='root')
                 MDSServiceController._logger.debug('StorageRouter {0} - ONLINE'.format(storagerouter.name))
             except UnableToConnectException:
                 root_client = None
@@ -388,7 +389,7 @@ class MDSServiceController(MDSShared):
         safety_ensurer.ensure_safety()
 
     @staticmethod
-    @ovs_task(name='ovs.mds.ensure_safety')
+    @ovs_task(name='ovs.mds.ensure_safety', priority=TASK_PRIORITY_EVENT)
     def ensure_safety(vdisk_guid, excluded_storagerouter_guids=None, **kwargs):
         """
         Ensures (or tries to ensure) the safety of a given vDisk.
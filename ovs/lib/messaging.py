@@ -17,6 +17,7 @@
 """
 Messaging module
 """
+import time
 import logging
 from functools import wraps
 from ovs_extensions.generic.filemutex import file_mutex
@@ -58,6 +59,9 @@ class MessageController(object):
     clients. It covers a long-polling scenario providing a realtime-alike experience.
     """
     TIMEOUT = 300
+    RING_SIZE = 1000
+    SEQUENCE_KEY = 'msg_sequence'
+    WRITE_GRACE = 5  # Seconds a claimed message id is waited for before it is considered lost
     _logger = logging.getLogger(__name__)
 
     class Type(object):
@@ -117,37 +121,61 @@ class MessageController(object):
     def get_messages(subscriber_id, message_id):
         """
         Gets all messages pending for a given subscriber, from a given message id
+        Only the ring buffer slots after the given message id are read. Reading stops at the first slot of which the message
+        was claimed but not yet written, so it is picked up by the next call. Such a slot is only skipped once a later message
+        is older than WRITE_GRACE seconds, which means its writer failed or the message expired
+        :return: The messages and the id up to which all messages were handled, to pass to the next call
         """
         volatile = VolatileFactory.get_client()
         try:
             subscriptions = volatile.get('msg_subscriptions_{0}'.format(subscriber_id), [])
-            all_messages = volatile.get('msg_messages', [])
+            last_message_id = MessageController.last_message_id()
+            if message_id > last_message_id:
+                # The sequence was reset (e.g. memcache restart), start reading from the beginning
+                message_id = 0
+            message_ids = range(max(message_id, last_message_id - MessageController.RING_SIZE) + 1, last_message_id + 1)
+            slots = MessageController._get_slots(volatile, message_ids)
+            now = time.time()
             messages = []
-            last_message_id = 0
-            for message in all_messages:
-                if message['id'] > last_message_id:
-                    last_message_id = message['id']
-                if message['id'] > message_id and message['type'] in subscriptions:
+            handled_id = message_ids[0] - 1 if len(message_ids) > 0 else message_id
+            for index, current_id in enumerate(message_ids):
+                message = slots[index]
+                if message is not None and message['id'] > current_id:
+                    # The slot was overwritten by a newer message, this one is lost
+                    handled_id = current_id
+                    continue
+                if message is None or message['id'] < current_id:
+                    # The message was claimed but not yet written, or it expired
+                    written = next((later for later in slots[index + 1:] if later is not None and later['id'] > current_id), None)
+                    if written is None or now - written.get('time', 0) < MessageController.WRITE_GRACE:
+                        break
+                    handled_id = current_id
+                    continue
+                if message['type'] in subscriptions:
                     messages.append(message)
-            return messages, last_message_id
+                handled_id = current_id
+            return messages, handled_id
         except Exception:
             MessageController._logger.exception('Error loading messages')
             raise
 
     @staticmethod
-    @synchronized()
     def fire(message_type, body):
         """
         Adds a new message to the messaging queue
+        The message id is claimed atomically, after which the message is written in its own ring buffer slot
         """
         volatile = VolatileFactory.get_client()
-        last_message_id = max([m['id'] for m in volatile.get('msg_messages', [])] + [0])
-        message = {'id': last_message_id + 1,
+        message_id = volatile.incr(MessageController.SEQUENCE_KEY)
+        if message_id is None:
+            # Incrementing a non-existing key fails. The add is a no-op when another process initialized the sequence first
+            volatile.add(MessageController.SEQUENCE_KEY, 0, 0)
+            message_id = volatile.incr(MessageController.SEQUENCE_KEY)
+        message = {'id': int(message_id),
                    'type': message_type,
-                   'body': body}
-        messages = volatile.get('msg_messages', [])
-        messages.append(message)
-        volatile.set('msg_messages', messages, MessageController.TIMEOUT)
+                   'body': body,
+                   'time': time.time()}
+        volatile.set(MessageController._slot_key(message['id']), message, MessageController.TIMEOUT)
 
     @staticmethod
     def last_message_id():
@@ -156,7 +184,26 @@ class MessageController(object):
         """
         volatile = VolatileFactory.get_client()
         try:
-            return max([m['id'] for m in volatile.get('msg_messages', [])] + [0])
+            return int(volatile.get(MessageController.SEQUENCE_KEY, 0))
         except Exception:
             MessageController._logger.exception('Error loading last message id')
             raise
+
+    @staticmethod
+    def _slot_key(message_id):
+        """
+        Returns the key of the ring buffer slot holding the given message id
+        """
+        return 'msg_message_{0}'.format(message_id % MessageController.RING_SIZE)
+
+    @staticmethod
+    def _get_slots(volatile, message_ids):
+        """
+        Reads the ring buffer slots of the given message ids at once
+        """
+        keys = [MessageController._slot_key(current_id) for current_id in message_ids]
+        if len(keys) == 0:
+            return []
+        if hasattr(volatile, 'get_multi'):
+            return list(volatile.get_multi(keys))
+        return [volatile.get(key) for key in keys]
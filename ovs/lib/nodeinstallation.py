@@ -627,7 +627,7 @@ class NodeInstallationController(object):
         target_client.dir_delete('/opt/OpenvStorage/webapps/frontend/logging')
 
         Toolbox.log(logger=NodeInstallationController._logger, messages='Stopping services')
-        for service in ['watcher-framework', 'watcher-config', 'workers', 'support-agent']:
+        for service in ['watcher-framework', 'watcher-config', 'workers', 'support-agent'] + NodeTypeController.get_priority_worker_services().keys():
             if service_manager.has_service(service, client=target_client):
                 ServiceFactory.change_service_state(target_client, service, 'stop', NodeInstallationController._logger)
 
@@ -300,7 +300,7 @@ class NodeRemovalController(object):
         Toolbox.log(logger=logger, messages='Removing services')
         service_manager = ServiceFactory.get_manager()
         stop_only = [RABBIT_MQ_PACKAGE_NAME, 'memcached']
-        services = ['workers', 'support-agent', 'watcher-framework']
+        services = ['workers', 'support-agent', 'watcher-framework'] + NodeTypeController.get_priority_worker_services().keys()
         if node_type == 'master':
             services += ['scheduled-tasks', 'webapp-api', 'volumerouter-consumer']
             if Toolbox.is_service_internally_managed(service='rabbitmq') is True:
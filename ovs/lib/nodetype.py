@@ -24,6 +24,8 @@ import sys
 import json
 import time
 import logging
+from collections import OrderedDict
+from ovs.constants.celery import TASK_PRIORITIES, TASK_PRIORITY_CONCURRENCY, TASK_PRIORITY_CONCURRENCY_KEY
 from ovs.constants.packages import RABBIT_MQ_PACKAGE_NAME
 from ovs.dal.hybrids.servicetype import ServiceType
 from ovs_extensions.constants.vpools import HOSTS_BASE_PATH
@@ -468,7 +470,7 @@ class NodeTypeController(object):
                         Toolbox.log(logger=NodeTypeController._logger, messages=['\nFailed to stop service'.format(service), ex], loglevel='exception')
 
             Toolbox.log(logger=NodeTypeController._logger, messages='Removing services')
-            services = ['scheduled-tasks', 'webapp-api', 'volumerouter-consumer']
+            services = ['scheduled-tasks', 'webapp-api', 'volumerouter-consumer'] + NodeTypeController.get_priority_worker_services().keys()
             for service in services:
                 if service_manager.has_service(service, client=target_client):
                     Toolbox.log(logger=NodeTypeController._logger, messages='Removing service {0}'.format(service))
@@ -482,6 +484,8 @@ class NodeTypeController(object):
                 service_manager.add_service(name='workers',
                                             client=target_client,
                                             params={'WORKER_QUEUE': '{0}'.format(unique_id)})
+            # Re-add the priority class workers as they are added on an extra node
+            NodeTypeController.add_priority_worker_services(client=target_client, logger=NodeTypeController._logger)
         try:
             NodeTypeController._configure_amqp_to_volumedriver()
         except Exception as ex:
@@ -753,6 +757,38 @@ class NodeTypeController(object):
                 Toolbox.log(logger=logger, messages='Adding service {0}'.format(service_name))
                 service_manager.add_service(name=service_name, params=params, client=client)
 
+        NodeTypeController.add_priority_worker_services(client=client, logger=logger)
+
+    @staticmethod
+    def get_priority_worker_services():
+        """
+        Retrieve the names of the dedicated worker services, one per task priority class
+        :return: Mapping of the task priority class to the name of its worker service
+        :rtype: collections.OrderedDict
+        """
+        return OrderedDict(('ovs-workers-{0}'.format(priority), priority) for priority in TASK_PRIORITIES)
+
+    @staticmethod
+    def add_priority_worker_services(client, logger):
+        """
+        Add the dedicated worker services for every task priority class
+        :param client: Client on which to add the services
+        :type client: ovs_extensions.generic.sshclient.SSHClient
+        :param logger: Logger object used for logging
+        :type logger: ovs.extensions.generic.logger.Logger
+        :return: None
+        """
+        service_manager = ServiceFactory.get_manager()
+        concurrency = Configuration.get(TASK_PRIORITY_CONCURRENCY_KEY, default={})
+        for service_name, priority in NodeTypeController.get_priority_worker_services().iteritems():
+            if not service_manager.has_service(service_name, client):
+                Toolbox.log(logger=logger, messages='Adding service {0}'.format(service_name))
+                service_manager.add_service(name='ovs-workers-priority',
+                                            params={'WORKER_PRIORITY': priority,
+                                                    'WORKER_CONCURRENCY': concurrency.get(priority, TASK_PRIORITY_CONCURRENCY[priority])},
+                                            client=client,
+                                            target_name=service_name)
+
     @staticmethod
     def retrieve_storagerouter_info_via_host(ip, password):
         """
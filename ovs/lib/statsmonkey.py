@@ -20,12 +20,15 @@ Classes: StatsMonkeyController
 """
 
 import logging
+from ovs.constants.arakoon import COLLAPSE_STATISTICS_KEY
+from ovs.constants.celery import TASK_LATENCY_KEY, TASK_PRIORITIES
 from ovs.dal.hybrids.storagerouter import StorageRouter
 from ovs.dal.hybrids.vpool import VPool
 from ovs.dal.lists.servicetypelist import ServiceTypeList
 from ovs.dal.lists.storagerouterlist import StorageRouterList
 from ovs.dal.lists.vpoollist import VPoolList
 from ovs.extensions.generic.configuration import Configuration
+from ovs.extensions.storage.volatilefactory import VolatileFactory
 from ovs_extensions.monitoring.statsmonkey import StatsMonkey
 from ovs.lib.helpers.decorators import ovs_task
 from ovs.lib.helpers.toolbox import Schedule
@@ -40,6 +43,9 @@ class StatsMonkeyController(StatsMonkey):
         * get_stats_mds
         * get_stats_vpools
         * get_stats_storagerouters
+        * get_stats_celery_results
+        * get_stats_celery_queues
+        * get_stats_arakoon_collapse
     """
     _logger = logging.getLogger(__name__)
     _dynamic_dependencies = {'get_stats_vpools': {VPool: ['statistics']},  # The statistics being retrieved depend on the caching timeouts of these properties
@@ -154,3 +160,83 @@ class StatsMonkeyController(StatsMonkey):
                 errors = True
                 cls._logger.exception('Retrieving statistics for vPool {0} failed'.format(vpool.name))
         return errors, stats
+
+    @classmethod
+    def get_stats_celery_results(cls):
+        """
+        Retrieve the amount of Celery results and bytes stored by the result backend
+        """
+        from ovs.celery_run import celery
+
+        if cls._config is None:
+            cls.validate_and_retrieve_config()
+
+        stats = []
+        errors = False
+        try:
+            statistics = celery.backend.get_statistics()
+            stats.append({'tags': {'environment': cls._config['environment']},
+                          'fields': {'results': statistics['count'],
+                                     'bytes': statistics['bytes'],
+                                     'buckets': statistics['buckets']},
+                          'measurement': 'celery_results'})
+        except Exception:
+            errors = True
+            cls._logger.exception('Retrieving statistics for the Celery results failed')
+        return errors, stats
+
+    @classmethod
+    def get_stats_celery_queues(cls):
+        """
+        Retrieve the amount of started tasks and the time they were waiting for each Celery queue
+        """
+        if cls._config is None:
+            cls.validate_and_retrieve_config()
+
+        stats = []
+        errors = False
+        volatile = VolatileFactory.get_client()
+        for queue in ['generic', 'masters', 'sr'] + TASK_PRIORITIES:
+            try:
+                count = int(volatile.get(TASK_LATENCY_KEY.format(queue, 'count'), 0))
+                total = int(volatile.get(TASK_LATENCY_KEY.format(queue, 'total_ms'), 0))
+                stats.append({'tags': {'queue': queue,
+                                       'environment': cls._config['environment']},
+                              'fields': {'tasks': count,
+                                         'latency_total_ms': total,
+                                         'latency_average_ms': float(total) / count if count > 0 else 0.0},
+                              'measurement': 'celery_queue'})
+            except Exception:
+                errors = True
+                cls._logger.exception('Retrieving statistics for Celery queue {0} failed'.format(queue))
+        return errors, stats
+
+    @classmethod
+    def get_stats_arakoon_collapse(cls):
+        """
+        Retrieve the outcome and duration of the last Arakoon collapse for every cluster on every node
+        """
+        if cls._config is None:
+            cls.validate_and_retrieve_config()
+
+        stats = []
+        errors = False
+        try:
+            statistics = VolatileFactory.get_client().get(COLLAPSE_STATISTICS_KEY)
+            if statistics is not None:
+                for cluster_name, node_results in statistics['results'].iteritems():
+                    for ip, result in node_results.iteritems():
+                        fields = {'status': result['status']}
+                        if result['duration'] is not None:
+                            fields['duration'] = result['duration']
+                        if result['tlogs'] is not None:
+                            fields['tlogs'] = result['tlogs']
+                        stats.append({'tags': {'cluster_name': cluster_name,
+                                               'node_ip': ip,
+                                               'environment': cls._config['environment']},
+                                      'fields': fields,
+                                      'measurement': 'arakoon_collapse'})
+        except Exception:
+            errors = True
+            cls._logger.exception('Retrieving statistics for the Arakoon collapse failed')
+        return errors, stats
@@ -19,6 +19,7 @@ StorageDriverController class responsible for making changes to existing Storage
 """
 
 import logging
+from ovs.constants.celery import TASK_PRIORITY_EVENT
 from ovs.dal.hybrids.diskpartition import DiskPartition
 from ovs.dal.hybrids.j_storagedriverpartition import StorageDriverPartition
 from ovs.dal.hybrids.service import Service
@@ -52,7 +53,7 @@ class StorageDriverController(object):
     # CELERY TASKS #
     ################
     @staticmethod
-    @ovs_task(name='ovs.storagedriver.mark_offline')
+    @ovs_task(name='ovs.storagedriver.mark_offline', priority=TASK_PRIORITY_EVENT)
     def mark_offline(storagerouter_guid):
         """
         Marks all StorageDrivers on this StorageRouter offline
@@ -67,7 +68,7 @@ class StorageDriverController(object):
                 storagedriver_client.mark_node_offline(str(storagedriver.storagedriver_id))
 
     @staticmethod
-    @ovs_task(name='ovs.storagedriver.volumedriver_error')
+    @ovs_task(name='ovs.storagedriver.volumedriver_error', priority=TASK_PRIORITY_EVENT)
     @log('VOLUMEDRIVER_TASK')
     def volumedriver_error(code, volume_id):
         """
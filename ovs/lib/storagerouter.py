@@ -91,7 +91,7 @@ class StorageRouterController(object):
         :rtype: list
         """
         os_manager = OSFactory.get_manager()
-        client = SSHClient(endpoint=StorageRouter(storagerouter_guid))
+        client = SSHClient.get_pooled(endpoint=StorageRouter(storagerouter_guid))
         return os_manager.get_ip_addresses(client=client)
 
     @staticmethod
@@ -104,7 +104,7 @@ class StorageRouterController(object):
         :rtype: dict
         """
         storagerouter = StorageRouter(storagerouter_guid)
-        client = SSHClient(endpoint=storagerouter)
+        client = SSHClient.get_pooled(endpoint=storagerouter)
         services_mds = ServiceTypeList.get_by_name(ServiceType.SERVICE_TYPES.MD_SERVER).services
         services_arakoon = [service for service in ServiceTypeList.get_by_name(ServiceType.SERVICE_TYPES.ARAKOON).services
                             if service.name != 'arakoon-ovsdb' and service.is_internal is True]
@@ -183,7 +183,7 @@ class StorageRouterController(object):
         :rtype: dict
         """
         package_manager = PackageFactory.get_manager()
-        client = SSHClient(StorageRouter(storagerouter_guid))
+        client = SSHClient.get_pooled(StorageRouter(storagerouter_guid))
         return {'storagerouter_guid': storagerouter_guid,
                 'versions': dict((pkg_name, str(version)) for pkg_name, version in package_manager.get_installed_versions(client).iteritems())}
 
@@ -407,7 +407,7 @@ class StorageRouterController(object):
         :return: True if mount point not in use else False
         :rtype: bool
         """
-        client = SSHClient(StorageRouter(storagerouter_guid))
+        client = SSHClient.get_pooled(StorageRouter(storagerouter_guid))
         return client.dir_exists(directory='/mnt/{0}'.format(name))
 
     @staticmethod
@@ -433,7 +433,7 @@ class StorageRouterController(object):
         :rtype: NoneType
         """
         storagerouter = StorageRouter(storagerouter_guid)
-        client = SSHClient(storagerouter, username='root')
+        client = SSHClient.get_pooled(storagerouter, username='root')
         rdma_capable = False
         with remote(client.ip, [os], username='root') as rem:
             for root, dirs, files in rem.os.walk('/sys/class/infiniband'):
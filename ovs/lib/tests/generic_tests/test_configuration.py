@@ -101,6 +101,50 @@ class ConfigurationTest(unittest.TestCase):
         c = Configuration.get_client()
         self.assertListEqual(c.prefix_entries('djef'), [('djef_test1', '"test_content"'), ('djef2/test', '"test_content"')])
 
+    def test_cache(self):
+        """
+        Test the read-through cache of the configuration values
+        """
+        Configuration.CACHE_ENABLED = True
+        Configuration.CACHE_CHECK_INTERVAL = 0
+        Configuration.clear_cache()
+        try:
+            Configuration.set('/foocache', {'foo': 'bar'})
+            statistics = Configuration.get_cache_statistics()
+            self.assertDictEqual(Configuration.get('/foocache'), {'foo': 'bar'})
+            self.assertDictEqual(Configuration.get('/foocache'), {'foo': 'bar'})
+            self.assertEqual(Configuration.get_cache_statistics()['misses'] - statistics['misses'], 1)
+            self.assertEqual(Configuration.get_cache_statistics()['hits'] - statistics['hits'], 1)
+
+            # Cached values can not be changed by the caller
+            Configuration.get('/foocache')['foo'] = 'changed'
+            self.assertDictEqual(Configuration.get('/foocache'), {'foo': 'bar'})
+
+            # Writes through the Configuration invalidate the cached value, sub-keys are written on top of the stored value
+            Configuration.set('/foocache|bar', 'foo')
+            self.assertDictEqual(Configuration.get('/foocache'), {'foo': 'bar', 'bar': 'foo'})
+            Configuration.delete('/foocache')
+            with self.assertRaises(ConfigurationNotFoundException):
+                Configuration.get('/foocache')
+            self.assertEqual(Configuration.get('/foocache', default=None), None)
+
+            # Writes by another process are noticed through the version key
+            super(Configuration, Configuration).set('/foocache', 'other')
+            self.assertEqual(Configuration.get('/foocache', default=None), None)
+            super(Configuration, Configuration).set(Configuration.CACHE_VERSION_KEY, 'other')
+            self.assertEqual(Configuration.get('/foocache', default=None), 'other')
+
+            # Writes by another process are not overwritten by a write of this process before the next verification
+            Configuration.CACHE_CHECK_INTERVAL = 3600
+            super(Configuration, Configuration).set('/foocache', 'another')
+            super(Configuration, Configuration).set(Configuration.CACHE_VERSION_KEY, 'another')
+            Configuration.set('/barcache', 'bar')
+            self.assertEqual(Configuration.get('/foocache', default=None), 'another')
+        finally:
+            Configuration.CACHE_ENABLED = None
+            Configuration.CACHE_CHECK_INTERVAL = 1
+            Configuration.clear_cache()
+
     def _assert_set_get(self, a, b):
             for set_data, get_data in zip(a, b):
                 set_data_type, set_key, set_value, raw = set_data
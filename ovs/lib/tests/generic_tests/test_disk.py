@@ -0,0 +1,141 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Test module for the DiskController
+"""
+
+import unittest
+from ovs.dal.dataobject import DataObject
+from ovs.dal.hybrids.diskpartition import DiskPartition
+from ovs.dal.tests.helpers import DalHelper
+from ovs_extensions.generic.disk import DiskTools
+from ovs.lib.disk import DiskController
+
+
+class _GenericPartition(object):
+    """
+    Partition as reported by the DiskTools
+    """
+    def __init__(self, disk_name, offset, size):
+        self.filesystem = 'ext4'
+        self.offset = offset
+        self.state = 'OK'
+        self.aliases = ['/dev/disk/by-id/{0}-part{1}'.format(disk_name, offset)]
+        self.mountpoint = None
+        self.size = size
+
+
+class _GenericDisk(object):
+    """
+    Disk as reported by the DiskTools
+    """
+    def __init__(self, name, size, partition_offsets=()):
+        self.name = name
+        self.state = 'OK'
+        self.aliases = ['/dev/disk/by-id/{0}'.format(name)]
+        self.is_ssd = False
+        self.model = 'model'
+        self.serial = 'serial_{0}'.format(name)
+        self.size = size
+        self.partitions = [_GenericPartition(name, offset, 100) for offset in partition_offsets]
+
+
+class _AliasMapping(object):
+    """
+    Mapping of the device names to their aliases
+    """
+    def __init__(self, disks):
+        self._disks = disks
+
+    def reverse_mapping(self):
+        return dict((alias, '/dev/{0}'.format(disk.name)) for disk in self._disks for alias in disk.aliases)
+
+
+class DiskControllerTest(unittest.TestCase):
+    """
+    Test the synchronisation of the disks of a StorageRouter
+    """
+    def setUp(self):
+        """
+        (Re)Sets the stores on every test and registers the saves
+        """
+        DalHelper.setup()
+        self.storagerouter = DalHelper.build_dal_structure({'storagerouters': [1]})['storagerouters'][1]
+        self.devices = []
+        self.saves = 0
+        self.chunks = 0
+        self._model_devices = DiskTools.__dict__['model_devices']
+        self._save = DataObject.__dict__['save']
+        self._save_chunk = DataObject.__dict__['_save_chunk']
+
+        def _model_devices(client, s3=False):
+            _ = client, s3
+            return self.devices, _AliasMapping(self.devices)
+
+        def _save(obj, *args, **kwargs):
+            self.saves += 1
+            return self._save(obj, *args, **kwargs)
+
+        def _save_chunk(objects):
+            self.chunks += 1
+            return self._save_chunk.__func__(objects)
+
+        DiskTools.model_devices = staticmethod(_model_devices)
+        DataObject.save = _save
+        DataObject._save_chunk = staticmethod(_save_chunk)
+
+    def tearDown(self):
+        """
+        Clean up test suite
+        """
+        DiskTools.model_devices = self._model_devices
+        DataObject.save = self._save
+        DataObject._save_chunk = self._save_chunk
+        DalHelper.teardown()
+
+    def _get_model(self):
+        return dict((disk.name, (disk.size, disk.state, sorted(partition.offset for partition in disk.partitions)))
+                    for disk in self.storagerouter.disks)
+
+    def test_sync_with_reality(self):
+        """
+        Validates whether all created and updated disks and partitions are saved in a single transaction
+        """
+        self.devices = [_GenericDisk('sda', 1000, [0, 500]), _GenericDisk('sdb', 2000)]
+        DiskController.sync_with_reality(self.storagerouter.guid)
+        self.assertEqual(self._get_model(), {'sda': (1000, 'OK', [0, 500]),
+                                             'sdb': (2000, 'OK', [])})
+        self.assertEqual(self.saves, 0)
+        self.assertEqual(self.chunks, 1)
+
+        # Nothing changed, so nothing is saved
+        self.chunks = 0
+        DiskController.sync_with_reality(self.storagerouter.guid)
+        self.assertEqual(self.chunks, 0)
+
+        # A disk in use goes missing, one is added and one is resized
+        sda_partitions = dict((partition.offset, partition) for partition in [disk for disk in self.storagerouter.disks if disk.name == 'sda'][0].partitions)
+        sda_partitions[0].roles = ['DB']
+        sda_partitions[0].save()
+        self.devices = [_GenericDisk('sdb', 3000), _GenericDisk('sdc', 4000, [0])]
+        DiskController.sync_with_reality(self.storagerouter.guid)
+        self.assertEqual(self._get_model(), {'sda': (1000, 'MISSING', [0, 500]),
+                                             'sdb': (3000, 'OK', []),
+                                             'sdc': (4000, 'OK', [0])})
+        self.assertEqual(DiskPartition(sda_partitions[0].guid).state, 'MISSING')
+        self.assertEqual(DiskPartition(sda_partitions[500].guid).state, 'MISSING')
+        self.assertEqual(self.saves, 1)  # Only the role claimed by the test itself
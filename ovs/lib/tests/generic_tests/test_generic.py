@@ -29,6 +29,7 @@ from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.sshclient import SSHClient, UnableToConnectException
 from ovs_extensions.generic.tests.sshclient_mock import MockedSSHClient
 from ovs.lib.generic import GenericController
+from ovs.lib.helpers.generic.collapser import ArakoonCollapser
 from ovs.lib.helpers.toolbox import Toolbox
 from ovs_extensions.testing.testcase import LogTestCase
 
@@ -67,7 +68,8 @@ class Generic(LogTestCase):
                               ServiceType.ARAKOON_CLUSTER_TYPES.CFG: [{'name': 'unittest-cacc', 'internal': True, 'success': True}],
                               ServiceType.ARAKOON_CLUSTER_TYPES.FWK: [{'name': 'unittest-ovsdb', 'internal': True, 'success': False}],
                               ServiceType.ARAKOON_CLUSTER_TYPES.ABM: [{'name': 'unittest-cluster-1-abm', 'internal': True, 'success': False},
-                                                                      {'name': 'unittest-random-abm-name', 'internal': False, 'success': True}],
+                                                                      {'name': 'unittest-random-abm-name', 'internal': False, 'success': True},
+                                                                      {'name': 'unittest-cluster-2-abm', 'internal': True, 'success': True, 'tlogs': 2}],
                               ServiceType.ARAKOON_CLUSTER_TYPES.NSM: [{'name': 'unittest-cluster-1-nsm_0', 'internal': True, 'success': True}]}
         self.assertEqual(first=sorted(clusters_to_create.keys()),
                          second=sorted(ServiceType.ARAKOON_CLUSTER_TYPES.keys()),
@@ -75,6 +77,7 @@ class Generic(LogTestCase):
 
         # Create all Arakoon clusters and related services
         failed_clusters = []
+        skipped_clusters = []
         external_clusters = []
         successful_clusters = []
         for cluster_type, cluster_infos in clusters_to_create.iteritems():
@@ -117,6 +120,14 @@ class Generic(LogTestCase):
                     external_clusters.append(cluster_name)
                     continue
 
+                # Emulate the Tlogs present on the nodes, clusters with too few Tlogs should not be collapsed
+                tlogs = cluster_info.get('tlogs', 10)
+                for node in arakoon_installer.config.nodes:
+                    MockedSSHClient._run_returns[node.ip]['find {0} -maxdepth 1 -type f -name *.tl*'.format(node.tlog_dir)] = '\n'.join('{0}/{1}.tlx'.format(node.tlog_dir, index) for index in xrange(tlogs))
+                if tlogs < 4:
+                    skipped_clusters.append(cluster_name)
+                    continue
+
                 if cluster_info['success'] is True:
                     if filesystem is True:
                         config_path = ArakoonClusterConfig.CONFIG_FILE.format(cluster_name)
@@ -132,16 +143,17 @@ class Generic(LogTestCase):
         SSHClient._raise_exceptions[storagerouter_2.ip] = {'users': ['ovs'],
                                                            'exception': UnableToConnectException('No route to host')}
         with self.assertLogs(level=logging.DEBUG) as logging_watcher:
-            GenericController.collapse_arakoon()
+            results = GenericController.collapse_arakoon()
 
         # Verify all log messages for each type of cluster
         generic_logs = logging_watcher.get_message_severity_map()
-        for cluster_name in successful_clusters + failed_clusters + external_clusters:
+        for cluster_name in successful_clusters + failed_clusters + skipped_clusters + external_clusters:
             collect_msg = ('DEBUG', 'Collecting info for cluster {0}'.format(cluster_name))
             unreachable_msg = ('ERROR', 'Could not collapse any cluster on {0} (not reachable)'.format(storagerouter_2.name))
             end_collapse_msg = ('DEBUG', 'Collapsing cluster {0} on {1} completed'.format(cluster_name, storagerouter_1.ip))
             start_collapse_msg = ('DEBUG', 'Collapsing cluster {0} on {1}'.format(cluster_name, storagerouter_1.ip))
             failed_collapse_msg = ('ERROR', 'Collapsing cluster {0} on {1} failed'.format(cluster_name, storagerouter_1.ip))
+            skipped_collapse_msg = ('DEBUG', 'Skipping cluster {0} on {1}, only 2 Tlogs present'.format(cluster_name, storagerouter_1.ip))
             messages_to_validate = []
             if cluster_name in successful_clusters:
                 assert_function = self.assertIn
@@ -149,6 +161,12 @@ class Generic(LogTestCase):
             elif cluster_name in failed_clusters:
                 assert_function = self.assertIn
                 messages_to_validate.extend([collect_msg, unreachable_msg, start_collapse_msg, failed_collapse_msg])
+            elif cluster_name in skipped_clusters:
+                assert_function = self.assertIn
+                messages_to_validate.extend([collect_msg, unreachable_msg, skipped_collapse_msg])
+                self.assertNotIn(member=start_collapse_msg[1],
+                                 container=generic_logs,
+                                 msg='Did not expect to find log message: {0}'.format(start_collapse_msg[1]))
             else:
                 assert_function = self.assertNotIn
                 messages_to_validate.extend([collect_msg, start_collapse_msg, end_collapse_msg])
@@ -166,6 +184,21 @@ class Generic(LogTestCase):
                                      second=generic_logs[message],
                                      msg='Log message {0} is of severity {1} expected {2}'.format(message, generic_logs[message], severity))
 
+        # Verify the outcome and the duration registered for each cluster
+        for cluster_name in successful_clusters + failed_clusters + skipped_clusters:
+            result = results[cluster_name][storagerouter_1.ip]
+            self.assertEqual(first=ArakoonCollapser.STATUS_UNREACHABLE,
+                             second=results[cluster_name][storagerouter_2.ip]['status'])
+            if cluster_name in skipped_clusters:
+                self.assertEqual(first=ArakoonCollapser.STATUS_SKIPPED, second=result['status'])
+                self.assertIsNone(result['duration'])
+            else:
+                self.assertEqual(first=ArakoonCollapser.STATUS_COLLAPSED if cluster_name in successful_clusters else ArakoonCollapser.STATUS_FAILED,
+                                 second=result['status'])
+                self.assertIsNotNone(result['duration'])
+        for cluster_name in external_clusters:
+            self.assertNotIn(member=cluster_name, container=results)
+
         # Collapse should always have a 'finished' message since each cluster should be attempted to be collapsed
         for general_message in ['Arakoon collapse started', 'Arakoon collapse finished']:
             self.assertIn(member=general_message,
@@ -0,0 +1,104 @@
+# Copyright (C) 2019 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Test module for the MessageController class
+"""
+
+import time
+import unittest
+from ovs.dal.tests.helpers import DalHelper
+from ovs.extensions.storage.volatilefactory import VolatileFactory
+from ovs.lib.messaging import MessageController
+
+
+class MessagingTest(unittest.TestCase):
+    """
+    Test the ring buffer used for messaging
+    """
+    def setUp(self):
+        """
+        (Re)Sets the stores on every test
+        """
+        self.volatile, _ = DalHelper.setup(fake_sleep=True)
+        self.ring_size = MessageController.RING_SIZE
+        self.volatile.set('msg_subscriptions_subscriber', [MessageController.Type.EVENT])
+
+    def tearDown(self):
+        """
+        Clean up test suite
+        """
+        MessageController.RING_SIZE = self.ring_size
+        DalHelper.teardown(fake_sleep=True)
+
+    def _get_bodies(self, message_id):
+        messages, last_message_id = MessageController.get_messages('subscriber', message_id)
+        return [message['body'] for message in messages], last_message_id
+
+    def test_ordering(self):
+        """
+        Validates whether messages are returned in order, filtered on the subscriptions
+        """
+        MessageController.fire(MessageController.Type.EVENT, 'one')
+        MessageController.fire(MessageController.Type.TASK_COMPLETE, 'task')
+        MessageController.fire(MessageController.Type.EVENT, 'two')
+        self.assertEqual(self._get_bodies(0), (['one', 'two'], 3))
+        self.assertEqual(self._get_bodies(1), (['two'], 3))
+        self.assertEqual(self._get_bodies(3), ([], 3))
+
+    def test_message_in_flight(self):
+        """
+        Validates whether a claimed but not yet written message is waited for, and skipped once it is considered lost
+        """
+        MessageController.fire(MessageController.Type.EVENT, 'one')
+        VolatileFactory.get_client().incr(MessageController.SEQUENCE_KEY)  # Claims id 2 without writing it
+        MessageController.fire(MessageController.Type.EVENT, 'three')
+        # Reading stops before the claimed id, so the message is delivered by a next call once it is written
+        self.assertEqual(self._get_bodies(0), (['one'], 1))
+        self.assertEqual(self._get_bodies(1), ([], 1))
+        time.sleep(MessageController.WRITE_GRACE + 1)
+        self.assertEqual(self._get_bodies(1), (['three'], 3))
+
+        # A message written late within the grace period is still delivered
+        VolatileFactory.get_client().incr(MessageController.SEQUENCE_KEY)  # Claims id 4
+        MessageController.fire(MessageController.Type.EVENT, 'five')
+        self.assertEqual(self._get_bodies(3), ([], 3))
+        self.volatile.set(MessageController._slot_key(4), {'id': 4, 'type': MessageController.Type.EVENT, 'body': 'four', 'time': time.time()})
+        self.assertEqual(self._get_bodies(3), (['four', 'five'], 5))
+
+    def test_ring_wrap_around(self):
+        """
+        Validates whether only the messages still in the ring buffer are returned once it wrapped around
+        """
+        MessageController.RING_SIZE = 5
+        for index in xrange(8):
+            MessageController.fire(MessageController.Type.EVENT, index + 1)
+        self.assertEqual(self._get_bodies(0), ([4, 5, 6, 7, 8], 8))
+        self.assertEqual(self._get_bodies(6), ([7, 8], 8))
+        # An overwritten slot is skipped
+        self.volatile.set(MessageController._slot_key(7), {'id': 12, 'type': MessageController.Type.EVENT, 'body': 12, 'time': time.time()})
+        self.assertEqual(self._get_bodies(6), ([8], 8))
+
+    def test_sequence_reset(self):
+        """
+        Validates whether reading starts from the beginning when the sequence was reset
+        """
+        for body in ['one', 'two', 'three']:
+            MessageController.fire(MessageController.Type.EVENT, body)
+        self.assertEqual(self._get_bodies(0), (['one', 'two', 'three'], 3))
+        self.volatile.delete(MessageController.SEQUENCE_KEY)
+        MessageController.fire(MessageController.Type.EVENT, 'after reset')
+        self.assertEqual(self._get_bodies(3), (['after reset'], 1))
@@ -191,6 +191,31 @@ class DTLCheckup(LogTestCase):
                                                         {'key': 'port', 'value': 3},
                                                         {'key': 'mode', 'value': DTLMode.ASYNCHRONOUS}])
 
+    def test_multi_node_with_excluded_storagerouters(self):
+        """
+        Test DTL checkup for all vDisks of a vPool on a multi node setup, excluding a StorageRouter
+        """
+        # || StorageRouter || vDisk | Regular Domain || Recovery Domain || DTL Target ||
+        #  |      sr 1      | 1,2,3 |                 |                  |             |
+        #  |      sr 2      |       |                 |                  |  excluded   |
+        #  |      sr 3      |       |                 |                  |    1,2,3    |
+        structure = DalHelper.build_dal_structure(
+            {'vpools': [1],
+             'vdisks': [(1, 1, 1, 1), (2, 1, 1, 1), (3, 1, 1, 1)],  # (<id>, <storagedriver_id>, <vpool_id>, <mds_service_id>)
+             'mds_services': [(1, 1)],  # (<id>, <storagedriver_id>)
+             'storagerouters': [1, 2, 3],
+             'storagedrivers': [(1, 1, 1), (2, 1, 2), (3, 1, 3)]}  # (<id>, <vpool_id>, <sr_id>)
+        )
+        vpool = structure['vpools'][1]
+        storagerouters = structure['storagerouters']
+
+        self._roll_out_dtl_services(vpool=vpool, storagerouters=storagerouters)
+        VDiskController.dtl_checkup(vpool_guid=vpool.guid, storagerouters_to_exclude=[storagerouters[2].guid])
+        for vdisk in structure['vdisks'].values():
+            config = vdisk.storagedriver_client.get_dtl_config(vdisk.volume_id)
+            self.assertEqual(first=storagerouters[3].storagedrivers[0].storage_ip, second=config.host)
+            self.assertEqual(first=DTLConfigMode.MANUAL, second=vdisk.storagedriver_client.get_dtl_config_mode(vdisk.volume_id))
+
     def test_multi_node_with_unused_domains(self):
         """
         Test DTL checkup on a multi node setup and create some Domains, but do not link them to any Storage Router
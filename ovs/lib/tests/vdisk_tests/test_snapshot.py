@@ -109,6 +109,41 @@ class VDiskTest(unittest.TestCase):
                              second=snapshot[key],
                              msg='Value for key "{0}" does not match reality. Expected: {1}  -  Reality: {2}'.format(key, value, snapshot[key]))
 
+    def test_create_snapshots(self):
+        """
+        Test the create snapshots functionality for vDisks spread over multiple StorageDrivers
+            - Create a snapshot for vDisks on 2 StorageDrivers and an unknown vDisk
+            - Create another snapshot while the previous snapshot of 1 vDisk did not make it to the backend yet
+        """
+        structure = DalHelper.build_dal_structure(
+            {'vpools': [1],
+             'vdisks': [(1, 1, 1, 1), (2, 1, 1, 1), (3, 2, 1, 2)],  # (<id>, <storagedriver_id>, <vpool_id>, <mds_service_id>)
+             'storagerouters': [1, 2],
+             'storagedrivers': [(1, 1, 1), (2, 1, 2)],  # (<id>, <vpool_id>, <storagerouter_id>)
+             'mds_services': [(1, 1), (2, 2)]}  # (<id>, <storagedriver_id>)
+        )
+        vdisks = structure['vdisks']
+        vdisk_guids = [vdisk.guid for vdisk in vdisks.values()]
+        metadata = {'timestamp': int(time.time()),
+                    'label': 'label1',
+                    'is_consistent': True,
+                    'is_automatic': False,
+                    'is_sticky': False}
+
+        results = VDiskController.create_snapshots(vdisk_guids=vdisk_guids + ['unknown_guid'], metadata=metadata)
+        self.assertEqual(first=set(vdisk_guids + ['unknown_guid']), second=set(results.keys()))
+        self.assertFalse(expr=results['unknown_guid'][0], msg='Expected snapshot for an unknown vDisk to fail')
+        for vdisk in vdisks.values():
+            self.assertTrue(expr=results[vdisk.guid][0], msg='Expected snapshot for vDisk {0} to succeed'.format(vdisk.name))
+            self.assertEqual(first=[results[vdisk.guid][1]], second=vdisk.snapshot_ids)
+
+        vdisks[3].storagedriver_client._set_snapshot_in_backend(volume_id=vdisks[3].volume_id, snapshot_id=vdisks[3].snapshot_ids[0], in_backend=False)
+        results = VDiskController.create_snapshots(vdisk_guids=vdisk_guids, metadata=metadata)
+        self.assertEqual(first=[False, 'Previously created snapshot did not make it to the backend yet'], second=results[vdisks[3].guid])
+        for vdisk_id in [1, 2]:
+            self.assertTrue(expr=results[vdisks[vdisk_id].guid][0], msg='Expected snapshot for vDisk {0} to succeed'.format(vdisks[vdisk_id].name))
+            self.assertEqual(first=2, second=len(vdisks[vdisk_id].snapshot_ids))
+
     def test_delete_snapshot(self):
         """
         Test the delete snapshot functionality
@@ -20,6 +20,7 @@ Test module for vDisk functionality
 import time
 import unittest
 from collections import OrderedDict
+from ovs.constants.vdisk import MOVE_CONFIG_KEY
 from ovs.dal.exceptions import ObjectNotFoundException
 from ovs.dal.hybrids.j_mdsservice import MDSService
 from ovs.dal.hybrids.j_vdiskdomain import VDiskDomain
@@ -28,9 +29,11 @@ from ovs.dal.hybrids.storagedriver import StorageDriver
 from ovs.dal.hybrids.vdisk import VDisk
 from ovs.dal.lists.vdisklist import VDiskList
 from ovs.dal.tests.helpers import DalHelper
+from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.sshclient import SSHClient
 from ovs.extensions.services.servicefactory import ServiceFactory
 from ovs.extensions.storageserver.tests.mockups import StorageRouterClient
+from ovs.lib.helpers.vdisk.mover import VDiskMover
 from ovs.lib.vdisk import VDiskController
 
 
@@ -308,6 +311,16 @@ class VDiskTest(unittest.TestCase):
         self.assertTrue(expr=len(clones) == 1, msg='Expected to find 1 vDisk with parent snapshot')
         self.assertTrue(expr=len(vdisk1.child_vdisks) == 1, msg='Expected to find 1 child vDisk')
 
+        # The clone lineage is resolved from the parentsnapshot index, which only contains the clones
+        clones = VDiskList.get_by_parentsnapshots([vdisk1.snapshot_ids[0], 'unknown_snapshot'])
+        self.assertTrue(expr=len(clones) == 1, msg='Expected to find 1 vDisk with parent snapshot')
+        self.assertEqual(first='full', second=clones.from_index)
+        clones = VDiskList.get_with_parent_snaphots()
+        self.assertTrue(expr=len(clones) == 1, msg='Expected to find 1 vDisk with parent snapshot')
+        self.assertEqual(first='full', second=clones.from_index)
+        self.assertDictEqual(d1={vdisk1.snapshot_ids[0]: 1, 'unknown_snapshot': 0},
+                             d2=VDiskList.get_clone_counts([vdisk1.snapshot_ids[0], 'unknown_snapshot']))
+
         for expected_key in ['vdisk_guid', 'name', 'backingdevice']:
             self.assertTrue(expr=expected_key in clone1_info, msg='Expected to find key "{0}" in clone_info'.format(expected_key))
         self.assertTrue(expr=clones[0].guid == clone1_info['vdisk_guid'], msg='Guids do not match')
@@ -569,6 +582,48 @@ class VDiskTest(unittest.TestCase):
         VDiskController.migrate_from_voldrv(volume_id=vdisk.volume_id, new_owner_id=storagedrivers[2].storagedriver_id)
         self.assertEqual(vdisk.storagedriver_id, storagedrivers[2].storagedriver_id)
 
+    def test_move_multiple(self):
+        """
+        Test moving multiple vDisks at once
+            - Move vDisks from 2 StorageRouters towards a third one
+            - Move vDisks one by one, largest first
+            - Attempt to move a vDisk to a StorageRouter which is not linked to its vPool
+        """
+        structure = DalHelper.build_dal_structure(
+            {'vpools': [1, 2],
+             'storagerouters': [1, 2, 3],
+             'storagedrivers': [(1, 1, 1), (2, 1, 2), (3, 1, 3), (4, 2, 1)],  # (<id>, <vpool_id>, <storagerouter_id>)
+             'mds_services': [(1, 1), (2, 2), (3, 3), (4, 4)]}  # (<id>, <storagedriver_id>)
+        )
+        vpools = structure['vpools']
+        storagedrivers = structure['storagedrivers']
+        storagerouters = structure['storagerouters']
+        self._roll_out_dtl_services(vpool=vpools[1], storagerouters=storagerouters)
+        self._roll_out_dtl_services(vpool=vpools[2], storagerouters=storagerouters)
+
+        vdisks = [VDisk(VDiskController.create_new(volume_name='vdisk_{0}'.format(index), volume_size=1024 ** 3 * index, storagedriver_guid=storagedrivers[1 if index < 4 else 2].guid))
+                  for index in xrange(1, 6)]
+        progress = VDiskController.move_multiple(vdisk_guids=[vdisk.guid for vdisk in vdisks], target_storagerouter_guid=storagerouters[3].guid)
+        self.assertEqual(first=5, second=progress['total'])
+        self.assertEqual(first=5, second=progress['counts'][VDiskMover.STATUS_MOVED])
+        for vdisk in vdisks:
+            vdisk.invalidate_dynamics('storagedriver_id')
+            self.assertEqual(first=storagedrivers[3].storagedriver_id, second=vdisk.storagedriver_id)
+            self.assertEqual(first=storagedrivers[3].storagedriver_id, second=progress['volumes'][vdisk.guid]['target'])
+            self.assertEqual(first=vdisk.size, second=progress['volumes'][vdisk.guid]['size'])
+
+        # Largest vDisks are moved first
+        Configuration.set(MOVE_CONFIG_KEY, {'concurrency': 1, 'order_by': 'size'})
+        moved = []
+        progress = VDiskMover().execute([(vdisk, storagedrivers[1]) for vdisk in vdisks], lambda vd, sd: moved.append(vd.guid))
+        self.assertListEqual(list1=[vdisk.guid for vdisk in reversed(vdisks)], list2=moved)
+        self.assertEqual(first=5, second=progress['counts'][VDiskMover.STATUS_MOVED])
+
+        # Moving a vDisk towards a StorageRouter without StorageDriver for its vPool
+        vdisk = VDisk(VDiskController.create_new(volume_name='vdisk_6', volume_size=1024 ** 3, storagedriver_guid=storagedrivers[4].guid))
+        with self.assertRaises(RuntimeError):
+            VDiskController.move_multiple(vdisk_guids=[vdisk.guid], target_storagerouter_guid=storagerouters[2].guid)
+
     def test_event_resize_from_volumedriver(self):
         """
         Test resize from volumedriver event
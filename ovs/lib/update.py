@@ -22,7 +22,10 @@ import copy
 import time
 import inspect
 import logging
+from collections import OrderedDict
+from functools import partial
 from subprocess import CalledProcessError
+from threading import Thread
 from ovs.constants.logging import UPDATE_LOGGER
 from ovs.dal.hybrids.diskpartition import DiskPartition
 from ovs.dal.lists.storagerouterlist import StorageRouterList
@@ -553,21 +556,26 @@ class UpdateController(object):
         :rtype: bool
         """
         cls._logger.info('Updating packages')
-        abort = False
-        for storagerouter in StorageRouterList.get_storagerouters():
-            cls._logger.debug('StorageRouter {0}: Updating packages'.format(storagerouter.ip))
-            try:
-                client = SSHClient(endpoint=storagerouter.ip, username='root')
-            except UnableToConnectException:
-                cls._logger.exception('StorageRouter {0}: Updating packages failed'.format(storagerouter.ip))
-                abort = True
-                continue
 
+        def _update_packages(storagerouter):
+            cls._logger.debug('StorageRouter {0}: Updating packages'.format(storagerouter.ip))
+            client = SSHClient(endpoint=storagerouter.ip, username='root')
+            node_abort = False
             for component in components:
                 packages = storagerouter.package_information.get(component, {}).get('packages', {})
                 if len(packages) > 0:
                     cls._logger.debug('StorageRouter {0}: Updating packages for component {1}'.format(storagerouter.ip, component))
-                    abort |= PackageFactory.update_packages(client=client, packages=packages, logger=cls._logger)
+                    node_abort |= PackageFactory.update_packages(client=client, packages=packages, logger=cls._logger)
+            return node_abort
+
+        abort = False
+        storagerouters = StorageRouterList.get_storagerouters()
+        for storagerouter, (node_abort, exception) in zip(storagerouters, cls._run_concurrently(function=_update_packages, items=storagerouters)):
+            if exception is not None:
+                cls._logger.error('StorageRouter {0}: Updating packages failed: {1}'.format(storagerouter.ip, exception))
+                abort = True
+            else:
+                abort |= node_abort
         cls._logger.info('Updated packages')
         return abort
 
@@ -582,6 +590,13 @@ class UpdateController(object):
         :rtype: NoneType
         """
         UpdateController._logger.info('+++ Starting update +++')
+        step_timings = OrderedDict()
+        step_start = [time.time()]
+
+        def _step_done(step):
+            step_timings[step] = time.time() - step_start[0]
+            UpdateController._logger.info('Step "{0}" took {1:.2f}s'.format(step, step_timings[step]))
+            step_start[0] = time.time()
 
         for component, info in UpdateController.merge_downtime_information().iteritems():
             if component in components and len(info['prerequisites']) > 0:
@@ -615,18 +630,25 @@ class UpdateController(object):
                     extra_ips.append(sr.ip)
 
             ssh_clients.sort(key=lambda cl: ExtensionsToolbox.advanced_sort(element=cl.ip, separator='.'))
+            _step_done('connect')
 
             # Create locks
-            for client in ssh_clients:
+            def _create_lock_files(client):
                 UpdateController._logger.info('{0}: Creating lock files'.format(client.ip))
                 client.run(['touch', UpdateController._update_file])  # Prevents manual install or update individual packages
                 client.run(['touch', UpdateController._update_ongoing_file])
 
+            for _, exception in UpdateController._run_concurrently(function=_create_lock_files, items=ssh_clients):
+                if exception is not None:
+                    raise exception
+            _step_done('create locks')
+
             # Stop services
             if UpdateController.change_services_state(services=services_stop_start,
                                                       ssh_clients=ssh_clients,
                                                       action='stop') is False:
                 raise Exception('Stopping all services on every node failed, cannot continue')
+            _step_done('stop services')
 
             # Collect the functions to be executed before they get overwritten by updated packages, so on each the same functionality is executed
             package_install_plugins = Toolbox.fetch_hooks(component='update', sub_component='package_install_plugin')
@@ -641,10 +663,12 @@ class UpdateController(object):
 
             if abort is True:
                 raise Exception('Installing the packages failed on 1 or more nodes')
+            _step_done('install packages')
 
             # Remove update file
-            for client in ssh_clients:
-                client.file_delete(UpdateController._update_file)
+            for _, exception in UpdateController._run_concurrently(function=lambda cl: cl.file_delete(UpdateController._update_file), items=ssh_clients):
+                if exception is not None:
+                    raise exception
 
             # Migrate extensions
             if PackageFactory.COMP_FWK in components:
@@ -669,6 +693,7 @@ class UpdateController(object):
                         failures.append('{0}: {1}'.format(client.ip, str(ex)))
                 if len(failures) > 0:
                     raise Exception('Failed to run the extensions migrate code on all nodes. Errors found:\n\n{0}'.format('\n\n'.join(failures)))
+                _step_done('migrate extensions')
 
             # Start memcached
             if 'memcached' in services_stop_start:
@@ -677,6 +702,7 @@ class UpdateController(object):
                                                        ssh_clients=ssh_clients,
                                                        action='start')
                 VolatileFactory.store = None
+                _step_done('start memcached')
 
             # Migrate DAL
             if PackageFactory.COMP_FWK in components:
@@ -694,8 +720,9 @@ class UpdateController(object):
                 except Exception:
                     abort = True
                     raise
+                _step_done('migrate DAL')
 
-            # Post update actions
+            # Post update actions are executed node by node, as the hooks restart services (eg: Arakoon) which have to remain available
             for client in ssh_clients:
                 UpdateController._logger.info('{0}: Executing post-update actions'.format(client.ip))
                 with remote(client.ip, [Toolbox]) as rem:
@@ -711,11 +738,13 @@ class UpdateController(object):
                         fct(components=components)
                     except Exception:
                         UpdateController._logger.exception('Post update hook {0} failed'.format(fct.__name__))
+            _step_done('post update')
 
             # Start services
             UpdateController.change_services_state(services=services_stop_start,
                                                    ssh_clients=ssh_clients,
                                                    action='start')
+            _step_done('start services')
         except NoLockAvailableException:
             UpdateController._logger.error('Another update is currently in progress!')
         except Exception as ex:
@@ -735,6 +764,8 @@ class UpdateController(object):
                             ssh_client.file_delete(file_name)
                     except:
                         UpdateController._logger.warning('[0}: Failed to remove lock file {1}'.format(ssh_client.ip, file_name))
+            if len(step_timings) > 0:
+                UpdateController._logger.info('Update step timings: {0}'.format(', '.join('{0}: {1:.2f}s'.format(step, duration) for step, duration in step_timings.iteritems())))
             if errors_during_update is True:
                 UpdateController._logger.error('Failed to update. Please check all the logs for more information')
             else:
@@ -744,11 +775,12 @@ class UpdateController(object):
     def change_services_state(cls, services, ssh_clients, action):
         """
         Stop/start services on SSH clients
+        The services are handled one by one in order of importance, but each service is handled on all nodes at the same time
         If action is start, we ignore errors and try to start other services on other nodes
         :param services: list of service names
         :type services: list
-        :param client: list of SSHClients on which to execute the service action
-        :type client: list
+        :param ssh_clients: list of SSHClients on which to execute the service action
+        :type ssh_clients: list
         :param action: describes which action should be executed on the service
         :type action: str
         :return: True if all services their states have been succesfully changed
@@ -757,24 +789,64 @@ class UpdateController(object):
         service_manager = ServiceFactory.get_manager()
         if action == 'start':
             services.reverse()  # Start services again in reverse order of stopping
+        description = 'stopping' if action == 'stop' else 'starting' if action == 'start' else 'restarting'
         for service_name in services:
-            for ssh_client in ssh_clients:
-                description = 'stopping' if action == 'stop' else 'starting' if action == 'start' else 'restarting'
-                try:
-                    if service_manager.has_service(service_name, client=ssh_client):
-                        ServiceFactory.change_service_state(client=ssh_client,
-                                                            name=service_name,
-                                                            state=action,
-                                                            logger=cls._logger)
-                except Exception as exc:
-                    cls._logger.warning('{0}: Something went wrong {1} service {2}: {3}'.format(ssh_client.ip, description, service_name, exc))
-                    if action == 'stop':
-                        return False
+            start = time.time()
+            failed = False
+            results = cls._run_concurrently(function=partial(cls._change_service_state, service_manager=service_manager, service_name=service_name, action=action),
+                                            items=ssh_clients)
+            for ssh_client, (_, exception) in zip(ssh_clients, results):
+                if exception is not None:
+                    failed = True
+                    cls._logger.warning('{0}: Something went wrong {1} service {2}: {3}'.format(ssh_client.ip, description, service_name, exception))
+            cls._logger.debug('{0} service {1} on {2} nodes took {3:.2f}s'.format(description.capitalize(), service_name, len(ssh_clients), time.time() - start))
+            if failed is True and action == 'stop':
+                return False
         return True
 
+    @classmethod
+    def _change_service_state(cls, ssh_client, service_manager, service_name, action):
+        """
+        Change the state of a service on a single node, if the service is present on that node
+        """
+        if service_manager.has_service(service_name, client=ssh_client):
+            ServiceFactory.change_service_state(client=ssh_client,
+                                                name=service_name,
+                                                state=action,
+                                                logger=cls._logger)
+
     ###########
     # HELPERS #
     ###########
+    @staticmethod
+    def _run_concurrently(function, items):
+        """
+        Execute a function for each item in a separate thread and wait for all of them to finish
+        Every item gets its own thread, so the items should not share state (eg: a single SSHClient per node)
+        :param function: Function to execute, called with the item as only argument
+        :type function: callable
+        :param items: Items to execute the function for
+        :type items: list
+        :return: The return value and the raised exception (or None) for each item, in the order of the items
+        :rtype: list[tuple]
+        """
+        results = [(None, None)] * len(items)
+
+        def _execute(index, item):
+            try:
+                results[index] = (function(item), None)
+            except Exception as ex:
+                results[index] = (None, ex)
+
+        threads = []
+        for index, item in enumerate(items):
+            thread = Thread(name='update_{0}'.format(index), target=_execute, args=(index, item))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return results
+
     @staticmethod
     def _refresh_package_information(client):
         # Refresh updates
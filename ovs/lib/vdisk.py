@@ -26,8 +26,11 @@ import uuid
 import pickle
 import random
 import logging
+from Queue import Empty, Queue
+from threading import Lock, Thread
+from ovs.constants.celery import TASK_PRIORITY_EVENT, TASK_PRIORITY_INTERACTIVE
 from ovs.constants.storagedriver import VOLDRV_DTL_MANUAL_MODE, VOLDRV_DTL_AUTOMATIC_MODE, CACHE_BLOCK, CACHE_FRAGMENT
-from ovs.constants.vdisk import SCRUB_VDISK_EXCEPTION_MESSAGE
+from ovs.constants.vdisk import DTL_CHECKUP_CONFIG_KEY, DTL_CHECKUP_DEFAULTS, SCRUB_VDISK_EXCEPTION_MESSAGE, SNAPSHOT_CONCURRENCY_DEFAULT, SNAPSHOT_CONCURRENCY_KEY
 from ovs.dal.exceptions import ObjectNotFoundException
 from ovs.dal.hybrids.domain import Domain
 from ovs.dal.hybrids.j_vdiskdomain import VDiskDomain
@@ -36,7 +39,6 @@ from ovs.dal.hybrids.storagerouter import StorageRouter
 from ovs.dal.hybrids.vdisk import VDisk
 from ovs.dal.hybrids.vpool import VPool
 from ovs.dal.lists.storagedriverlist import StorageDriverList
-from ovs.dal.lists.storagerouterlist import StorageRouterList
 from ovs.dal.lists.vdisklist import VDiskList
 from ovs.dal.lists.vpoollist import VPoolList
 from ovs_extensions.constants import is_unittest_mode
@@ -51,6 +53,9 @@ from ovs.extensions.storageserver.storagedriver import DTLConfig, DTLConfigMode,
                                                        MDSNodeConfig, StorageDriverClient, StorageDriverConfiguration, VolumeRestartInProgressException
 from ovs.lib.helpers.decorators import log, ovs_task
 from ovs.lib.helpers.toolbox import Schedule, Toolbox
+from ovs.lib.helpers.vdisk.dtlplanner import DTLTopology
+from ovs.lib.helpers.vdisk.executor import VDiskExecutor
+from ovs.lib.helpers.vdisk.mover import VDiskMover
 from ovs.lib.mdsservice import MDSServiceController
 from volumedriver.storagerouter import VolumeDriverEvents_pb2
 
@@ -181,7 +186,7 @@ class VDiskController(object):
             VDiskController._logger.exception('Error when setting cache quotas')
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.delete_from_voldrv')
+    @ovs_task(name='ovs.vdisk.delete_from_voldrv', priority=TASK_PRIORITY_EVENT)
     @log('VOLUMEDRIVER_TASK')
     def delete_from_voldrv(volume_id):
         """
@@ -204,7 +209,7 @@ class VDiskController(object):
                 VDiskController._logger.info('Volume {0} does not exist'.format(volume_id))
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.delete')
+    @ovs_task(name='ovs.vdisk.delete', priority=TASK_PRIORITY_INTERACTIVE)
     def delete(vdisk_guid):
         """
         Delete a vDisk through API
@@ -233,7 +238,7 @@ class VDiskController(object):
         VDiskController.delete_from_voldrv(vdisk.volume_id)
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.extend')
+    @ovs_task(name='ovs.vdisk.extend', priority=TASK_PRIORITY_INTERACTIVE)
     def extend(vdisk_guid, volume_size):
         """
         Extend a vDisk through API
@@ -266,7 +271,7 @@ class VDiskController(object):
                 VDiskController._logger.exception('Executing hook {0} failed'.format(_function.__name__))
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.resize_from_voldrv')
+    @ovs_task(name='ovs.vdisk.resize_from_voldrv', priority=TASK_PRIORITY_EVENT)
     @log('VOLUMEDRIVER_TASK')
     def resize_from_voldrv(volume_id, volume_size, volume_path, storagedriver_id):
         """
@@ -309,7 +314,7 @@ class VDiskController(object):
                     VDiskController._logger.exception('Executing hook {0} failed'.format(_function.__name__))
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.migrate_from_voldrv')
+    @ovs_task(name='ovs.vdisk.migrate_from_voldrv', priority=TASK_PRIORITY_EVENT)
     @log('VOLUMEDRIVER_TASK')
     def migrate_from_voldrv(volume_id, new_owner_id):
         """
@@ -331,7 +336,7 @@ class VDiskController(object):
             VDiskController.dtl_checkup(vdisk_guid=vdisk.guid)
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.rename_from_voldrv')
+    @ovs_task(name='ovs.vdisk.rename_from_voldrv', priority=TASK_PRIORITY_EVENT)
     def rename_from_voldrv(old_path, new_path, storagedriver_id):
         """
         Processes a rename event from the volumedriver. At this point we only expect folder renames. These folders
@@ -372,7 +377,7 @@ class VDiskController(object):
                                 VDiskController._logger.exception('Executing hook {0} failed'.format(_function.__name__))
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.clone')
+    @ovs_task(name='ovs.vdisk.clone', priority=TASK_PRIORITY_INTERACTIVE)
     def clone(vdisk_guid, name, snapshot_id=None, storagerouter_guid=None, pagecache_ratio=None, cache_quota=None):
         """
         Clone a vDisk
@@ -502,7 +507,7 @@ class VDiskController(object):
             return vdisk.storagedriver_client.list_snapshots(volume_id, req_timeout_secs=10)
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.create_snapshot')
+    @ovs_task(name='ovs.vdisk.create_snapshot', priority=TASK_PRIORITY_INTERACTIVE)
     def create_snapshot(vdisk_guid, metadata):
         """
         Create a vDisk snapshot
@@ -538,14 +543,19 @@ class VDiskController(object):
         consistent = metadata.get('is_consistent', False)
         metadata = pickle.dumps(metadata)
         results = {}
+        vdisks = []
         for guid in vdisk_guids:
             try:
-                vdisk = VDisk(guid)
+                vdisks.append(VDisk(guid))
+            except Exception as ex:
+                results[guid] = [False, ex.message]
+
+        def _create_snapshot(vdisk):
+            try:
                 snapshot_ids = VDiskController.list_snapshot_ids(vdisk=vdisk)
                 if len(snapshot_ids) > 0:
                     if VDiskController.is_volume_synced_up_to_snapshot(vdisk_guid=vdisk.guid, snapshot_id=snapshot_ids[-1]) is False:  # Most recent last in list
-                        results[guid] = [False, 'Previously created snapshot did not make it to the backend yet']
-                        continue
+                        return [False, 'Previously created snapshot did not make it to the backend yet']
 
                 VDiskController._logger.info('Create {0} snapshot for vDisk {1}'.format('consistent' if consistent is True else 'inconsistent', vdisk.name))
                 snapshot_id = str(uuid.uuid4())
@@ -554,13 +564,20 @@ class VDiskController(object):
                                                            metadata=metadata,
                                                            req_timeout_secs=10)
                 vdisk.invalidate_dynamics(['snapshots', 'snapshot_ids'])
-                results[guid] = [True, snapshot_id]
+                return [True, snapshot_id]
             except Exception as ex:
-                results[guid] = [False, ex.message]
+                return [False, ex.message]
+
+        # The vDisks are snapshotted concurrently for each StorageDriver, so the snapshots of a group are taken close together
+        executor = VDiskExecutor(name='create_snapshots',
+                                 node_concurrency=Configuration.get(SNAPSHOT_CONCURRENCY_KEY, default=SNAPSHOT_CONCURRENCY_DEFAULT))
+        results.update(executor.execute(vdisks=vdisks, function=_create_snapshot))
+        if len(vdisks) > 1:
+            executor.log_summary(logger=VDiskController._logger)
         return results
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.delete_snapshot')
+    @ovs_task(name='ovs.vdisk.delete_snapshot', priority=TASK_PRIORITY_INTERACTIVE)
     def delete_snapshot(vdisk_guid, snapshot_id):
         """
         Delete a vDisk snapshot
@@ -650,12 +667,13 @@ class VDiskController(object):
         :return:
         """
         snapshots_results = {}
+        clone_counts = VDiskList.get_clone_counts(set(snapshots))
         for snapshot_id in set(snapshots):
             try:
                 if snapshot_id not in VDiskController.list_snapshot_ids(vdisk=vdisk):
                     raise RuntimeError('Snapshot {0} does not belong to vDisk {1}'.format(snapshot_id, vdisk.name))
 
-                nr_clones = len(VDiskList.get_by_parentsnapshot(snapshot_id))
+                nr_clones = clone_counts[snapshot_id]
                 if nr_clones > 0:
                     raise RuntimeError('Snapshot {0} has {1} volume{2} cloned from it, cannot remove'.format(snapshot_id, nr_clones, '' if nr_clones == 1 else 's'))
 
@@ -688,7 +706,8 @@ class VDiskController(object):
         """
         error_message = 'Snapshot not found. Verify this snapshot ID please.'
         busy_message = 'Snapshot in use. Make sure its clone is removed please.'
-        to_remove = [i for i in snapshots if len(VDiskList.get_by_parentsnapshot(i)) == 0]
+        clone_counts = VDiskList.get_clone_counts(snapshots)
+        to_remove = [i for i in snapshots if clone_counts[i] == 0]
         std_client_output = vdisk.storagedriver_client.delete_snapshots(volume_id=str(vdisk.volume_id),
                                                                         snapshots=to_remove,
                                                                         skip_used_snapshots=skip_used_snapshots,
@@ -700,7 +719,7 @@ class VDiskController(object):
         return results
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.set_as_template')
+    @ovs_task(name='ovs.vdisk.set_as_template', priority=TASK_PRIORITY_INTERACTIVE)
     def set_as_template(vdisk_guid):
         """
         Set a vDisk as template
@@ -766,7 +785,7 @@ class VDiskController(object):
             VDiskController._logger.exception('Executing post-migrate actions failed for vDisk {0}'.format(vdisk.name))
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.move')
+    @ovs_task(name='ovs.vdisk.move', priority=TASK_PRIORITY_INTERACTIVE)
     def move(vdisk_guid, target_storagerouter_guid, force=False):
         """
         Move a vDisk to the specified StorageRouter
@@ -785,19 +804,47 @@ class VDiskController(object):
     def move_multiple(vdisk_guids, target_storagerouter_guid, force=False):
         """
         Move list of vDisks to the specified StorageRouter
+        The vDisks are moved concurrently, limited per source and per target StorageDriver (see VDiskMover)
+        While moving, the progress is published as task state 'PROGRESS'
         :param vdisk_guids: Guids of the vDisk to move
         :type vdisk_guids: list
         :param target_storagerouter_guid: Guid of the StorageRouter to move the vDisk to
         :type target_storagerouter_guid: str
         :param force: Indicates whether to force the migration or not (forcing can lead to data loss)
         :type force: bool
-        :return: None
+        :return: The progress of the moves: amount of vDisks per status, the throughput and the outcome for every vDisk
+        :rtype: dict
         """
+        storagerouter = StorageRouter(target_storagerouter_guid)
+        storagedrivers = dict((storagedriver.vpool_guid, storagedriver) for storagedriver in storagerouter.storagedrivers)
+        moves = []
         for vdisk_guid in vdisk_guids:
-            VDiskController._move(vdisk_guid, target_storagerouter_guid, force)
+            vdisk = VDisk(vdisk_guid)
+            if vdisk.vpool_guid not in storagedrivers:
+                raise RuntimeError('Failed to find the matching StorageDriver for vdisk {0}'.format(vdisk.name))
+            moves.append((vdisk, storagedrivers[vdisk.vpool_guid]))
+
+        # The moves are executed in separate threads, so the task id has to be passed explicitly when reporting progress
+        task_id = VDiskController.move_multiple.request.id if hasattr(VDiskController.move_multiple, 'request') else None
+
+        def _report_progress(progress):
+            if task_id is not None:
+                VDiskController.move_multiple.update_state(task_id=task_id, state='PROGRESS', meta=progress)
+
+        def _move_vdisk(vdisk, storagedriver):
+            VDiskController._move(vdisk.guid, storagedriver.storagerouter_guid, force)
+
+        mover = VDiskMover(progress_callback=_report_progress)
+        progress = mover.execute(moves, _move_vdisk)
+        VDiskController._logger.info('Moved {0}/{1} vDisks to StorageRouter {2} in {3:.1f}s'.format(progress['counts'][VDiskMover.STATUS_MOVED], progress['total'],
+                                                                                                storagerouter.name, progress['elapsed']))
+        failed = sorted(info['name'] for info in progress['volumes'].itervalues() if info['status'] == VDiskMover.STATUS_FAILED)
+        if len(failed) > 0:
+            raise RuntimeError('Failed to move vDisks {0}'.format(', '.join(failed)))
+        return progress
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.rollback')
+    @ovs_task(name='ovs.vdisk.rollback', priority=TASK_PRIORITY_INTERACTIVE)
     def rollback(vdisk_guid, timestamp):
         """
         Rolls back a vDisk based on a given vDisk snapshot timestamp
@@ -819,7 +866,7 @@ class VDiskController(object):
         return True
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.create_from_template')
+    @ovs_task(name='ovs.vdisk.create_from_template', priority=TASK_PRIORITY_INTERACTIVE)
     def create_from_template(vdisk_guid, name, storagerouter_guid=None, pagecache_ratio=None, cache_quota=None):
         """
         Create a vDisk from a template
@@ -909,7 +956,7 @@ class VDiskController(object):
                 'backingdevice': devicename}
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.create_new')
+    @ovs_task(name='ovs.vdisk.create_new', priority=TASK_PRIORITY_INTERACTIVE)
     def create_new(volume_name, volume_size, storagedriver_guid, pagecache_ratio=1.0, cache_quota=None):
         """
         Create a new vDisk/volume using hypervisor calls
@@ -1040,7 +1087,7 @@ class VDiskController(object):
                 'pagecache_ratio': vdisk.pagecache_ratio}
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.set_config_params')
+    @ovs_task(name='ovs.vdisk.set_config_params', priority=TASK_PRIORITY_INTERACTIVE)
     def set_config_params(vdisk_guid, new_config_params):
         """
         Sets configuration parameters for a given vDisk.
@@ -1233,6 +1280,8 @@ class VDiskController(object):
             - Second priority to StorageRouters located in the vDisk's StorageRouter's Regular Domain
             - If Domains configured, but no StorageRouters are found matching any of the Domains on the vDisk's StorageRouter, a random SR in the same vPool is chosen
             - If no Domains configured on the vDisk StorageRouter, any other StorageRouter on which the vPool has been extended is chosen
+        The possible targets are determined from a single snapshot of the topology and the vDisks are checked by a pool of workers
+        vDisks which are locked are retried later on, waiting longer for the lock every time
 
         :param vpool_guid: vPool to check the DTL configuration of all its vDisks
         :type vpool_guid: str
@@ -1266,193 +1315,227 @@ class VDiskController(object):
                 VDiskController._logger.warning('    vPool with guid {0} no longer available in model, skipping this iteration'.format(vpool_guid))
                 return
 
-        errors_found = False
-        root_client_map = {}
         vdisks = VDiskList.get_vdisks() if vdisk is None and vpool is None else vpool.vdisks if vpool is not None else [vdisk]
-        iteration = 0
-        while len(vdisks) > 0:
-            time_to_wait_for_lock = iteration * 10 + 1
-            iteration += 1
-            if time_to_wait_for_lock > 40:
-                VDiskController._logger.error('vDisks with guids {0} could not be checked'.format(', '.join([vdisk.guid for vdisk in vdisks])))
-                errors_found = True
-                break
-            vdisks_copy = list(vdisks)
-            for vdisk in vdisks_copy:
-                try:
-                    ####################
-                    # GATHER INFORMATION
-                    VDiskController._logger.info('    Verifying vDisk {0} with guid {1}'.format(vdisk.name, vdisk.guid))
-                    vdisk.invalidate_dynamics(['storagedriver_client', 'storagerouter_guid'])
-                    if vdisk.storagedriver_client is None:
-                        vdisks.remove(vdisk)
-                        VDiskController._logger.warning('    VDisk {0} with guid {1} does not have a storagedriver client'.format(vdisk.name, vdisk.guid))
-                        continue
-
-                    vpool = vdisk.vpool
-                    lock_key = 'dtl_checkup_{0}'.format(vdisk.guid)
-                    vpool_config = vpool.configuration
-                    ExtensionsToolbox.verify_required_params(required_params={'dtl_mode': (str, StorageDriverClient.VPOOL_DTL_MODE_MAP.keys()),
-                                                                              'dtl_enabled': (bool, None),
-                                                                              'dtl_config_mode': (str, [VOLDRV_DTL_MANUAL_MODE, VOLDRV_DTL_AUTOMATIC_MODE])},
-                                                             actual_params=vpool_config)
-
-                    volume_id = str(vdisk.volume_id)
-                    dtl_vpool_enabled = vpool_config['dtl_enabled']
-                    dtl_vpool_config_mode = vpool_config['dtl_config_mode']
+        config = DTL_CHECKUP_DEFAULTS.copy()
+        config.update(Configuration.get(DTL_CHECKUP_CONFIG_KEY, default={}))
+        lock_retries = max(0, int(config['lock_retries']))
+        topology = DTLTopology()
+        checkup_queue = Queue()
+        for vdisk in vdisks:
+            checkup_queue.put((vdisk, 0))
+
+        errors = []
+        dtl_services = {}
+        dtl_service_locks = {}
+        dtl_service_locks_lock = Lock()
+
+        def _dtl_service_available(_storagerouter, _vpool, _vdisk):
+            # Every DTL service is only verified once per checkup. Only threads waiting for the same service block on its verification
+            key = (_storagerouter.guid, _vpool.guid)
+            with dtl_service_locks_lock:
+                service_lock = dtl_service_locks.setdefault(key, Lock())
+            with service_lock:
+                if key not in dtl_services:
+                    dtl_services[key] = False
                     try:
-                        current_dtl_config = vdisk.storagedriver_client.get_dtl_config(volume_id, req_timeout_secs=5)
-                        current_dtl_config_mode = vdisk.storagedriver_client.get_dtl_config_mode(volume_id, req_timeout_secs=5)
-                    except Exception:
-                        # Can occur when a volume has not been stolen yet from a dead node
-                        VDiskController._logger.exception('    VDisk {0} with guid {1}: Failed to retrieve the DTL configuration from storage driver'.format(vdisk.name, vdisk.guid))
-                        errors_found = True
-                        vdisks.remove(vdisk)
-                        continue
-
-                    ##########################
-                    # CHECKS FOR DISABLED DTLs
-                    if dtl_vpool_enabled is False and current_dtl_config is None:
-                        if current_dtl_config_mode == DTLConfigMode.AUTOMATIC:
-                            VDiskController._logger.info('    DTL is globally disabled for vPool {0} with guid {1}. Setting to MANUAL mode for vDisk {2}'.format(vpool.name, vpool.guid, vdisk.name))
-                            try:
-                                with volatile_mutex(lock_key, wait=time_to_wait_for_lock):
-                                    vdisk.storagedriver_client.set_manual_dtl_config(volume_id, None, req_timeout_secs=10)
-                                    vdisk.invalidate_dynamics(['dtl_status'])
-                            except NoLockAvailableException:
-                                VDiskController._logger.info('    Could not acquire lock while trying to set MANUAL mode for vDisk {0}, continuing with next vDisk'.format(vdisk.name))
-                                continue
-                        vdisks.remove(vdisk)
-                        continue
-                    elif current_dtl_config_mode == DTLConfigMode.MANUAL and current_dtl_config is None and vdisk.has_manual_dtl is True:
-                        VDiskController._logger.info('    DTL is disabled for vDisk {0} with guid {1}'.format(vdisk.name, vdisk.guid))
-                        vdisks.remove(vdisk)
-                        continue
-
-                    ##########################
-                    # DETERMINE CURRENT TARGET
-                    current_target = None
-                    if current_dtl_config is not None:
-                        sds = [sd for sd in vpool.storagedrivers if sd.storage_ip == current_dtl_config.host]
-                        if len(sds) > 0:
-                            current_target = sds[0]
-
-                    ###################
-                    # VERIFY MANUAL DTL
-                    importances = VDiskController._retrieve_possible_dtl_targets(vdisk=vdisk)
-                    if vdisk.has_manual_dtl is True:
-                        VDiskController._logger.info('    VDisk {0} with guid {1} has a manual DTL configuration'.format(vdisk.name, vdisk.guid))
-                        if current_dtl_config is None:
-                            VDiskController._logger.info('    VDisk {0} with guid {1} has a manually disabled DTL'.format(vdisk.name, vdisk.guid))
-                            vdisks.remove(vdisk)
-                            continue
-
-                        correct = False
-                        for possible_storagerouters in importances[:2]:  # Only allow current_target in primary or secondary for manual DTL
-                            if len(possible_storagerouters) > 0:
-                                if current_target.storagerouter in possible_storagerouters:
-                                    correct = True
-                                break
-                        if correct is True:
-                            VDiskController._logger.info('    VDisk {0} with guid {1} manual DTL configuration is valid'.format(vdisk.name, vdisk.guid))
+                        root_client = SSHClient(endpoint=_storagerouter, username='root')
+                        service_name = 'dtl_{0}'.format(_vpool.name)
+                        if service_manager.has_service(service_name, client=root_client) is True and service_manager.get_service_status(service_name, client=root_client) == 'active':
+                            dtl_services[key] = True
                         else:
-                            VDiskController._logger.warning('OVS_WARNING: VDisk {0} with guid {1} manual DTL configuration is no longer valid ({2})'.format(vdisk.name, vdisk.guid, current_dtl_config))
-                        vdisks.remove(vdisk)
-                        continue
-
-                    ######################
-                    # DETERMINE NEW TARGET
-                    new_targets = []
-                    for index, possible_storagerouters in enumerate(importances):
-                        VDiskController._logger.info('    Checking {0} StorageRouters'.format('primary' if index == 0 else 'secondary' if index == 1 else 'all vPool related'))
-                        for storagerouter in possible_storagerouters:
-                            if storagerouter in storagerouters_to_exclude:
-                                continue
-                            if storagerouter not in root_client_map:
-                                root_client_map[storagerouter] = None
-                                try:
-                                    root_client = SSHClient(endpoint=storagerouter, username='root')
-                                    service_name = 'dtl_{0}'.format(vpool.name)
-                                    if service_manager.has_service(service_name, client=root_client) is True and service_manager.get_service_status(service_name, client=root_client) == 'active':
-                                        root_client_map[storagerouter] = root_client
-                                    else:
-                                        VDiskController._logger.warning('    DTL service on Storage Router with IP {0} is not reachable'.format(storagerouter.ip))
-                                except UnableToConnectException:
-                                    VDiskController._logger.warning('    Storage Router with IP {0} of vDisk {1} is not reachable'.format(storagerouter.ip, vdisk.name))
-                            if root_client_map[storagerouter] is not None:
-                                new_targets.append(storagerouter)
-                        if len(new_targets) > 0:  # StorageRouters with highest possible priority found
-                            break
+                            VDiskController._logger.warning('    DTL service on Storage Router with IP {0} is not reachable'.format(_storagerouter.ip))
+                    except UnableToConnectException:
+                        VDiskController._logger.warning('    Storage Router with IP {0} of vDisk {1} is not reachable'.format(_storagerouter.ip, _vdisk.name))
+                return dtl_services[key]
 
-                    #################################
-                    # VERIFY RECONFIGURATION REQUIRED
-                    reconfigure_required = False
-                    if current_dtl_config is None:
-                        VDiskController._logger.info('        No DTL configuration found, but there are Storage Routers available')
-                        reconfigure_required = True
-                    elif current_dtl_config_mode == DTLConfigMode.AUTOMATIC:
-                        VDiskController._logger.info('        DTL configuration set to AUTOMATIC, switching to MANUAL')
-                        reconfigure_required = True
-                    elif dtl_vpool_config_mode == DTLConfigMode.MANUAL and dtl_vpool_enabled is True:
-                        VDiskController._logger.info('        DTL configuration set to MANUAL, but static host provided ... overruling')
-                        reconfigure_required = True
-                    elif current_target is None:
-                        VDiskController._logger.info('        DTL configuration set to MANUAL, but no StorageRouter found ... correcting')
-                        reconfigure_required = True
-                    elif current_target is not None and len(new_targets) == 0:
-                        VDiskController._logger.info('        DTL configuration set to MANUAL, but no new StorageRouter found ... setting to STANDALONE')
-                        reconfigure_required = True
-                    elif current_target.storagerouter not in new_targets:
-                        VDiskController._logger.info('        DTL configuration is not optimal, updating to new location')
-                        reconfigure_required = True
-                    elif current_dtl_config.port != current_target.ports['dtl']:
-                        VDiskController._logger.info('        Configured port does not match expected port ({0} vs {1})'.format(current_dtl_config.port, current_target.ports['dtl']))
-                        reconfigure_required = True
-
-                    if reconfigure_required is False:
-                        vdisks.remove(vdisk)
-                        continue
-
-                    #####################
-                    # RECONFIGURE THE DTL
-                    if len(new_targets) == 0:
-                        dtl_config = None
-                        VDiskController._logger.info('        DTL config that will be set -->  None')
+        def _process():
+            while True:
+                try:
+                    _vdisk, attempt = checkup_queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    if VDiskController._dtl_checkup_vdisk(vdisk=_vdisk,
+                                                          topology=topology,
+                                                          storagerouters_to_exclude=storagerouters_to_exclude,
+                                                          lock_wait=attempt * 10 + 1,
+                                                          dtl_service_available=_dtl_service_available) is False:
+                        errors.append(_vdisk.guid)
+                except NoLockAvailableException:
+                    if attempt < lock_retries:
+                        VDiskController._logger.info('    Could not acquire lock for vDisk {0}, retrying later'.format(_vdisk.name))
+                        checkup_queue.put((_vdisk, attempt + 1))
                     else:
-                        sds = [sd for sd in vpool.storagedrivers if sd.storagerouter == new_targets[0]]
-                        if len(sds) == 0:
-                            VDiskController._logger.error('Could not retrieve related storagedriver')
-                            errors_found = True
-                            vdisks.remove(vdisk)
-                            continue
-
-                        sd = sds[0]
-                        dtl_ip = str(sd.storage_ip)
-                        dtl_port = sd.ports['dtl']
-                        dtl_mode = vpool_config['dtl_mode'] if current_dtl_config is None else StorageDriverClient.REVERSE_DTL_MODE_MAP[current_dtl_config.mode]
-                        dtl_config = DTLConfig(dtl_ip, dtl_port, StorageDriverClient.VDISK_DTL_MODE_MAP[dtl_mode])
-                        VDiskController._logger.info('        DTL config that will be set -->  Host: {0}, Port: {1}, Mode: {2}'.format(dtl_ip, dtl_port, dtl_mode))
-                    try:
-                        with volatile_mutex(lock_key, wait=time_to_wait_for_lock):
-                            vdisk.storagedriver_client.set_manual_dtl_config(volume_id, dtl_config, req_timeout_secs=10)
-                            vdisk.has_manual_dtl = False  # As soon as DTL checkup changes DTL settings, its no longer manual
-                            vdisk.save()
-                            vdisk.invalidate_dynamics(['dtl_status'])
-                            vdisks.remove(vdisk)
-                    except NoLockAvailableException:
-                        VDiskController._logger.info('    Could not acquire lock, continuing with next vDisk')
+                        VDiskController._logger.error('vDisk {0} with guid {1} could not be checked'.format(_vdisk.name, _vdisk.guid))
+                        errors.append(_vdisk.guid)
                 except Exception:
-                    errors_found = True
-                    VDiskController._logger.exception('Something went wrong configuring the DTL for vDisk {0} with guid {1}'.format(vdisk.name, vdisk.guid))
-                    vdisks.remove(vdisk)
-
-        if errors_found is True:
+                    VDiskController._logger.exception('Something went wrong configuring the DTL for vDisk {0} with guid {1}'.format(_vdisk.name, _vdisk.guid))
+                    errors.append(_vdisk.guid)
+
+        threads = []
+        for index in xrange(min(max(1, int(config['workers'])), checkup_queue.qsize())):
+            thread = Thread(name='dtl_checkup_{0}'.format(index), target=_process)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if len(errors) > 0:
             VDiskController._logger.error('DTL checkup ended with errors')
             raise Exception('DTL checkup failed with errors. Please check logging for more information')
         VDiskController._logger.info('DTL checkup ended')
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.dtl_state_transition')
+    def _dtl_checkup_vdisk(vdisk, topology, storagerouters_to_exclude, lock_wait, dtl_service_available):
+        """
+        Check and correct the DTL configuration of a single vDisk (see dtl_checkup for the allocation rules)
+        :param vdisk: vDisk to check
+        :type vdisk: ovs.dal.hybrids.vdisk.VDisk
+        :param topology: Snapshot of the cluster topology
+        :type topology: ovs.lib.helpers.vdisk.dtlplanner.DTLTopology
+        :param storagerouters_to_exclude: Storage Router Guids to exclude from possible targets
+        :type storagerouters_to_exclude: list
+        :param lock_wait: Amount of seconds to wait for the lock of the vDisk
+        :type lock_wait: int
+        :param dtl_service_available: Function returning whether the DTL service of a vPool is running on a StorageRouter
+        :type dtl_service_available: callable
+        :raises NoLockAvailableException: When the lock of the vDisk could not be acquired
+        :return: False when the DTL could not be verified, True otherwise
+        :rtype: bool
+        """
+        ####################
+        # GATHER INFORMATION
+        VDiskController._logger.info('    Verifying vDisk {0} with guid {1}'.format(vdisk.name, vdisk.guid))
+        vdisk.invalidate_dynamics(['storagedriver_client', 'storagerouter_guid'])
+        if vdisk.storagedriver_client is None:
+            VDiskController._logger.warning('    VDisk {0} with guid {1} does not have a storagedriver client'.format(vdisk.name, vdisk.guid))
+            return True
+
+        vpool = vdisk.vpool
+        lock_key = 'dtl_checkup_{0}'.format(vdisk.guid)
+        vpool_config = vpool.configuration
+        ExtensionsToolbox.verify_required_params(required_params={'dtl_mode': (str, StorageDriverClient.VPOOL_DTL_MODE_MAP.keys()),
+                                                                  'dtl_enabled': (bool, None),
+                                                                  'dtl_config_mode': (str, [VOLDRV_DTL_MANUAL_MODE, VOLDRV_DTL_AUTOMATIC_MODE])},
+                                                 actual_params=vpool_config)
+
+        volume_id = str(vdisk.volume_id)
+        dtl_vpool_enabled = vpool_config['dtl_enabled']
+        dtl_vpool_config_mode = vpool_config['dtl_config_mode']
+        try:
+            current_dtl_config = vdisk.storagedriver_client.get_dtl_config(volume_id, req_timeout_secs=5)
+            current_dtl_config_mode = vdisk.storagedriver_client.get_dtl_config_mode(volume_id, req_timeout_secs=5)
+        except Exception:
+            # Can occur when a volume has not been stolen yet from a dead node
+            VDiskController._logger.exception('    VDisk {0} with guid {1}: Failed to retrieve the DTL configuration from storage driver'.format(vdisk.name, vdisk.guid))
+            return False
+
+        ##########################
+        # CHECKS FOR DISABLED DTLs
+        if dtl_vpool_enabled is False and current_dtl_config is None:
+            if current_dtl_config_mode == DTLConfigMode.AUTOMATIC:
+                VDiskController._logger.info('    DTL is globally disabled for vPool {0} with guid {1}. Setting to MANUAL mode for vDisk {2}'.format(vpool.name, vpool.guid, vdisk.name))
+                with volatile_mutex(lock_key, wait=lock_wait):
+                    vdisk.storagedriver_client.set_manual_dtl_config(volume_id, None, req_timeout_secs=10)
+                    vdisk.invalidate_dynamics(['dtl_status'])
+            return True
+        elif current_dtl_config_mode == DTLConfigMode.MANUAL and current_dtl_config is None and vdisk.has_manual_dtl is True:
+            VDiskController._logger.info('    DTL is disabled for vDisk {0} with guid {1}'.format(vdisk.name, vdisk.guid))
+            return True
+
+        ##########################
+        # DETERMINE CURRENT TARGET
+        current_target = None
+        if current_dtl_config is not None:
+            current_target = topology.get_storagedriver_by_ip(vpool.guid, current_dtl_config.host)
+
+        ###################
+        # VERIFY MANUAL DTL
+        importances = VDiskController._retrieve_possible_dtl_targets(vdisk=vdisk, topology=topology)
+        if vdisk.has_manual_dtl is True:
+            VDiskController._logger.info('    VDisk {0} with guid {1} has a manual DTL configuration'.format(vdisk.name, vdisk.guid))
+            if current_dtl_config is None:
+                VDiskController._logger.info('    VDisk {0} with guid {1} has a manually disabled DTL'.format(vdisk.name, vdisk.guid))
+                return True
+
+            correct = False
+            for possible_storagerouters in importances[:2]:  # Only allow current_target in primary or secondary for manual DTL
+                if len(possible_storagerouters) > 0:
+                    if current_target.storagerouter in possible_storagerouters:
+                        correct = True
+                    break
+            if correct is True:
+                VDiskController._logger.info('    VDisk {0} with guid {1} manual DTL configuration is valid'.format(vdisk.name, vdisk.guid))
+            else:
+                VDiskController._logger.warning('OVS_WARNING: VDisk {0} with guid {1} manual DTL configuration is no longer valid ({2})'.format(vdisk.name, vdisk.guid, current_dtl_config))
+            return True
+
+        ######################
+        # DETERMINE NEW TARGET
+        new_targets = []
+        for index, possible_storagerouters in enumerate(importances):
+            VDiskController._logger.info('    Checking {0} StorageRouters'.format('primary' if index == 0 else 'secondary' if index == 1 else 'all vPool related'))
+            for storagerouter in possible_storagerouters:
+                if storagerouter.guid in storagerouters_to_exclude:
+                    continue
+                if dtl_service_available(storagerouter, vpool, vdisk) is True:
+                    new_targets.append(storagerouter)
+            if len(new_targets) > 0:  # StorageRouters with highest possible priority found
+                break
+
+        #################################
+        # VERIFY RECONFIGURATION REQUIRED
+        reconfigure_required = False
+        if current_dtl_config is None:
+            VDiskController._logger.info('        No DTL configuration found, but there are Storage Routers available')
+            reconfigure_required = True
+        elif current_dtl_config_mode == DTLConfigMode.AUTOMATIC:
+            VDiskController._logger.info('        DTL configuration set to AUTOMATIC, switching to MANUAL')
+            reconfigure_required = True
+        elif dtl_vpool_config_mode == DTLConfigMode.MANUAL and dtl_vpool_enabled is True:
+            VDiskController._logger.info('        DTL configuration set to MANUAL, but static host provided ... overruling')
+            reconfigure_required = True
+        elif current_target is None:
+            VDiskController._logger.info('        DTL configuration set to MANUAL, but no StorageRouter found ... correcting')
+            reconfigure_required = True
+        elif current_target is not None and len(new_targets) == 0:
+            VDiskController._logger.info('        DTL configuration set to MANUAL, but no new StorageRouter found ... setting to STANDALONE')
+            reconfigure_required = True
+        elif current_target.storagerouter not in new_targets:
+            VDiskController._logger.info('        DTL configuration is not optimal, updating to new location')
+            reconfigure_required = True
+        elif current_dtl_config.port != current_target.ports['dtl']:
+            VDiskController._logger.info('        Configured port does not match expected port ({0} vs {1})'.format(current_dtl_config.port, current_target.ports['dtl']))
+            reconfigure_required = True
+
+        if reconfigure_required is False:
+            return True
+
+        #####################
+        # RECONFIGURE THE DTL
+        if len(new_targets) == 0:
+            dtl_config = None
+            VDiskController._logger.info('        DTL config that will be set -->  None')
+        else:
+            sd = topology.get_storagedriver(vpool.guid, new_targets[0].guid)
+            if sd is None:
+                VDiskController._logger.error('Could not retrieve related storagedriver')
+                return False
+
+            dtl_ip = str(sd.storage_ip)
+            dtl_port = sd.ports['dtl']
+            dtl_mode = vpool_config['dtl_mode'] if current_dtl_config is None else StorageDriverClient.REVERSE_DTL_MODE_MAP[current_dtl_config.mode]
+            dtl_config = DTLConfig(dtl_ip, dtl_port, StorageDriverClient.VDISK_DTL_MODE_MAP[dtl_mode])
+            VDiskController._logger.info('        DTL config that will be set -->  Host: {0}, Port: {1}, Mode: {2}'.format(dtl_ip, dtl_port, dtl_mode))
+        with volatile_mutex(lock_key, wait=lock_wait):
+            vdisk.storagedriver_client.set_manual_dtl_config(volume_id, dtl_config, req_timeout_secs=10)
+            vdisk.has_manual_dtl = False  # As soon as DTL checkup changes DTL settings, its no longer manual
+            vdisk.save()
+            vdisk.invalidate_dynamics(['dtl_status'])
+        return True
+
+    @staticmethod
+    @ovs_task(name='ovs.vdisk.dtl_state_transition', priority=TASK_PRIORITY_EVENT)
     @log('VOLUMEDRIVER_TASK')
     def dtl_state_transition(volume_id, old_state, new_state, storagedriver_id):
         """
@@ -1533,7 +1616,7 @@ class VDiskController(object):
             raise Exception('Verifying if vDisk {0} is synced up to snapshot failed'.format(vdisk.name))
 
     @staticmethod
-    @ovs_task(name='ovs.vdisk.restart')
+    @ovs_task(name='ovs.vdisk.restart', priority=TASK_PRIORITY_INTERACTIVE)
     def restart(vdisk_guid, force):
         """
         Restart the given vDisk
@@ -1739,51 +1822,22 @@ class VDiskController(object):
         return devicename.rsplit('/', 1)[-1].rsplit('.', 1)[0]
 
     @staticmethod
-    def _retrieve_possible_dtl_targets(vdisk, dtl_targets=None):
+    def _retrieve_possible_dtl_targets(vdisk, dtl_targets=None, topology=None):
         """
         Retrieve all the StorageRouters which could serve as a possible DTL target location for the specified vDisk
         A list of lists is returned, with the order of lists as following:
             * 1st list: StorageRouters which have a Regular Domain identical to the Recovery Domain of the hosting StorageRouter of the vDisk
             * 2nd list: StorageRouters which have a Regular Domain identical to the Regular Domain of the hosting StorageRouter of the vDisk
             * 3rd list: StorageRouters on which the vPool of the vDisk has been extended to, except for the hosting StorageRouter
+        :param topology: Snapshot of the cluster topology to use. A new one is built when not passed
+        :type topology: ovs.lib.helpers.vdisk.dtlplanner.DTLTopology
         """
-        this_sr = StorageRouter(vdisk.storagerouter_guid)
-        other_storagerouters = set([sd.storagerouter for sd in vdisk.vpool.storagedrivers if sd.storagerouter != this_sr])
-
-        # Retrieve all StorageRouters linked to the Recovery Domains (primary) and Regular Domains (secondary) for the StorageRouter hosting this vDisk
-        primary = set()
-        secondary = set()
-        for junction in this_sr.domains:
-            if junction.backup is True:
-                primary.update(set(StorageRouterList.get_primary_storagerouters_for_domain(junction.domain)))
-            else:
-                secondary.update(set(StorageRouterList.get_primary_storagerouters_for_domain(junction.domain)))
-        primary = primary.intersection(other_storagerouters)
-        secondary = secondary.difference(primary)
-        secondary = secondary.intersection(other_storagerouters)
-
-        domains = []
+        if topology is None:
+            topology = DTLTopology()
         if dtl_targets is None:  # Used by DTL checkup
-            domains = [junction.domain for junction in vdisk.domains_dtl]
-        elif len(dtl_targets) > 0:  # Used by get_set_config_params
-            domains = dtl_targets
-
-        if len(domains) > 0:
-            manual_srs = set()
-            for domain in domains:
-                manual_srs.update(set(StorageRouterList.get_primary_storagerouters_for_domain(domain)))
-
-            # Determine possibilities based on priority
-            primary = manual_srs.intersection(primary)
-            secondary = manual_srs.intersection(secondary)
-            other_storagerouters = manual_srs.intersection(other_storagerouters)
-
-        primary = list(primary)
-        secondary = list(secondary)
-        other_storagerouters = list(other_storagerouters)
-
-        # Randomize the order of StorageRouters for the DTL checkup
-        random.shuffle(primary)
-        random.shuffle(secondary)
-        random.shuffle(other_storagerouters)
-        return [primary, secondary, other_storagerouters]
+            domain_guids = [junction.domain_guid for junction in vdisk.domains_dtl]
+        else:  # Used by get_set_config_params
+            domain_guids = [domain.guid for domain in dtl_targets]
+        return topology.get_possible_targets(storagerouter_guid=vdisk.storagerouter_guid,
+                                             vpool_guid=vdisk.vpool_guid,
+                                             domain_guids=domain_guids)
@@ -579,10 +579,7 @@ class VPoolController(object):
         balances = [VDiskBalance.from_dict(b) for b in exported_balances]
         if not all(b.storagedriver.vpool_guid == vpool_guid for b in balances):
             raise ValueError("Not all balances are part of the same vpool")
-        for balance in balances:  # type: VDiskBalance
-            if len(execute_only_for_srs) > 0 and balance.storagedriver.storagerouter_guid in execute_only_for_srs:
-                successful_moves, failed_moves = balance.execute_balance_change_through_overflow(balances,
-                                                                                                 user_input=False,
-                                                                                                 abort_on_error=False)
-                if failed_moves:
-                    raise FailedMovesException('Could not move volumes {} away'.format(', '.join(failed_moves)))
+        sources = [balance for balance in balances if len(execute_only_for_srs) > 0 and balance.storagedriver.storagerouter_guid in execute_only_for_srs]
+        successful_moves, failed_moves = VDiskBalance.execute_balance_changes_through_overflow(balances, sources=sources)
+        if failed_moves:
+            raise FailedMovesException('Could not move volumes {} away'.format(', '.join(failed_moves)))
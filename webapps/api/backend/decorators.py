@@ -30,12 +30,12 @@ from django.core.handlers.wsgi import WSGIRequest
 from functools import wraps
 from rest_framework import status
 from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
 from api.backend.toolbox import ApiToolbox
-from api.helpers import OVSResponse
+from api.helpers import OVSResponse, OVSStreamingResponse, TimedResponseMixin
 from ovs.dal.datalist import DataList
 from ovs.dal.dataobject import DataObject
 from ovs.dal.exceptions import ObjectNotFoundException
-from ovs.dal.helpers import DalToolbox
 from ovs.dal.lists.userlist import UserList
 from ovs.dal.lists.storagerouterlist import StorageRouterList
 from ovs_extensions.api.exceptions import HttpForbiddenException, HttpNotAcceptableException, HttpNotFoundException,\
@@ -85,16 +85,22 @@ def required_roles(roles):
             if not hasattr(request, 'user') or not hasattr(request, 'client'):
                 raise HttpUnauthorizedException(error='not_authenticated',
                                                 error_description='Not authenticated')
-            user = UserList.get_user_by_username(request.user.username)
-            if user is None:
-                raise HttpUnauthorizedException(error='not_authenticated',
-                                                error_description='Not authenticated')
-            if not ApiToolbox.is_token_in_roles(request.token, roles):
+            token_roles = getattr(request, 'token_roles', None)
+            if token_roles is not None:
+                # Roles were already resolved (and cached) by the authentication backend
+                has_roles = set(roles).issubset(token_roles)
+            else:
+                user = UserList.get_user_by_username(request.user.username)
+                if user is None:
+                    raise HttpUnauthorizedException(error='not_authenticated',
+                                                    error_description='Not authenticated')
+                has_roles = ApiToolbox.is_token_in_roles(request.token, roles)
+            if not has_roles:
                 raise HttpForbiddenException(error='invalid_roles',
                                              error_description='This call requires roles: {0}'.format(', '.join(roles)))
             duration = time.time() - start
             result = f(*args, **kw)
-            if isinstance(result, OVSResponse):
+            if isinstance(result, TimedResponseMixin):
                 result.timings['security'] = [duration, 'Security']
             return result
 
@@ -311,7 +317,7 @@ def load(object_type=None, min_version=settings.VERSION[0], max_version=settings
             duration = time.time() - start
             # Call the function
             result = f(args[0], **new_kwargs)
-            if isinstance(result, OVSResponse):
+            if isinstance(result, TimedResponseMixin):
                 result.timings['parsing'] = [duration, 'Request parsing']
             return result
 
@@ -319,6 +325,55 @@ def load(object_type=None, min_version=settings.VERSION[0], max_version=settings
     return load_wrapper
 
 
+def _stream_list(object_type, data_list, contents, metadata, dynamics=None, chunk_size=100):
+    """
+    Yields the JSON representation of a list response in chunks
+    The metadata is written first, followed by the (serialized) items. The objects are loaded, serialized and released
+    again one chunk at a time, so the memory usage does not grow with the size of the list
+    :param object_type: Type of the objects in the list
+    :type object_type: type
+    :param data_list: The (sorted and paged) list to write
+    :type data_list: ovs.dal.datalist.DataList
+    :param contents: The requested contents. Only guids are written when no contents are given
+    :type contents: list or NoneType
+    :param metadata: The metadata keys to include (_paging, _contents, _sorting)
+    :type metadata: dict
+    :param dynamics: Names of the dynamics to prefetch for every chunk
+    :type dynamics: list or NoneType
+    :param chunk_size: Amount of items to write per chunk
+    :type chunk_size: int
+    :return: Generator yielding JSON strings
+    :rtype: generator
+    """
+    encoder = JSONEncoder()
+    yield '{{{0}, "data": ['.format(', '.join('{0}: {1}'.format(encoder.encode(key), encoder.encode(value)) for key, value in metadata.iteritems()))
+    serializer = FullSerializer(object_type, contents=contents) if contents else None
+    guids = data_list.guids[:]
+    first_chunk = True
+    for index in xrange(0, len(guids), chunk_size):
+        chunk_guids = guids[index:index + chunk_size]
+        if serializer is None:
+            chunk = [encoder.encode(guid) for guid in chunk_guids]
+        else:
+            chunk = []
+            chunk_list = data_list[index:index + chunk_size]
+            if dynamics and len(chunk_guids) > 1:
+                chunk_list.prefetch_dynamics(dynamics)
+            for guid in chunk_guids:
+                try:
+                    # noinspection PyProtectedMember
+                    chunk.append(encoder.encode(serializer.to_native(chunk_list._get_object(guid))))
+                except ObjectNotFoundException:
+                    pass
+                finally:
+                    # noinspection PyProtectedMember
+                    data_list._objects.pop(guid, None)
+        if len(chunk) > 0:
+            yield '{0}{1}'.format('' if first_chunk is True else ', ', ', '.join(chunk))
+            first_chunk = False
+    yield ']}'
+
+
 def return_list(object_type, default_sort=None):
     """
     List decorator
@@ -333,7 +388,8 @@ def return_list(object_type, default_sort=None):
         metadata['returns'] = {'parameters': {'sorting': default_sort,
                                               'paging': None,
                                               'contents': None,
-                                              'query': None},
+                                              'query': None,
+                                              'streaming': None},
                                'returns': ['list', '200'],
                                'object_type': object_type}
         f.ovs_metadata = metadata
@@ -349,10 +405,14 @@ def return_list(object_type, default_sort=None):
             Request arguments for paging:
             - page: The page number for which the items should be displayed (string/int)
             - page_size: The size of the pages (string/int)
+            - cursor: Cursor (keyset) based paging instead of page numbers. Pass an empty cursor for the first page and
+                      the 'next_cursor' of the returned paging information for the next ones. Requires page_size (string)
             Request arguments for sorting:
             - sort: Comma separated list of the properties to sort on. Prefix with '-' to use descending order (eg name,-description) (string)
             Request arguments for filtering: identical to DataList query params
             - query: The query to perform. See DataList execute_query method for more info
+            Request arguments for streaming:
+            - stream: Serialize and write the objects incrementally instead of rendering the whole list at once (bool)
             """
             request = _find_request(args)
             timings = {}
@@ -369,13 +429,16 @@ def return_list(object_type, default_sort=None):
                     raise ValueError('Query is not valid: \'{0}\''.format(str(ex)))
             if sort is None and default_sort is not None:
                 sort = default_sort
-            sort = None if sort is None else [s for s in reversed(sort.split(','))]
+            sort = None if sort is None else sort.split(',')
             page = request.QUERY_PARAMS.get('page')
             page = int(page) if page is not None and (isinstance(page, int) or page.isdigit()) else None
             page_size = request.QUERY_PARAMS.get('page_size')
             page_size = int(page_size) if page_size is not None and (isinstance(page_size, int) or page_size.isdigit()) else None
+            cursor = request.QUERY_PARAMS.get('cursor')
+            keyset_paging = cursor is not None and page_size is not None
             contents = request.QUERY_PARAMS.get('contents')
             contents = None if contents is None else contents.split(',')
+            stream = str(request.QUERY_PARAMS.get('stream')).lower() in ['true', '1']
             timings['preload'] = [time.time() - start, 'Data preloading']
 
             # 2. Construct hints for decorated function (so it can provide full objects if required)
@@ -431,13 +494,10 @@ def return_list(object_type, default_sort=None):
                 _ = data_list.guids
                 timings['querying'] = [time.time() - start, 'Querying data']
 
-            # 5. Sorting
-            if sort:
+            # 5. Sorting (keyset paging only sorts the requested page)
+            if sort and keyset_paging is False:
                 start = time.time()
-                for sort_item in sort:
-                    desc = sort_item[0] == '-'
-                    field = sort_item[1 if desc else 0:]
-                    data_list.sort(key=lambda e: DalToolbox.extract_key(e, field), reverse=desc)
+                data_list.sort_by(sort)
                 timings['sort'] = [time.time() - start, 'Sorting data']
 
             # 6. Paging
@@ -449,7 +509,13 @@ def return_list(object_type, default_sort=None):
                              'page_size': page_size,
                              'start_number': min(1, total_items),
                              'end_number': total_items}
-            if page is not None:
+            if keyset_paging is True:
+                data_list, next_cursor = data_list.get_page(fields=sort or [], page_size=page_size, cursor=cursor or None)
+                page_metadata = {'total_items': total_items,
+                                 'page_size': page_size,
+                                 'cursor': cursor or None,
+                                 'next_cursor': next_cursor}
+            elif page is not None:
                 max_page = int(math.ceil(total_items / (page_size * 1.0)))
                 if page > max_page:
                     page = max_page
@@ -468,7 +534,27 @@ def return_list(object_type, default_sort=None):
                 page_metadata['page_size'] = total_items
             timings['paging'] = [time.time() - start, 'Selecting current page']
 
-            # 7. Serializing
+            # 7. Prefetching the requested dynamics of the current page concurrently
+            # When streaming, they are prefetched per chunk to keep the memory usage bounded
+            dynamics = []
+            if contents:
+                dynamics = [dynamic.name for dynamic in object_type._dynamics
+                            if ('_dynamics' in contents or dynamic.name in contents) and '-{0}'.format(dynamic.name) not in contents]
+            if len(dynamics) > 0 and stream is False and len(data_list) > 1:
+                start = time.time()
+                data_list.prefetch_dynamics(dynamics)
+                timings['prefetch'] = [time.time() - start, 'Prefetching dynamics']
+
+            # 8. Serializing
+            if stream is True:
+                # Serializing happens while the response is being written, so no serializing timings can be reported
+                metadata = {'_paging': page_metadata,
+                            '_contents': contents,
+                            '_sorting': sort}
+                return OVSStreamingResponse(_stream_list(object_type, data_list, contents, metadata, dynamics=dynamics),
+                                            status=status.HTTP_200_OK,
+                                            timings=timings)
+
             start = time.time()
             if contents:
                 data = FullSerializer(object_type, contents=contents, instance=data_list, many=True).data
@@ -497,9 +583,9 @@ def return_list(object_type, default_sort=None):
             result = {'data': data,
                       '_paging': page_metadata,
                       '_contents': contents,
-                      '_sorting': [s for s in reversed(sort)] if sort else sort}
+                      '_sorting': sort}
 
-            # 8. Building response
+            # 9. Building response
             return OVSResponse(result,
                                status=status.HTTP_200_OK,
                                timings=timings)
@@ -868,7 +954,7 @@ def log(log_slow=True):
             duration = time.time() - start
             if duration > 5 and log_slow is True:
                 logger.warning('API call {0}.{1} took {2}s'.format(f.__module__, f.__name__, round(duration, 2)))
-            if isinstance(return_value, OVSResponse):
+            if isinstance(return_value, TimedResponseMixin):
                 return_value.timings['logging'] = [logging_duration, 'Logging']
             return return_value
 
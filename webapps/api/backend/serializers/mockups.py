@@ -24,7 +24,7 @@ class FullSerializer(object):
     Dummy class
     """
 
-    def __init__(self, object_type, contents, instance, many=False):
+    def __init__(self, object_type, contents, instance=None, many=False):
         """
         Dummy initializer
         """
@@ -32,3 +32,10 @@ class FullSerializer(object):
                      'contents': contents,
                      'instance': instance,
                      'many': many}
+
+    @staticmethod
+    def to_native(obj):
+        """
+        Dummy single object serialization
+        """
+        return {'guid': obj.guid}
@@ -135,12 +135,11 @@ class ClientViewSet(viewsets.ViewSet):
         """
         if client.user_guid == request.client.user_guid or ApiToolbox.is_client_in_roles(request.client, ['manage']):
             for token in client.tokens:
-                for junction in token.roles.itersafe():
-                    junction.delete()
-                token.delete()
+                OAuth2Toolbox.delete_token(token)
             for junction in client.roles.itersafe():
                 junction.delete()
             client.delete()
+            OAuth2Toolbox.invalidate_token_cache()
         else:
             return HttpForbiddenException(error_description='Deleting this client is now allowed',
                                           error='no_ownership')
@@ -72,8 +72,6 @@ class MessagingViewSet(viewsets.ViewSet):
                 if counter >= 120:  # 120 * 0.5 seconds = 60 seconds  = 1 minute
                     break
                 gevent.sleep(.5)
-        if len(messages) == 0:
-            last_message_id = MessageController.last_message_id()
         MessageController.reset_subscriptions(subscriber_id)
         return messages, last_message_id
 
@@ -27,6 +27,7 @@ from rest_framework.permissions import IsAuthenticated
 from api.backend.decorators import required_roles, load, return_object, return_list, log, return_simple
 from api.backend.serializers.serializers import FullSerializer
 from api.backend.toolbox import ApiToolbox
+from api.oauth2.toolbox import OAuth2Toolbox
 from ovs.dal.hybrids.client import Client
 from ovs.dal.hybrids.j_roleclient import RoleClient
 from ovs.dal.hybrids.user import User
@@ -131,13 +132,12 @@ class UserViewSet(viewsets.ViewSet):
                                          error='impossible_request')
         for client in user.clients:
             for token in client.tokens:
-                for junction in token.roles.itersafe():
-                    junction.delete()
-                token.delete()
+                OAuth2Toolbox.delete_token(token)
             for junction in client.roles.itersafe():
                 junction.delete()
             client.delete()
         user.delete()
+        OAuth2Toolbox.invalidate_token_cache()
         return None
 
     @log()
@@ -161,6 +161,7 @@ class UserViewSet(viewsets.ViewSet):
             raise HttpForbiddenException(error_description='A user cannot update itself',
                                          error='impossible_request')
         user.save()
+        OAuth2Toolbox.invalidate_token_cache()
         return user
 
     @action()
@@ -183,9 +184,7 @@ class UserViewSet(viewsets.ViewSet):
             user.save()
             for client in user.clients:
                 for token in client.tokens:
-                    for junction in token.roles:
-                        junction.delete()
-                    token.delete()
+                    OAuth2Toolbox.delete_token(token)
             return user
         raise HttpForbiddenException(error_description='Updating password not allowed',
                                      error='impossible_request')
@@ -19,10 +19,22 @@
 Some helpers
 """
 
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
 
 
-class OVSResponse(Response):
+class TimedResponseMixin(object):
+    """
+    Exposes the collected timings of a response through the Server-Timing header
+    """
+    timings = None
+
+    def build_timings(self):
+        self['Server-Timing'] = ','.join('{0};dur={1};desc={2}'.format(key, timing_info[0] * 1000, timing_info[1])
+                                         for key, timing_info in self.timings.iteritems())
+
+
+class OVSResponse(TimedResponseMixin, Response):
 
     def __init__(self, data=None, status=200,
                  template_name=None, headers=None,
@@ -35,6 +47,16 @@ class OVSResponse(Response):
                                           content_type=content_type)
         self.timings = timings
 
-    def build_timings(self):
-        self['Server-Timing'] = ','.join('{0};dur={1};desc={2}'.format(key, timing_info[0] * 1000, timing_info[1])
-                                         for key, timing_info in self.timings.iteritems())
+
+class OVSStreamingResponse(TimedResponseMixin, StreamingHttpResponse):
+    """
+    Response which writes its content incrementally from a generator (chunked transfer)
+    Only timings gathered before the response is returned end up in the Server-Timing header,
+    as the headers are sent before the content is generated
+    """
+
+    def __init__(self, streaming_content=(), status=200, content_type='application/json', timings=None):
+        super(OVSStreamingResponse, self).__init__(streaming_content=streaming_content,
+                                                   status=status,
+                                                   content_type=content_type)
+        self.timings = timings
@@ -23,7 +23,7 @@ import json
 import time
 import logging
 from django.http import HttpResponse
-from api.helpers import OVSResponse
+from api.helpers import TimedResponseMixin
 from ovs.dal.exceptions import MissingMandatoryFieldsException
 from ovs.dal.lists.storagerouterlist import StorageRouterList
 
@@ -85,7 +85,7 @@ class OVSMiddleware(object):
         """
         _ = self
         # Timings
-        if isinstance(response, OVSResponse):
+        if isinstance(response, TimedResponseMixin):
             if hasattr(request, '_entry_time'):
                 # noinspection PyProtectedMember
                 response.timings['total'] = [time.time() - request._entry_time, 'Total']
@@ -18,8 +18,11 @@
 Contains the OAuth 2 authentication/authorization backends
 """
 import time
+import hashlib
+from threading import Lock
 from django.contrib.auth.models import User as DUser
 from rest_framework.authentication import BaseAuthentication
+from api.oauth2.toolbox import OAuth2Toolbox
 from ovs.dal.lists.bearertokenlist import BearerTokenList
 from ovs_extensions.api.exceptions import HttpUnauthorizedException
 
@@ -28,6 +31,11 @@ class OAuth2Backend(BaseAuthentication):
     """
     OAuth 2 based authentication for Bearer tokens
     """
+    CACHE_TTL = 60
+    CACHE_MAX_ENTRIES = 1000
+
+    _token_cache = {}
+    _token_cache_lock = Lock()
 
     def authenticate(self, request, **kwargs):
         """
@@ -41,24 +49,61 @@ class OAuth2Backend(BaseAuthentication):
             raise HttpUnauthorizedException(error='invalid_authorization_type',
                                             error_description='Invalid authorization type specified')
 
+        entry = OAuth2Backend._get_cached_token(access_token)
+        if entry is None:
+            entry = OAuth2Backend._load_token(access_token)
+        request.client = entry['client']
+        request.token = entry['token']
+        request.token_roles = entry['roles']
+        duser = entry['duser']
+
+        if 'native_django' in kwargs and kwargs['native_django'] is True:
+            return duser
+        return duser, None
+
+    @staticmethod
+    def _get_cached_token(access_token):
+        """
+        Retrieves a previously authenticated token from the cache
+        An entry is only valid as long as it did not expire and no tokens/roles were removed in the meantime
+        :param access_token: The access token passed by the caller
+        :type access_token: str
+        :return: The cache entry or None when the token should be (re)loaded
+        :rtype: dict or NoneType
+        """
+        entry = OAuth2Backend._token_cache.get(hashlib.sha256(access_token).hexdigest())
+        if entry is None or entry['valid_until'] < time.time():
+            return None
+        if entry['revision'] != OAuth2Toolbox.get_token_cache_revision():
+            return None
+        return entry
+
+    @staticmethod
+    def _load_token(access_token):
+        """
+        Loads and validates a token and resolves its Client, User and Roles in a single pass
+        :param access_token: The access token passed by the caller
+        :type access_token: str
+        :return: The (cached) entry for the given token
+        :rtype: dict
+        """
+        # The revision is read upfront so an invalidation during the load will invalidate the resulting entry
+        revision = OAuth2Toolbox.get_token_cache_revision()
         tokens = BearerTokenList.get_by_access_token(access_token)
         if len(tokens) != 1:
             raise HttpUnauthorizedException(error='invalid_token',
                                             error_description='Invalid token passed')
         token = tokens[0]
         if token.expiration < time.time():
-            for junction in token.roles.itersafe():
-                junction.delete()
-            token.delete()
+            OAuth2Toolbox.delete_token(token)
             raise HttpUnauthorizedException(error='token_expired',
                                             error_description='The token passed is expired')
 
-        user = token.client.user
+        client = token.client
+        user = client.user
         if not user.is_active:
             raise HttpUnauthorizedException(error='inactive_user',
                                             error_description='Inactive user')
-        request.client = token.client
-        request.token = token
 
         try:
             duser = DUser.objects.get(username=user.username)
@@ -69,9 +114,22 @@ class OAuth2Backend(BaseAuthentication):
             duser.is_superuser = False
             duser.save()
 
-        if 'native_django' in kwargs and kwargs['native_django'] is True:
-            return duser
-        return duser, None
+        now = time.time()
+        entry = {'token': token,
+                 'client': client,
+                 'roles': [junction.role.code for junction in token.roles],
+                 'duser': duser,
+                 'revision': revision,
+                 'valid_until': min(token.expiration, now + OAuth2Backend.CACHE_TTL)}
+        with OAuth2Backend._token_cache_lock:
+            cache = OAuth2Backend._token_cache
+            if len(cache) >= OAuth2Backend.CACHE_MAX_ENTRIES:
+                for key in [key for key, value in cache.iteritems() if value['valid_until'] < now]:
+                    del cache[key]
+                if len(cache) >= OAuth2Backend.CACHE_MAX_ENTRIES:
+                    cache.clear()
+            cache[hashlib.sha256(access_token).hexdigest()] = entry
+        return entry
 
     def get_user(self, user_id):
         """
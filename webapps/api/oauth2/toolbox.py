@@ -18,10 +18,12 @@
 OAuth2Toolbox
 """
 import time
+import uuid
 import random
 import string
 from ovs.dal.hybrids.bearertoken import BearerToken
 from ovs.dal.hybrids.j_rolebearertoken import RoleBearerToken
+from ovs.extensions.storage.volatilefactory import VolatileFactory
 
 
 class OAuth2Toolbox(object):
@@ -30,6 +32,7 @@ class OAuth2Toolbox(object):
     """
     EXPIRATION_USER = 60 * 60 * 12
     EXPIRATION_CLIENT = 60 * 60
+    TOKEN_CACHE_REVISION_KEY = 'ovs_api_token_cache_revision'
 
     @staticmethod
     def generate_tokens(client, generate_access=False, generic_refresh=False, scopes=None):
@@ -73,9 +76,40 @@ class OAuth2Toolbox(object):
         """
         for token in client.tokens:
             if token.expiration < time.time():
-                for junction in token.roles.itersafe():
-                    junction.delete()
-                token.delete()
+                OAuth2Toolbox.delete_token(token)
+
+    @staticmethod
+    def delete_token(token):
+        """
+        Deletes a token together with its role junctions and invalidates the authentication caches
+        :param token: The token to delete
+        :type token: ovs.dal.hybrids.bearertoken.BearerToken
+        :return: None
+        :rtype: NoneType
+        """
+        for junction in token.roles.itersafe():
+            junction.delete()
+        token.delete()
+        OAuth2Toolbox.invalidate_token_cache()
+
+    @staticmethod
+    def invalidate_token_cache():
+        """
+        Invalidates the token caches of all API processes.
+        Should be called whenever a token, its roles or the Client/User it belongs to are removed or changed
+        :return: None
+        :rtype: NoneType
+        """
+        VolatileFactory.get_client().set(OAuth2Toolbox.TOKEN_CACHE_REVISION_KEY, uuid.uuid4().hex)
+
+    @staticmethod
+    def get_token_cache_revision():
+        """
+        Retrieves the current revision of the token caches. Cached tokens of another revision are no longer valid
+        :return: The current revision
+        :rtype: str or NoneType
+        """
+        return VolatileFactory.get_client().get(OAuth2Toolbox.TOKEN_CACHE_REVISION_KEY)
 
     @staticmethod
     def create_hash(length):
@@ -253,6 +253,17 @@ class OpenAPIView(View):
                                                'description': 'Specifies the size of a page. Supported values: 10, 25, 50 and 100. Requires "page" to be set.',
                                                'required': False,
                                                'type': 'integer'})
+                        parameter_info.append({'name': 'cursor',
+                                               'in': 'query',
+                                               'description': 'Cursor based paging: empty for the first page, "next_cursor" for the following ones. Requires "page_size" to be set.',
+                                               'required': False,
+                                               'type': 'string'})
+                    elif parameter == 'streaming':
+                        parameter_info.append({'name': 'stream',
+                                               'in': 'query',
+                                               'description': 'Write the list incrementally using chunked transfer.',
+                                               'required': False,
+                                               'type': 'boolean'})
                     elif parameter == 'sorting':
                         parameter_info.append({'name': 'sort',
                                                'in': 'query',
@@ -299,16 +310,22 @@ class OpenAPIView(View):
                                                                   'properties': {'total_items': {'type': 'integer',
                                                                                                  'description': 'Total items available.'},
                                                                                  'max_page': {'type': 'integer',
-                                                                                              'description': 'Last page available.'},
+                                                                                              'description': 'Last page available. Absent when using cursor based paging.'},
                                                                                  'end_number': {'type': 'integer',
-                                                                                                'description': '1-based index of the last item in the current page.'},
+                                                                                                'description': '1-based index of the last item in the current page. Absent when using cursor based paging.'},
                                                                                  'current_page': {'type': 'integer',
-                                                                                                  'description': 'Current page number.'},
+                                                                                                  'description': 'Current page number. Absent when using cursor based paging.'},
                                                                                  'page_size': {'type': 'integer',
                                                                                                'description': 'Number of items in the current page.'},
                                                                                  'start_number': {'type': 'integer',
-                                                                                                  'description': '1-based index of the first item in the current page'}},
-                                                                  'required': ['total_items', 'max_page', 'end_number', 'current_page', 'page_size', 'start_number']},
+                                                                                                  'description': '1-based index of the first item in the current page. Absent when using cursor based paging.'},
+                                                                                 'cursor': {'type': 'string',
+                                                                                            'x-nullable': True,
+                                                                                            'description': 'Cursor of the current page when using cursor based paging. Null for the first page.'},
+                                                                                 'next_cursor': {'type': 'string',
+                                                                                                 'x-nullable': True,
+                                                                                                 'description': 'Cursor of the next page when using cursor based paging. Null on the last page.'}},
+                                                                  'required': ['total_items', 'page_size']},
                                                       '_sorting': {'type': 'array',
                                                                    'description': 'Applied sorting',
                                                                    'items': {'type': 'string'},
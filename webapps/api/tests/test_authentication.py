@@ -490,6 +490,41 @@ class Authentication(unittest.TestCase):
         self.assertEqual(context.exception.status_code, 401)
         self.assertEqual(str(context.exception.error), 'token_expired')
 
+    def test_authentication_backend_cache(self):
+        """
+        Validates the token cache of the Authentication backend
+        """
+        from api.oauth2.tokenview import OAuth2TokenView
+        from api.oauth2.backend import OAuth2Backend
+        from ovs.dal.lists.bearertokenlist import BearerTokenList
+
+        time.sleep(180)
+        backend = OAuth2Backend()
+        data = {'grant_type': 'password',
+                'username': 'admin',
+                'password': 'admin'}
+        request = self.factory.post('/', data=data, HTTP_X_REAL_IP='127.0.0.1')
+        response = OAuth2TokenView.as_view()(request)
+        access_token = json.loads(response.content)['access_token']
+        header = 'Bearer {0}'.format(access_token)
+
+        request = self.factory.get('/', HTTP_AUTHORIZATION=header)
+        backend.authenticate(request)
+        token = request.token
+        self.assertListEqual(sorted(request.token_roles), ['manage', 'read', 'write'])
+
+        # Served from cache
+        request = self.factory.get('/', HTTP_AUTHORIZATION=header)
+        backend.authenticate(request)
+        self.assertIs(request.token, token)
+
+        # Removing the token invalidates the cache
+        OAuth2Toolbox.delete_token(BearerTokenList.get_by_access_token(access_token)[0])
+        request = self.factory.get('/', HTTP_AUTHORIZATION=header)
+        with self.assertRaises(HttpUnauthorizedException) as context:
+            backend.authenticate(request)
+        self.assertEqual(str(context.exception.error), 'invalid_token')
+
     def test_metadata(self):
         """
         Validates the authentication related information at the API root's metadata.
@@ -29,6 +29,7 @@ from django.test import RequestFactory
 from api.backend.decorators import limit, required_roles, return_list, return_object, return_task, RateLimiter
 # noinspection PyUnresolvedReferences
 from api.backend.toolbox import ApiToolbox  # Required for the tests
+from api.helpers import OVSStreamingResponse
 from api.oauth2.toolbox import OAuth2Toolbox
 from ovs.dal.datalist import DataList
 from ovs.dal.hybrids.client import Client
@@ -814,3 +815,76 @@ class Decorators(unittest.TestCase):
                 expected_items = [machine.guid for machine in data_list_machines][2:4]
             self.assertEqual(len(response.data['data']), len(expected_items))
             self.assertListEqual(response.data['data'], expected_items)
+
+    def test_return_list_streaming(self):
+        """
+        Validates whether the return_list decorator works correctly:
+        * Parsing:
+          * Parses the 'stream' parameter
+        * Streaming:
+          * Returns a streaming response which writes the metadata and the items incrementally
+          * Only guids are written when no contents are given
+          * Dynamics are not prefetched for the whole list
+        """
+        data_holder = self.data_holder
+        data_list_machines = self.data_list_machines
+
+        request = self.factory.get('/', HTTP_ACCEPT='application/json; version=1')
+        request.QUERY_PARAMS = {'stream': 'true',
+                                'sort': 'name,description'}
+        response = data_holder.get_base_list_guids(1, request)
+        self.assertIsInstance(response, OVSStreamingResponse)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('fetch', response.timings)
+        result = json.loads(''.join(response.streaming_content))
+        self.assertEqual(result['_sorting'], ['name', 'description'])
+        self.assertEqual(result['_paging']['total_items'], len(data_list_machines))
+        self.assertListEqual(result['data'], [self.machines_by_name_description['aa']['bb'].guid,
+                                              self.machines_by_name_description['aa']['cc'].guid,
+                                              self.machines_by_name_description['bb']['aa'].guid,
+                                              self.machines_by_name_description['bb']['dd'].guid])
+
+        request.QUERY_PARAMS = {'stream': 'true',
+                                'contents': '',
+                                'page': 2,
+                                'page_size': 3}
+        response = data_holder.get_base_list(2, request)
+        self.assertIsInstance(response, OVSStreamingResponse)
+        result = json.loads(''.join(response.streaming_content))
+        self.assertEqual(result['_contents'], [''])
+        self.assertEqual(result['_paging']['current_page'], 2)
+        self.assertListEqual(result['data'], [{'guid': data_list_machines[3].guid}])
+
+        # Dynamics are prefetched per chunk while streaming, never for the whole list up front
+        request.QUERY_PARAMS = {'stream': 'true',
+                                'contents': '_dynamics'}
+        response = data_holder.get_base_list(3, request)
+        self.assertNotIn('prefetch', response.timings)
+        result = json.loads(''.join(response.streaming_content))
+        self.assertEqual(len(result['data']), len(data_list_machines))
+
+    def test_return_list_keyset_pagination(self):
+        """
+        Validates whether the return_list decorator works correctly:
+        * Parsing:
+          * Parses the 'cursor' parameter
+        * Returns the requested page and a cursor to the next page
+        """
+        data_holder = self.data_holder
+        request = self.factory.get('/', HTTP_ACCEPT='application/json; version=1')
+        request.QUERY_PARAMS = {'cursor': '',
+                                'page_size': 3,
+                                'sort': 'name,-description'}
+        response = data_holder.get_base_list_guids(1, request)
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.data['data'], [self.machines_by_name_description['aa']['cc'].guid,
+                                                     self.machines_by_name_description['aa']['bb'].guid,
+                                                     self.machines_by_name_description['bb']['dd'].guid])
+        self.assertEqual(response.data['_paging']['total_items'], 4)
+        next_cursor = response.data['_paging']['next_cursor']
+        self.assertIsNotNone(next_cursor)
+
+        request.QUERY_PARAMS['cursor'] = next_cursor
+        response = data_holder.get_base_list_guids(2, request)
+        self.assertListEqual(response.data['data'], [self.machines_by_name_description['bb']['aa'].guid])
+        self.assertIsNone(response.data['_paging']['next_cursor'])
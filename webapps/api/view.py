@@ -28,6 +28,7 @@ from django.conf import settings
 from api.backend.decorators import required_roles, load
 from api.middleware import OVSMiddleware
 from api.oauth2.decorators import auto_response, limit, authenticated
+from api.oauth2.toolbox import OAuth2Toolbox
 from ovs.dal.lists.backendtypelist import BackendTypeList
 from ovs.dal.lists.bearertokenlist import BearerTokenList
 from ovs.dal.lists.storagerouterlist import StorageRouterList
@@ -108,9 +109,7 @@ class MetadataView(View):
                 return dict(data.items() + {'authentication_state': 'invalid_token'}.items())
             token = tokens[0]
             if token.expiration < time.time():
-                for junction in token.roles.itersafe():
-                    junction.delete()
-                token.delete()
+                OAuth2Toolbox.delete_token(token)
                 return dict(data.items() + {'authentication_state': 'token_expired'}.items())
 
             # Gather user metadata